@@ -0,0 +1,33 @@
+"""Transaction project export index
+
+Revision ID: 049b08bc545b
+Revises: 1474b2cb0c65
+Create Date: 2026-10-17 13:02:09.671420
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '049b08bc545b'
+down_revision: Union[str, None] = '1474b2cb0c65'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Lets project ledger exports stream in (created_at, id) order without a sort
+    with op.get_context().autocommit_block():
+        op.create_index('idx_transaction_project_created', 'transaction', ['project_id', 'created_at', 'id'], unique=False, postgresql_concurrently=True)
+        op.drop_index('idx_transaction_project', table_name='transaction', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('idx_transaction_project', 'transaction', ['project_id'], unique=False, postgresql_concurrently=True)
+        op.drop_index('idx_transaction_project_created', table_name='transaction', postgresql_concurrently=True)
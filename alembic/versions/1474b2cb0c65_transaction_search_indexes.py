@@ -0,0 +1,45 @@
+"""Transaction search indexes
+
+Revision ID: 1474b2cb0c65
+Revises: 289ed6c58380
+Create Date: 2026-10-17 11:26:54.018337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1474b2cb0c65'
+down_revision: Union[str, None] = '289ed6c58380'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SEARCH_INDEXES = {
+    'idx_transaction_user_created': ['user_id', 'created_at', 'id'],
+    'idx_transaction_user_type_created': ['user_id', 'transaction_type', 'created_at', 'id'],
+    'idx_transaction_user_status_created': ['user_id', 'status', 'created_at', 'id'],
+    'idx_transaction_user_project_created': ['user_id', 'project_id', 'created_at', 'id'],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Build concurrently so the ledger stays writable on large tables
+    with op.get_context().autocommit_block():
+        for name, columns in SEARCH_INDEXES.items():
+            op.create_index(name, 'transaction', columns, unique=False, postgresql_concurrently=True)
+
+        # (user_id, transaction_type) is a prefix of idx_transaction_user_type_created
+        op.drop_index('idx_transaction_user_type', table_name='transaction', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('idx_transaction_user_type', 'transaction', ['user_id', 'transaction_type'], unique=False, postgresql_concurrently=True)
+        for name in SEARCH_INDEXES:
+            op.drop_index(name, table_name='transaction', postgresql_concurrently=True)
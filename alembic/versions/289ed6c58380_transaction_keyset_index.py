@@ -0,0 +1,28 @@
+"""Transaction keyset index
+
+Revision ID: 289ed6c58380
+Revises: 9679fb9742e9
+Create Date: 2026-10-17 10:03:17.551902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '289ed6c58380'
+down_revision: Union[str, None] = '9679fb9742e9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('idx_transaction_created_id', 'transaction', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_transaction_created_id', table_name='transaction')
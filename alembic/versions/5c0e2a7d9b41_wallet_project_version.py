@@ -0,0 +1,31 @@
+"""Wallet and project row versions
+
+Revision ID: 5c0e2a7d9b41
+Revises: faa01b3b2fcf
+Create Date: 2026-10-17 18:02:41.512904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c0e2a7d9b41'
+down_revision: Union[str, None] = 'faa01b3b2fcf'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A constant server default is a catalog-only change; no table rewrite
+    op.add_column('wallet', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('project', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('project', 'version')
+    op.drop_column('wallet', 'version')
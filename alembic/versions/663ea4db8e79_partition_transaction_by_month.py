@@ -0,0 +1,134 @@
+"""Partition transaction by month
+
+Revision ID: 663ea4db8e79
+Revises: cda02d62f09b
+Create Date: 2026-10-17 15:40:12.918305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '663ea4db8e79'
+down_revision: Union[str, None] = 'cda02d62f09b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Months created ahead of the current one; jobs.create_partitions keeps this up
+MONTHS_AHEAD = 3
+
+COLUMNS = (
+    'user_id, project_id, wallet_id, transaction_type, purchase_type, credit_amount, '
+    'requested_credits, requested_budget, price_paid, price_per_credit, status, reference, '
+    'id, created_at, updated_at, is_active, created_by, updated_by'
+)
+
+# Composite indexes shared by both layouts
+INDEXES = [
+    ('idx_transaction_status_created', ['status', 'created_at']),
+    ('idx_transaction_project_created', ['project_id', 'created_at', 'id']),
+    ('idx_transaction_created_id', ['created_at', 'id']),
+    ('idx_transaction_user_created', ['user_id', 'created_at', 'id']),
+    ('idx_transaction_user_type_created', ['user_id', 'transaction_type', 'created_at', 'id']),
+    ('idx_transaction_user_status_created', ['user_id', 'status', 'created_at', 'id']),
+    ('idx_transaction_user_project_created', ['user_id', 'project_id', 'created_at', 'id']),
+    ('idx_transaction_wallet_created', ['wallet_id', 'created_at']),
+]
+
+# Single-column indexes of the unpartitioned table, covered by INDEXES
+LEGACY_INDEXES = ['id', 'is_active', 'project_id', 'status', 'transaction_type', 'user_id', 'wallet_id']
+
+
+def _create_transaction_table(name: str, partitioned: bool) -> None:
+    primary_key = ['id', 'created_at'] if partitioned else ['id']
+    op.create_table(name,
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('project_id', sa.UUID(), nullable=True),
+    sa.Column('wallet_id', sa.UUID(), nullable=False),
+    sa.Column('transaction_type', postgresql.ENUM(name='transaction_type_enum', create_type=False), nullable=False),
+    sa.Column('purchase_type', postgresql.ENUM(name='purchase_type_enum', create_type=False), nullable=True),
+    sa.Column('credit_amount', sa.DECIMAL(precision=15, scale=2), nullable=False),
+    sa.Column('requested_credits', sa.DECIMAL(precision=15, scale=2), nullable=True),
+    sa.Column('requested_budget', sa.DECIMAL(precision=15, scale=2), nullable=True),
+    sa.Column('price_paid', sa.DECIMAL(precision=10, scale=2), nullable=True),
+    sa.Column('price_per_credit', sa.DECIMAL(precision=10, scale=2), nullable=True),
+    sa.Column('status', postgresql.ENUM(name='transaction_status_enum', create_type=False), nullable=False),
+    sa.Column('reference', sa.String(length=100), nullable=True),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_by', sa.UUID(), nullable=True),
+    sa.Column('updated_by', sa.UUID(), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['user.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['project_id'], ['project.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['updated_by'], ['user.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['wallet_id'], ['wallet.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint(*primary_key, name=f'{name}_pkey'),
+    **({'postgresql_partition_by': 'RANGE (created_at)'} if partitioned else {})
+    )
+
+
+def _move_rows(source: str, target: str) -> None:
+    op.execute(f'INSERT INTO "{target}" ({COLUMNS}) SELECT {COLUMNS} FROM "{source}"')
+    op.drop_table(source)
+    op.execute(f'ALTER TABLE "{target}" RENAME TO "transaction"')
+    op.execute(f'ALTER TABLE "transaction" RENAME CONSTRAINT "{target}_pkey" TO "transaction_pkey"')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Rewrites the whole ledger under an exclusive lock: run in a maintenance window
+    _create_transaction_table('transaction_partitioned', partitioned=True)
+
+    # One partition per month from the oldest row up to MONTHS_AHEAD months
+    # ahead, plus a default partition so an insert never fails if the
+    # partition job falls behind
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            month timestamp;
+        BEGIN
+            FOR month IN
+                SELECT generate_series(
+                    date_trunc('month', COALESCE((SELECT min(created_at) FROM "transaction"), now()) AT TIME ZONE 'UTC'),
+                    date_trunc('month', now() AT TIME ZONE 'UTC') + interval '{MONTHS_AHEAD} months',
+                    interval '1 month'
+                )
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF transaction_partitioned FOR VALUES FROM (%L) TO (%L)',
+                    'transaction_y' || to_char(month, 'YYYY') || 'm' || to_char(month, 'MM'),
+                    month AT TIME ZONE 'UTC',
+                    (month + interval '1 month') AT TIME ZONE 'UTC'
+                );
+            END LOOP;
+        END $$;
+        """
+    )
+    op.execute('CREATE TABLE transaction_default PARTITION OF transaction_partitioned DEFAULT')
+
+    # Copy before indexing so the rows are indexed in bulk
+    _move_rows('transaction', 'transaction_partitioned')
+
+    # Created on the parent, so every partition (current and future) gets
+    # its own local copy
+    for name, columns in INDEXES:
+        op.create_index(name, 'transaction', columns, unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _create_transaction_table('transaction_plain', partitioned=False)
+    _move_rows('transaction', 'transaction_plain')
+
+    for name, columns in INDEXES:
+        op.create_index(name, 'transaction', columns, unique=False)
+    for column in LEGACY_INDEXES:
+        op.create_index(op.f(f'ix_transaction_{column}'), 'transaction', [column], unique=False)
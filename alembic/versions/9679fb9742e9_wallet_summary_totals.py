@@ -0,0 +1,50 @@
+"""Wallet summary totals
+
+Revision ID: 9679fb9742e9
+Revises: 15b1b71690a6
+Create Date: 2026-10-17 09:12:41.204113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9679fb9742e9'
+down_revision: Union[str, None] = '15b1b71690a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('wallet', sa.Column('credit_balance', sa.DECIMAL(precision=15, scale=2), server_default='0', nullable=False))
+    op.add_column('wallet', sa.Column('total_invested', sa.DECIMAL(precision=15, scale=2), server_default='0', nullable=False))
+
+    # Backfill the totals from the existing ledger
+    op.execute(
+        """
+        UPDATE wallet
+        SET credit_balance = totals.credit_balance,
+            total_invested = totals.total_invested
+        FROM (
+            SELECT
+                wallet_id,
+                COALESCE(SUM(credit_amount) FILTER (WHERE status = 'COMPLETED'), 0) AS credit_balance,
+                COALESCE(SUM(price_paid) FILTER (
+                    WHERE status = 'COMPLETED' AND transaction_type = 'PURCHASE'
+                ), 0) AS total_invested
+            FROM "transaction"
+            GROUP BY wallet_id
+        ) AS totals
+        WHERE wallet.id = totals.wallet_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('wallet', 'total_invested')
+    op.drop_column('wallet', 'credit_balance')
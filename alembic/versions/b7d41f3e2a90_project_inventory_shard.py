@@ -0,0 +1,49 @@
+"""Project inventory shards
+
+Revision ID: b7d41f3e2a90
+Revises: 5c0e2a7d9b41
+Create Date: 2026-10-17 18:40:12.208531
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d41f3e2a90'
+down_revision: Union[str, None] = '5c0e2a7d9b41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('project', sa.Column('inventory_shard_count', sa.Integer(), server_default='1', nullable=False))
+    op.create_table('project_inventory_shard',
+    sa.Column('project_id', sa.UUID(), nullable=False),
+    sa.Column('shard_no', sa.Integer(), nullable=False),
+    sa.Column('available_credits', sa.DECIMAL(precision=15, scale=2), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_by', sa.UUID(), nullable=True),
+    sa.Column('updated_by', sa.UUID(), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['user.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['updated_by'], ['user.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['project_id'], ['project.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('project_id', 'shard_no', name='uq_project_inventory_shard_project_no')
+    )
+    op.create_index(op.f('ix_project_inventory_shard_id'), 'project_inventory_shard', ['id'], unique=False)
+    op.create_index(op.f('ix_project_inventory_shard_is_active'), 'project_inventory_shard', ['is_active'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_project_inventory_shard_is_active'), table_name='project_inventory_shard')
+    op.drop_index(op.f('ix_project_inventory_shard_id'), table_name='project_inventory_shard')
+    op.drop_table('project_inventory_shard')
+    op.drop_column('project', 'inventory_shard_count')
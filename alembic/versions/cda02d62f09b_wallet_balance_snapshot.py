@@ -0,0 +1,56 @@
+"""Wallet balance snapshot
+
+Revision ID: cda02d62f09b
+Revises: 049b08bc545b
+Create Date: 2026-10-17 14:21:37.502816
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cda02d62f09b'
+down_revision: Union[str, None] = '049b08bc545b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('wallet_balance_snapshot',
+    sa.Column('wallet_id', sa.UUID(), nullable=False),
+    sa.Column('snapshot_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('balance', sa.DECIMAL(precision=15, scale=2), nullable=False),
+    sa.Column('credit_balance', sa.DECIMAL(precision=15, scale=2), nullable=False),
+    sa.Column('total_invested', sa.DECIMAL(precision=15, scale=2), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_by', sa.UUID(), nullable=True),
+    sa.Column('updated_by', sa.UUID(), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['user.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['updated_by'], ['user.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['wallet_id'], ['wallet.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('wallet_id', 'snapshot_at', name='uq_wallet_balance_snapshot_wallet_at')
+    )
+    op.create_index(op.f('ix_wallet_balance_snapshot_id'), 'wallet_balance_snapshot', ['id'], unique=False)
+    op.create_index(op.f('ix_wallet_balance_snapshot_is_active'), 'wallet_balance_snapshot', ['is_active'], unique=False)
+
+    # Replays a wallet's ledger from its last snapshot
+    with op.get_context().autocommit_block():
+        op.create_index('idx_transaction_wallet_created', 'transaction', ['wallet_id', 'created_at'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_transaction_wallet_created', table_name='transaction', postgresql_concurrently=True)
+
+    op.drop_index(op.f('ix_wallet_balance_snapshot_is_active'), table_name='wallet_balance_snapshot')
+    op.drop_index(op.f('ix_wallet_balance_snapshot_id'), table_name='wallet_balance_snapshot')
+    op.drop_table('wallet_balance_snapshot')
@@ -0,0 +1,51 @@
+"""Revoked token
+
+Revision ID: faa01b3b2fcf
+Revises: 663ea4db8e79
+Create Date: 2026-10-17 16:48:05.337140
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'faa01b3b2fcf'
+down_revision: Union[str, None] = '663ea4db8e79'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('revoked_token',
+    sa.Column('jti', sa.String(length=64), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_by', sa.UUID(), nullable=True),
+    sa.Column('updated_by', sa.UUID(), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['user.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['updated_by'], ['user.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('jti')
+    )
+    op.create_index('idx_revoked_token_created', 'revoked_token', ['created_at'], unique=False)
+    op.create_index('idx_revoked_token_expires', 'revoked_token', ['expires_at'], unique=False)
+    op.create_index(op.f('ix_revoked_token_id'), 'revoked_token', ['id'], unique=False)
+    op.create_index(op.f('ix_revoked_token_is_active'), 'revoked_token', ['is_active'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_revoked_token_is_active'), table_name='revoked_token')
+    op.drop_index(op.f('ix_revoked_token_id'), table_name='revoked_token')
+    op.drop_index('idx_revoked_token_expires', table_name='revoked_token')
+    op.drop_index('idx_revoked_token_created', table_name='revoked_token')
+    op.drop_table('revoked_token')
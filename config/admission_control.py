@@ -0,0 +1,179 @@
+import json
+import threading
+from typing import Any, Dict, Optional, Sequence
+from config.pool_metrics import POOLS, PoolMetrics, wait_class
+from config.settings import settings
+
+# Route classes, highest priority first
+CRITICAL = "critical"
+STANDARD = "standard"
+EXPORT = "export"
+
+API_PREFIX = "/api/v1"
+
+# Not database-bound; never shed
+EXEMPT_PREFIXES = (f"{API_PREFIX}/metrics",)
+
+
+def classify(method: str, path: str) -> Optional[str]:
+    """
+    Route class of a request, or None when it is not subject to admission control.
+
+    Purchases and top-ups are critical, ledger exports are exports and
+    every other API request is standard.
+    """
+    if not path.startswith(API_PREFIX) or path.startswith(EXEMPT_PREFIXES):
+        return None
+    if method == "POST" and path.startswith(f"{API_PREFIX}/transaction/purchase"):
+        return CRITICAL
+    if method == "PUT" and path.startswith(f"{API_PREFIX}/wallet/topup/"):
+        return CRITICAL
+    if path.rstrip("/").endswith("/export"):
+        return EXPORT
+    return STANDARD
+
+
+class AdmissionController:
+    """
+    Sheds load before requests queue on a connection pool.
+
+    A request of a class is admitted while the in-flight requests of the
+    process on this controller's pool stay below capacity x the class's
+    share, so lower classes are turned away first and leave headroom for
+    purchases and top-ups. Non-critical requests are also shed while the
+    pool's recent checkout wait exceeds max_wait_ms, i.e. before the pool
+    is exhausted and waits run into pool_timeout.
+    """
+
+    def __init__(
+            self,
+            capacity: int,
+            shares: Dict[str, float],
+            max_wait_ms: float,
+            retry_after_seconds: int,
+            pool_name: Optional[str] = None
+    ):
+        self.capacity = capacity
+        self.shares = shares
+        self.max_wait_ms = max_wait_ms
+        self.retry_after_seconds = retry_after_seconds
+        self.pool_name = pool_name
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.in_flight_by_class = {name: 0 for name in shares}
+        self.admitted = {name: 0 for name in shares}
+        self.shed = {name: 0 for name in shares}
+
+    @property
+    def pool(self) -> Optional[PoolMetrics]:
+        return POOLS.get(self.pool_name)
+
+    def pool_saturated(self) -> bool:
+        return self.pool is not None and self.pool.recent_wait_ms() > self.max_wait_ms
+
+    def try_admit(self, route_class: str) -> bool:
+        with self._lock:
+            limit = self.capacity * self.shares[route_class]
+            if self.in_flight >= limit or (route_class != CRITICAL and self.pool_saturated()):
+                self.shed[route_class] += 1
+                return False
+            self.in_flight += 1
+            self.in_flight_by_class[route_class] += 1
+            self.admitted[route_class] += 1
+            return True
+
+    def release(self, route_class: str) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.in_flight_by_class[route_class] -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "in_flight": self.in_flight,
+            "pool_wait_ms_recent": round(self.pool.recent_wait_ms(), 3) if self.pool is not None else None,
+            "classes": {
+                name: {
+                    "limit": self.capacity * share,
+                    "in_flight": self.in_flight_by_class[name],
+                    "admitted": self.admitted[name],
+                    "shed": self.shed[name],
+                }
+                for name, share in self.shares.items()
+            },
+        }
+
+
+class AdmissionControlMiddleware:
+    """
+    ASGI middleware applying AdmissionControllers to API requests, each
+    request class to the controller of the pool it uses.
+
+    Rejected requests get 503 with Retry-After without reaching the
+    endpoint. Admitted requests count as in flight until their response
+    (including a streamed body) is complete.
+    """
+
+    def __init__(self, app, controllers: Sequence[AdmissionController]):
+        self.app = app
+        self.controllers = {
+            route_class: controller
+            for controller in controllers
+            for route_class in controller.shares
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        route_class = classify(scope["method"], scope["path"])
+        if route_class is None:
+            return await self.app(scope, receive, send)
+
+        controller = self.controllers[route_class]
+        if not controller.try_admit(route_class):
+            return await self.reject(send, controller)
+
+        token = wait_class.set(route_class)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            wait_class.reset(token)
+            controller.release(route_class)
+
+    async def reject(self, send, controller: AdmissionController) -> None:
+        body = json.dumps({"detail": "Server is busy, retry later"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(controller.retry_after_seconds).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+# Purchases, top-ups and other API requests share the transactional pool
+admission_controller = AdmissionController(
+    capacity=settings.ADMISSION_CAPACITY or settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW,
+    shares={
+        CRITICAL: settings.ADMISSION_CRITICAL_SHARE,
+        STANDARD: settings.ADMISSION_STANDARD_SHARE,
+    },
+    max_wait_ms=settings.ADMISSION_MAX_POOL_WAIT_MS,
+    retry_after_seconds=settings.ADMISSION_RETRY_AFTER_SECONDS,
+    pool_name="transactional"
+)
+
+# Ledger exports read from the reporting pool
+export_admission_controller = AdmissionController(
+    capacity=settings.DB_REPORTING_POOL_SIZE + settings.DB_REPORTING_MAX_OVERFLOW,
+    shares={EXPORT: settings.ADMISSION_EXPORT_SHARE},
+    max_wait_ms=settings.ADMISSION_MAX_POOL_WAIT_MS,
+    retry_after_seconds=settings.ADMISSION_RETRY_AFTER_SECONDS,
+    pool_name="reporting"
+)
+
+admission_controllers = [admission_controller, export_admission_controller]
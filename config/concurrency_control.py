@@ -0,0 +1,148 @@
+import asyncio
+import random
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, Optional
+from fastapi import HTTPException, status
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
+from config.settings import settings
+
+# SQLSTATEs of transactions Postgres aborted to resolve a conflict
+SERIALIZATION_FAILURE = "40001"
+DEADLOCK_DETECTED = "40P01"
+
+
+class ConcurrencyStrategy(str, Enum):
+    """
+    How wallet and project mutations are protected against concurrent writers.
+
+    - pessimistic: rows are read with SELECT ... FOR UPDATE, wallet before project
+    - optimistic: rows carry a version column; a stale write aborts and is retried
+    - serializable: the transaction runs under SERIALIZABLE and is retried on
+      serialization failures
+    """
+    PESSIMISTIC = "pessimistic"
+    OPTIMISTIC = "optimistic"
+    SERIALIZABLE = "serializable"
+
+
+def conflict_reason(error: BaseException) -> Optional[str]:
+    """
+    Why a transaction lost to a concurrent one, or None when the error is
+    not a retryable conflict.
+    """
+    if isinstance(error, StaleDataError):
+        return "stale_version"
+    if isinstance(error, DBAPIError):
+        sqlstate = getattr(error.orig, "sqlstate", None) or getattr(error.orig, "pgcode", None)
+        if sqlstate == SERIALIZATION_FAILURE:
+            return "serialization_failure"
+        if sqlstate == DEADLOCK_DETECTED:
+            return "deadlock"
+    return None
+
+
+class TransactionStats:
+    def __init__(self):
+        self.commits = 0
+        self.retries: Dict[str, int] = {}
+        self.exhausted = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "strategy": settings.CONCURRENCY_STRATEGY,
+            "commits": self.commits,
+            "retries": dict(self.retries),
+            "exhausted": self.exhausted,
+        }
+
+
+transaction_stats = TransactionStats()
+
+
+class TransactionAttempt:
+    """
+    One attempt of a write transaction; use as `async with attempt:`.
+
+    Entering begins the transaction (under SERIALIZABLE for that strategy).
+    Leaving commits it, or rolls it back on error. A conflict with a
+    concurrent transaction is swallowed and marks the attempt for retry,
+    unless it was the last one.
+    """
+
+    def __init__(self, session: AsyncSession, strategy: ConcurrencyStrategy, number: int, max_attempts: int):
+        self.session = session
+        self.strategy = strategy
+        self.number = number
+        self.max_attempts = max_attempts
+        self.retry = False
+        self._transaction = None
+
+    @property
+    def lock_rows(self) -> bool:
+        """Whether rows to be mutated must be read with FOR UPDATE"""
+        return self.strategy == ConcurrencyStrategy.PESSIMISTIC
+
+    async def __aenter__(self) -> "TransactionAttempt":
+        self._transaction = self.session.begin()
+        await self._transaction.__aenter__()
+        if self.strategy == ConcurrencyStrategy.SERIALIZABLE:
+            await self.session.connection(execution_options={"isolation_level": "SERIALIZABLE"})
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        try:
+            if await self._transaction.__aexit__(exc_type, exc, tb):
+                return True
+        except Exception as commit_error:
+            # Conflicts may only surface when the commit flushes
+            return self._handle(commit_error)
+        if exc is None:
+            transaction_stats.commits += 1
+            return False
+        return self._handle(exc)
+
+    def _handle(self, error: BaseException) -> bool:
+        reason = conflict_reason(error)
+        if reason is None:
+            raise error
+        if self.number >= self.max_attempts:
+            transaction_stats.exhausted += 1
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="The request conflicted with concurrent updates, retry it",
+                headers={"Retry-After": "1"}
+            ) from error
+        transaction_stats.retries[reason] = transaction_stats.retries.get(reason, 0) + 1
+        self.retry = True
+        return True
+
+
+async def transaction_attempts(
+        session: AsyncSession,
+        strategy: Optional[ConcurrencyStrategy] = None,
+        max_attempts: Optional[int] = None
+) -> AsyncIterator[TransactionAttempt]:
+    """
+    Run a write transaction with the configured concurrency strategy,
+    retrying it when it loses to a concurrent transaction:
+
+        async for attempt in transaction_attempts(session):
+            async with attempt:
+                wallet = await repository.get_by_id(wallet_id, for_update=attempt.lock_rows)
+                ...
+
+    The body must be safe to re-run; nothing it did in a failed attempt is kept.
+    """
+    strategy = ConcurrencyStrategy(strategy or settings.CONCURRENCY_STRATEGY)
+    max_attempts = max_attempts or settings.CONCURRENCY_MAX_ATTEMPTS
+
+    for number in range(1, max_attempts + 1):
+        attempt = TransactionAttempt(session, strategy, number, max_attempts)
+        yield attempt
+        if not attempt.retry:
+            return
+        # Jittered exponential backoff so the conflicting writers spread out
+        backoff = settings.CONCURRENCY_RETRY_BACKOFF_MS / 1000 * 2 ** (number - 1)
+        await asyncio.sleep(random.uniform(0, backoff))
@@ -1,6 +1,7 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy.orm import sessionmaker
+from .pool_metrics import InstrumentedQueuePool, instrument
 from .settings import settings
 # Fetch the database URL from environment variables
 
@@ -11,33 +12,79 @@ SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 if not SQLALCHEMY_DATABASE_URL:
     raise ValueError("DATABASE_URL is not set in environment variables.")
 
-print("SQLALCHEMY_DATABASE_URL:", SQLALCHEMY_DATABASE_URL)
 
-# Create the async engine
-async_engine = create_async_engine(
+def create_engine(
+        url: str,
+        name: str,
+        statement_timeout_ms: int = settings.DB_STATEMENT_TIMEOUT_MS,
+        **overrides
+) -> AsyncEngine:
+    """
+    Create an instrumented engine with the pool settings, reported as name
+    by the pool metrics. Keyword overrides replace the engine options.
+    """
+    options = dict(
+        echo=settings.DB_ECHO,
+        future=True,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        connect_args={
+            # Prepared statements cached per connection by the asyncpg adapter
+            "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+            "server_settings": {"statement_timeout": str(statement_timeout_ms)},
+        }
+    )
+    options.update(overrides)
+    engine = create_async_engine(url, **options)
+    instrument(engine, name)
+    return engine
+
+
+def create_sessionmaker(engine: AsyncEngine) -> async_sessionmaker:
+    return async_sessionmaker(
+        bind=engine,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False,
+        class_=AsyncSession
+    )
+
+
+# Workloads get separate pools so one cannot exhaust another's connections:
+# - transactional: purchases, top-ups and short request queries
+# - reporting: ledger exports and other long reads
+# - maintenance: background jobs (snapshots, partitions, purges)
+async_engine = create_engine(SQLALCHEMY_DATABASE_URL, "transactional")
+
+reporting_engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
-    echo=True,  # Set to False in production to disable logging
-    future=True,
-    pool_size=5,  # Default number of permanent connections
-    max_overflow=10,  # Additional connections allowed
-    pool_pre_ping=True,  # Check connection validity before using
-    pool_recycle=1800,  # Recycle connections after 30 minutes
-    pool_timeout=30  # Wait up to 30 seconds for a connection
+    "reporting",
+    statement_timeout_ms=settings.DB_REPORTING_STATEMENT_TIMEOUT_MS,
+    pool_size=settings.DB_REPORTING_POOL_SIZE,
+    max_overflow=settings.DB_REPORTING_MAX_OVERFLOW
 )
 
-# Async session maker
-AsyncSessionLocal = async_sessionmaker(
-    bind=async_engine,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False,
-    class_=AsyncSession
+maintenance_engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    "maintenance",
+    statement_timeout_ms=settings.DB_MAINTENANCE_STATEMENT_TIMEOUT_MS,
+    pool_size=settings.DB_MAINTENANCE_POOL_SIZE,
+    max_overflow=settings.DB_MAINTENANCE_MAX_OVERFLOW
 )
 
+# Async session makers
+AsyncSessionLocal = create_sessionmaker(async_engine)
+ReportingSessionLocal = create_sessionmaker(reporting_engine)
+MaintenanceSessionLocal = create_sessionmaker(maintenance_engine)
+
 # Base class for declarative models
 #Base = declarative_base()
 
-# Dependency to get an async database session
+# Dependency to get an async database session from the transactional pool
 async def get_db():
     async with AsyncSessionLocal() as async_db:
         try:
@@ -46,6 +93,23 @@ async def get_db():
             await async_db.close()
 
 
+# Dependency to get an async database session from the reporting pool
+async def get_reporting_db():
+    async with ReportingSessionLocal() as async_db:
+        try:
+            yield async_db
+        finally:
+            await async_db.close()
+
+
+# Dependency to get an async database session from the maintenance pool
+async def get_maintenance_db():
+    async with MaintenanceSessionLocal() as async_db:
+        try:
+            yield async_db
+        finally:
+            await async_db.close()
+
+
 class Base(DeclarativeBase):
     pass
-
@@ -0,0 +1,166 @@
+import asyncio
+import json
+import logging
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+import asyncpg
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "cache_invalidation"
+
+# session.info key of the invalidations waiting for the session to commit
+PENDING_KEY = "pending_invalidations"
+
+
+class InvalidationBus:
+    """
+    Cross-worker cache invalidation over PostgreSQL LISTEN/NOTIFY.
+
+    Writers call publish() inside their transaction; the NOTIFY is issued
+    just before the commit, so Postgres delivers it only if the write
+    commits. The committing worker evicts its own entries right after the
+    commit, and every worker's listener evicts them on delivery.
+
+    Each worker keeps one dedicated asyncpg connection for LISTEN. While it
+    is down, notifications are lost and the caches rely on their TTL; after
+    a reconnect every subscribed cache is reset, since it may have missed
+    evictions.
+    """
+
+    def __init__(self, dsn: str, channel: str = CHANNEL, reconnect_seconds: float = 1.0):
+        self.dsn = dsn
+        self.channel = channel
+        self.reconnect_seconds = reconnect_seconds
+        self._evict: Dict[str, Callable[[str], None]] = {}
+        self._reset: Dict[str, Callable[[], None]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._disconnected = asyncio.Event()
+        self.connected = False
+        self.connects = 0
+        self.received = 0
+        self.published = 0
+
+    def subscribe(
+            self,
+            topic: str,
+            evict: Callable[[str], None],
+            reset: Optional[Callable[[], None]] = None
+    ) -> None:
+        """
+        Register how to evict a key of topic, and optionally how to drop
+        everything when notifications may have been missed.
+        """
+        self._evict[topic] = evict
+        if reset is not None:
+            self._reset[topic] = reset
+
+    def publish(self, session: Any, topic: str, key: Any) -> None:
+        """
+        Queue an invalidation to be sent when the session commits.
+        """
+        session.info.setdefault(PENDING_KEY, set()).add((topic, str(key)))
+
+    def dispatch(self, topic: str, key: str) -> None:
+        evict = self._evict.get(topic)
+        if evict is not None:
+            evict(key)
+
+    def emit(self, session: Session, pending: Set[Tuple[str, str]]) -> None:
+        for topic, key in sorted(pending):
+            payload = json.dumps({"topic": topic, "key": key})
+            session.execute(select(func.pg_notify(self.channel, payload)))
+        self.published += len(pending)
+
+    def _on_notification(self, connection, pid, channel, payload) -> None:
+        self.received += 1
+        try:
+            message = json.loads(payload)
+            self.dispatch(message["topic"], message["key"])
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring malformed invalidation %r", payload)
+
+    def _on_termination(self, connection) -> None:
+        self._disconnected.set()
+
+    async def _listen(self) -> None:
+        connection = await asyncpg.connect(self.dsn)
+        try:
+            self._disconnected.clear()
+            connection.add_termination_listener(self._on_termination)
+            await connection.add_listener(self.channel, self._on_notification)
+            if self.connects:
+                for reset in self._reset.values():
+                    reset()
+            self.connects += 1
+            self.connected = True
+            await self._disconnected.wait()
+        finally:
+            self.connected = False
+            if not connection.is_closed():
+                await connection.close()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._listen()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Invalidation listener disconnected; caches fall back to TTL expiry")
+            await asyncio.sleep(self.reconnect_seconds)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connected": self.connected,
+            "connects": self.connects,
+            "published": self.published,
+            "received": self.received,
+            "topics": sorted(self._evict),
+        }
+
+
+def listener_dsn(database_url: str) -> str:
+    """Plain libpq DSN of a SQLAlchemy database URL"""
+    return make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+invalidation_bus = InvalidationBus(
+    dsn=listener_dsn(settings.DATABASE_URL),
+    reconnect_seconds=settings.INVALIDATION_RECONNECT_SECONDS
+)
+
+
+@event.listens_for(Session, "before_commit")
+def _emit_invalidations(session: Session) -> None:
+    pending = session.info.get(PENDING_KEY)
+    if pending:
+        invalidation_bus.emit(session, pending)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_invalidations(session: Session) -> None:
+    # The local worker does not wait for its own notification
+    for topic, key in session.info.pop(PENDING_KEY, ()):
+        invalidation_bus.dispatch(topic, key)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invalidations(session: Session) -> None:
+    session.info.pop(PENDING_KEY, None)
@@ -1,7 +1,8 @@
+import hashlib
 import os
+import time
 import uuid
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta, timezone
 from sqlalchemy import select
@@ -10,12 +11,16 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Depends, HTTPException, status
 from config.settings import settings
 from schema.jwt_schema import TokenData
-from config.database import get_db
+from config.database import AsyncSessionLocal, get_db
+from config.password_hasher import password_hasher
+from config.token_denylist import token_denylist
+from utils.cache import TTLCache
 from utils.utils import get_utc_now
 from typing import List, Optional
 
 # Import your User model (adjust path as needed)
 from model.user import User  # Adjust import path based on your project structure
+from repository.user_repository import UserIdentity, UserRepository
 
 
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
@@ -24,15 +29,20 @@ ALGORITHM = settings.ALGORITHM
 
 security_scheme = HTTPBearer()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Verified tokens by SHA-256 digest; each entry expires with its token's exp
+token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60, name="access_token")
 
-def hash_password(password: str) -> str:
-    """Hash a password using bcrypt"""
-    return pwd_context.hash(password)
+def token_digest(token: str) -> str:
+    """Key of a token in token_cache"""
+    return hashlib.sha256(token.encode()).hexdigest()
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+async def hash_password(password: str) -> str:
+    """Hash a password using bcrypt on the password hasher pool"""
+    return await password_hasher.hash(password)
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash on the password hasher pool"""
+    return await password_hasher.verify(plain_password, hashed_password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a new access token
@@ -56,7 +66,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         # Default to ACCESS_TOKEN_EXPIRE_MINUTES minutes if expires_delta is not specified
         expire = get_utc_now() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    # A unique token id (jti) makes the token revocable
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -66,7 +77,14 @@ def verify_access_token(token: str, credential_exception: HTTPException) -> Toke
     
     If the token is invalid, raise the provided credential_exception.
     If the token is valid, return a TokenData object with the user ID.
+    Verified tokens are cached by digest until their exp, so repeated
+    calls with the same token skip the signature check.
     """
+    digest = token_digest(token)
+    token_data = token_cache.get(digest)
+    if token_data is not None:
+        return token_data
+
     try:
         # Decode the token
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -78,15 +96,13 @@ def verify_access_token(token: str, credential_exception: HTTPException) -> Toke
         if user_id is None:
             raise credential_exception
         
-        # Validate the UUID format
-        try:
-            uuid.UUID(user_id)
-        except ValueError:
-            # If the user ID is not a valid UUID, raise an error
-            raise credential_exception
-        
-        # If the token is valid, return a TokenData object with the user ID
-        token_data = TokenData(id=uuid.UUID(user_id))
+        # If the token is valid, build a TokenData object with the user ID
+        # (raises ValueError when it is not a valid UUID)
+        token_data = TokenData(
+            id=uuid.UUID(user_id),
+            jti=payload.get("jti"),
+            expires_at=datetime.fromtimestamp(payload["exp"], tz=timezone.utc) if "exp" in payload else None
+        )
         
     except JWTError:
         # If the token is invalid (e.g. expired, tampered with), raise an error
@@ -95,19 +111,25 @@ def verify_access_token(token: str, credential_exception: HTTPException) -> Toke
     except ValueError:
         # If the token is invalid (e.g. malformed), raise an error
         raise credential_exception
+
+    # Cache for the token's remaining lifetime only (jwt.decode enforced exp)
+    expires_at = payload.get("exp")
+    if expires_at is not None:
+        token_cache.set(digest, token_data, ttl=expires_at - time.time())
     
     # If the token is valid, return the TokenData object
     return token_data
 
-def get_current_user(
+async def get_current_token(
     token: HTTPAuthorizationCredentials = Depends(security_scheme)
-) -> uuid.UUID:
+) -> TokenData:
     """
-    Get the current user ID from the token
+    Get the verified, unrevoked token data of the request
     
-    This function takes the token from the Authorization header and verifies it.
-    If the token is invalid, it raises an HTTPException with a 401 status code.
-    If the token is valid, it returns the user ID.
+    This function takes the token from the Authorization header, verifies it
+    and checks its jti against the revoked-token denylist (an in-memory
+    Bloom filter; the database is only queried on a filter positive).
+    If the token is invalid or revoked, it raises an HTTPException with a 401 status code.
     """
     token = token.credentials
     
@@ -118,9 +140,22 @@ def get_current_user(
         headers={'WWW-Authenticate': 'Bearer'}
     )
     
-    # Verify the token and get the user ID
-    token_verification = verify_access_token(token, credential_exception)
-    return token_verification.id
+    # Verify the token and check that it has not been revoked
+    token_data = verify_access_token(token, credential_exception)
+    if token_data.jti is not None and await token_denylist.is_revoked(token_data.jti):
+        raise credential_exception
+    return token_data
+
+async def get_current_user(
+    token_data: TokenData = Depends(get_current_token)
+) -> uuid.UUID:
+    """
+    Get the current user ID from the token
+    
+    If the token is invalid or revoked, a 401 is raised by get_current_token.
+    If the token is valid, it returns the user ID.
+    """
+    return token_data.id
 
 
 
@@ -134,7 +169,7 @@ async def authenticate_user(db: AsyncSession, email: str, password: str) -> Opti
         if not user or not user.is_active:
             return None
             
-        if not verify_password(password, user.password):
+        if not await verify_password(password, user.password):
             return None
         
         return user
@@ -180,17 +215,16 @@ def verify_reset_token(token: str) -> Optional[str]:
 
 # Dependency to get current user object (not just ID)
 async def get_current_user_object(
-    db: AsyncSession = Depends(get_db),
     current_user_id: uuid.UUID = Depends(get_current_user)
-) -> User:
-    """Get current user object with full details"""
-    result = await db.execute(select(User).filter(User.id == current_user_id))
-    user = result.scalar_one_or_none()
-    
-    if not user:
+) -> UserIdentity:
+    """Get the current user's identity and wallet id, cached per process"""
+    async with AsyncSessionLocal() as session:
+        user = await UserRepository(session=session).get_identity(current_user_id)
+
+    if not user or not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    return user
\ No newline at end of file
+    return user
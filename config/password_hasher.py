@@ -0,0 +1,116 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+from config.settings import settings
+
+
+@lru_cache(maxsize=None)
+def _context(rounds: int) -> CryptContext:
+    # Built lazily per worker, so process pool workers get their own copy
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
+
+def _hash(password: str, rounds: int) -> str:
+    return _context(rounds).hash(password)
+
+
+def _verify_and_update(password: str, hashed_password: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    return _context(rounds).verify_and_update(password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt off the event loop on a bounded worker pool.
+
+    At most `workers` hashes run at once and at most `queue_size` more wait
+    for a worker; further calls are rejected with 503 instead of piling up,
+    so a burst of sign-ins cannot starve the rest of the process. bcrypt
+    releases the GIL, so the default thread pool runs hashes in parallel;
+    a process pool is available for interpreters where it does not.
+    """
+
+    def __init__(self, rounds: int, executor: str = "thread", workers: int = 4, queue_size: int = 64):
+        self.rounds = rounds
+        self.executor_kind = executor
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        self._rejected = 0
+        self._rehashed = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hasher")
+        return self._executor
+
+    async def _run(self, func, *args):
+        # The counter is only touched from the event loop, so no lock is needed
+        if self._pending >= self.workers + self.queue_size:
+            self._rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many concurrent sign-in requests, please retry shortly",
+                headers={"Retry-After": "1"}
+            )
+
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        """
+        Hash a password with the configured cost.
+        """
+        return await self._run(_hash, password, self.rounds)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """
+        Verify a password against its hash.
+        """
+        valid, _ = await self._run(_verify_and_update, password, hashed_password, self.rounds)
+        return valid
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password and, when its hash was made with a different cost
+        than the configured one, return a replacement hash.
+
+        :return: (valid, new hash or None)
+        """
+        valid, new_hash = await self._run(_verify_and_update, password, hashed_password, self.rounds)
+        if new_hash is not None:
+            self._rehashed += 1
+        return valid, new_hash
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "executor": self.executor_kind,
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "pending": self._pending,
+            "rejected": self._rejected,
+            "rehashed": self._rehashed,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    rounds=settings.PASSWORD_HASH_ROUNDS,
+    executor=settings.PASSWORD_HASH_EXECUTOR,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_size=settings.PASSWORD_HASH_QUEUE_SIZE
+)
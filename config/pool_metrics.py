@@ -0,0 +1,176 @@
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Instrumented engines of this process by name, reported by the metrics endpoint
+POOLS: Dict[str, "PoolMetrics"] = {}
+
+# Checkout waits kept for the percentiles
+WAIT_SAMPLES = 1024
+
+# Weight of the latest checkout in the moving average of waits, and how
+# fast the average decays while no checkout waits are recorded
+WAIT_EWMA_ALPHA = 0.1
+WAIT_EWMA_HALF_LIFE_SECONDS = 1.0
+
+# Route class of the current request, set by the admission control middleware
+# so checkout waits can be reported per class
+wait_class: ContextVar[Optional[str]] = ContextVar("pool_wait_class", default=None)
+
+
+class PoolMetrics:
+    """
+    Counters of one connection pool, fed by pool events and by
+    InstrumentedQueuePool's timed checkouts.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.engine: AsyncEngine = None
+        self._lock = threading.Lock()
+        self._waits: Deque[float] = deque(maxlen=WAIT_SAMPLES)
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.waits = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.wait_seconds_ewma = 0.0
+        self._ewma_at = time.monotonic()
+        self._class_waits: Dict[str, Dict[str, float]] = {}
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self._waits.append(seconds)
+            self.waits += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            ewma = self._decayed_ewma()
+            self.wait_seconds_ewma = ewma + WAIT_EWMA_ALPHA * (seconds - ewma)
+            self._ewma_at = time.monotonic()
+            route_class = wait_class.get()
+            if route_class is not None:
+                waits = self._class_waits.setdefault(route_class, {"count": 0, "total": 0.0, "max": 0.0})
+                waits["count"] += 1
+                waits["total"] += seconds
+                waits["max"] = max(waits["max"], seconds)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def _percentile(self, waits, fraction: float) -> float:
+        if not waits:
+            return 0.0
+        return waits[min(len(waits) - 1, int(len(waits) * fraction))]
+
+    def _decayed_ewma(self) -> float:
+        idle = time.monotonic() - self._ewma_at
+        return self.wait_seconds_ewma * 0.5 ** (idle / WAIT_EWMA_HALF_LIFE_SECONDS)
+
+    def recent_wait_ms(self) -> float:
+        """Moving average of recent checkout waits in milliseconds"""
+        return self._decayed_ewma() * 1000
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._waits)
+            by_class = {
+                name: {
+                    "checkouts": int(waits_of["count"]),
+                    "wait_ms_avg": round(waits_of["total"] / waits_of["count"] * 1000, 3),
+                    "wait_ms_max": round(waits_of["max"] * 1000, 3),
+                }
+                for name, waits_of in self._class_waits.items()
+            }
+        pool = self.engine.sync_engine.pool
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "invalidations": self.invalidations,
+            "timeouts": self.timeouts,
+            "wait_ms_avg": round(self.wait_seconds_total / self.waits * 1000, 3) if self.waits else 0.0,
+            "wait_ms_p50": round(self._percentile(waits, 0.50) * 1000, 3),
+            "wait_ms_p99": round(self._percentile(waits, 0.99) * 1000, 3),
+            "wait_ms_max": round(self.wait_seconds_max * 1000, 3),
+            "wait_ms_recent": round(self.recent_wait_ms(), 3),
+            "wait_by_class": by_class,
+        }
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that times how long each checkout waited for a connection.
+    """
+
+    metrics: PoolMetrics = None
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            if self.metrics is not None:
+                self.metrics.record_timeout()
+            raise
+        if self.metrics is not None:
+            self.metrics.record_wait(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        # Engine.dispose() swaps in a recreated pool; keep reporting to the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def instrument(engine: AsyncEngine, name: str) -> PoolMetrics:
+    """
+    Attach PoolMetrics to an engine created with InstrumentedQueuePool
+    and register it under name.
+    """
+    metrics = PoolMetrics(name)
+    metrics.engine = engine
+    pool = engine.sync_engine.pool
+    if isinstance(pool, InstrumentedQueuePool):
+        pool.metrics = metrics
+
+    @event.listens_for(pool, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        metrics.connects += 1
+
+    @event.listens_for(pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics.checkouts += 1
+
+    @event.listens_for(pool, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        metrics.checkins += 1
+
+    @event.listens_for(pool, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.invalidations += 1
+
+    POOLS[name] = metrics
+    return metrics
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Counters of every instrumented pool.
+    """
+    return {name: metrics.stats() for name, metrics in POOLS.items()}
@@ -0,0 +1,146 @@
+import itertools
+import logging
+import uuid
+from typing import List, Optional
+from fastapi import Depends
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from config.database import create_engine, create_sessionmaker, get_db
+from config.invalidation_bus import invalidation_bus
+from config.jwt_provider import get_current_user
+from config.settings import settings
+from utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Users whose reads can be pinned to the primary at the same time
+PINNED_USERS_MAX = 100000
+
+
+class ReplicaRouter:
+    """
+    Round-robin over the read replicas, with optional read-your-writes.
+
+    After a user's write commits, the primary's WAL position is recorded for
+    that user (on every worker, through the invalidation bus). For
+    READ_YOUR_WRITES_PIN_SECONDS, each of the user's reads checks that the
+    replica it was routed to has replayed that position and goes to the
+    primary when it has not; one replica catching up says nothing about
+    the others.
+    """
+
+    def __init__(
+            self,
+            sessionmakers: List[async_sessionmaker],
+            read_your_writes: bool,
+            pin_seconds: float,
+            name: Optional[str] = None
+    ):
+        self.sessionmakers = sessionmakers
+        self.read_your_writes = read_your_writes and bool(sessionmakers)
+        self._cycle = itertools.cycle(sessionmakers) if sessionmakers else None
+        self.write_positions = TTLCache(maxsize=PINNED_USERS_MAX, ttl=pin_seconds, name=name)
+        self.replica_reads = 0
+        self.pinned_reads = 0
+        self.pin_failures = 0
+
+    def next_sessionmaker(self) -> Optional[async_sessionmaker]:
+        return next(self._cycle) if self._cycle is not None else None
+
+    def pin(self, key: str) -> None:
+        """Record a "<user_id>:<lsn>" write position published on the bus"""
+        user_id, lsn = key.split(":", 1)
+        self.write_positions.set(uuid.UUID(user_id), lsn)
+
+    async def caught_up(self, session: AsyncSession, user_id: uuid.UUID) -> bool:
+        """
+        Whether the replica behind session has replayed the user's last write.
+        """
+        lsn = self.write_positions.get(user_id)
+        if lsn is None:
+            return True
+
+        try:
+            replayed = (await session.execute(
+                text("SELECT pg_last_wal_replay_lsn() >= CAST(:lsn AS pg_lsn)"),
+                {"lsn": lsn}
+            )).scalar()
+        finally:
+            # End the check's transaction so services can begin their own
+            await session.rollback()
+
+        # The pin is kept until it expires: another replica may still lag
+        return bool(replayed)
+
+    async def record_write(self, session: AsyncSession, user_id: uuid.UUID) -> None:
+        """
+        Pin the user's reads to the primary after a committed write.
+
+        Best effort: the write has already committed, so a failure here is
+        logged and the user's reads stay unpinned (they may briefly miss the
+        write on a lagging replica) rather than failing the request.
+        """
+        if not self.read_your_writes:
+            return
+        try:
+            lsn = (await session.execute(text("SELECT pg_current_wal_lsn()::text"))).scalar_one()
+            invalidation_bus.publish(session, "write_lsn", f"{user_id}:{lsn}")
+            await session.commit()
+        except Exception:
+            self.pin_failures += 1
+            logger.exception("Could not pin reads of user %s to the primary after a write", user_id)
+            try:
+                await session.rollback()
+            except Exception:
+                pass
+
+    def stats(self):
+        return {
+            "replicas": len(self.sessionmakers),
+            "read_your_writes": self.read_your_writes,
+            "pinned_users": len(self.write_positions),
+            "replica_reads": self.replica_reads,
+            "pinned_reads": self.pinned_reads,
+            "pin_failures": self.pin_failures,
+        }
+
+
+def replica_urls(value: str) -> List[str]:
+    return [url.strip() for url in value.split(",") if url.strip()]
+
+
+replica_router = ReplicaRouter(
+    sessionmakers=[
+        create_sessionmaker(create_engine(url, f"replica-{index}"))
+        for index, url in enumerate(replica_urls(settings.DATABASE_REPLICA_URLS))
+    ],
+    read_your_writes=settings.READ_YOUR_WRITES,
+    pin_seconds=settings.READ_YOUR_WRITES_PIN_SECONDS,
+    name="read_your_writes"
+)
+
+# Write positions arrive on the bus's "evict" callback
+invalidation_bus.subscribe("write_lsn", evict=replica_router.pin)
+
+
+async def get_read_db(
+    user_id: uuid.UUID = Depends(get_current_user),
+    primary: AsyncSession = Depends(get_db)
+):
+    """
+    Session for read-only routes: a replica, or the primary when none is
+    configured or the user's last write has not replayed yet.
+    """
+    sessionmaker = replica_router.next_sessionmaker()
+    if sessionmaker is None:
+        yield primary
+        return
+
+    async with sessionmaker() as session:
+        if replica_router.read_your_writes and not await replica_router.caught_up(session, user_id):
+            # The user's last write has not replayed here yet
+            replica_router.pinned_reads += 1
+            yield primary
+            return
+        replica_router.replica_reads += 1
+        yield session
@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
-from typing import Optional
+from typing import Literal, Optional
 
 class Settings(BaseSettings):
     DATABASE_URL: str = Field(..., description="Database connection string")
@@ -8,6 +8,65 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(..., description="Access token expiration time in minutes")
     ALGORITHM: str = Field(..., description="Algorithm for generating access tokens")
     API_SECRET_KEY: str = Field(..., description="API secret key for authentication")
+    DB_ECHO: bool = Field(False, description="Log every SQL statement (synchronously; development only)")
+    DB_POOL_SIZE: int = Field(20, description="Persistent connections of the transactional pool per worker process")
+    DB_MAX_OVERFLOW: int = Field(10, description="Connections opened beyond DB_POOL_SIZE under load")
+    DB_POOL_TIMEOUT_SECONDS: float = Field(30, description="Maximum wait for a pooled connection before the request fails")
+    DB_POOL_RECYCLE_SECONDS: int = Field(1800, description="Replace pooled connections older than this")
+    DB_POOL_PRE_PING: bool = Field(True, description="Check a pooled connection with a round trip before handing it out")
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = Field(100, description="Prepared statements cached per connection by the asyncpg adapter (0 disables, e.g. behind pgbouncer)")
+    DB_STATEMENT_TIMEOUT_MS: int = Field(30000, description="Server-side statement_timeout of the transactional pool in milliseconds (0 disables)")
+    DB_REPORTING_POOL_SIZE: int = Field(4, description="Persistent connections of the reporting pool (exports, long reads) per worker process")
+    DB_REPORTING_MAX_OVERFLOW: int = Field(0, description="Connections opened beyond DB_REPORTING_POOL_SIZE")
+    DB_REPORTING_STATEMENT_TIMEOUT_MS: int = Field(600000, description="Server-side statement_timeout of the reporting pool in milliseconds (0 disables)")
+    DB_MAINTENANCE_POOL_SIZE: int = Field(2, description="Persistent connections of the maintenance pool (background jobs) per process")
+    DB_MAINTENANCE_MAX_OVERFLOW: int = Field(0, description="Connections opened beyond DB_MAINTENANCE_POOL_SIZE")
+    DB_MAINTENANCE_STATEMENT_TIMEOUT_MS: int = Field(0, description="Server-side statement_timeout of the maintenance pool in milliseconds (0 disables)")
+    DATABASE_REPLICA_URLS: str = Field("", description="Comma-separated read replica URLs used round-robin by read-only routes; reads use the primary when empty")
+    READ_YOUR_WRITES: bool = Field(False, description="Pin a user's reads to the primary after a write until a replica has replayed it")
+    READ_YOUR_WRITES_PIN_SECONDS: int = Field(30, description="Longest a user's reads stay pinned to the primary after a write")
+    ADMISSION_CONTROL_ENABLED: bool = Field(True, description="Shed API requests with 503 before they queue on the connection pool")
+    ADMISSION_CAPACITY: int = Field(0, description="In-flight DB-bound requests per process the shares apply to (0 = DB_POOL_SIZE + DB_MAX_OVERFLOW)")
+    ADMISSION_CRITICAL_SHARE: float = Field(2.0, description="Purchases and top-ups are admitted while in-flight requests are below capacity x this")
+    ADMISSION_STANDARD_SHARE: float = Field(1.0, description="Other API requests are admitted while in-flight requests are below capacity x this")
+    ADMISSION_EXPORT_SHARE: float = Field(1.0, description="Ledger exports are admitted while in-flight exports are below the reporting pool's size (DB_REPORTING_POOL_SIZE + DB_REPORTING_MAX_OVERFLOW) x this")
+    ADMISSION_MAX_POOL_WAIT_MS: float = Field(250, description="Non-critical requests are shed while the recent pool checkout wait exceeds this")
+    ADMISSION_RETRY_AFTER_SECONDS: int = Field(1, description="Retry-After of shed requests")
+    PURCHASE_ENGINE: Literal["orm", "atomic", "batched"] = Field("orm", description="Purchase write path: 'orm' (load and mutate rows), 'atomic' (single guarded statement) or 'batched' (concurrent purchases of a project applied together)")
+    PURCHASE_BATCH_WINDOW_MS: float = Field(2, description="How long a batch of purchases of one project collects before it is applied")
+    PURCHASE_BATCH_MAX_SIZE: int = Field(500, description="Most purchases applied in one batch transaction")
+    CONCURRENCY_STRATEGY: Literal["pessimistic", "optimistic", "serializable"] = Field("pessimistic", description="Protection of ORM wallet/project mutations: row locks, version checks or SERIALIZABLE isolation")
+    CONCURRENCY_MAX_ATTEMPTS: int = Field(5, description="Attempts of a write transaction that keeps losing to concurrent ones before 409 is returned")
+    CONCURRENCY_RETRY_BACKOFF_MS: float = Field(5, description="Base of the jittered exponential backoff between attempts")
+    WALLET_LOCKS_ENABLED: bool = Field(True, description="Queue a wallet's concurrent purchases and top-ups in process before they use a pool connection")
+    IDEMPOTENCY_KEY_TTL_SECONDS: int = Field(86400, description="How long an Idempotency-Key and its stored response are kept for replay")
+    IDEMPOTENCY_LEASE_SECONDS: float = Field(30, description="How long an in-flight Idempotency-Key is held before a retry may take it over if its write has not committed")
+    IDEMPOTENCY_WAIT_SECONDS: float = Field(10, description="How long a duplicate waits for the in-flight request with its key before 409 is returned")
+    IDEMPOTENCY_POLL_MS: float = Field(50, description="Interval at which a duplicate on another worker checks whether the in-flight request finished")
+    PAGINATION_COUNT_STRATEGY: Literal["exact", "estimated", "cached", "none"] = Field("cached", description="Default total-count strategy of the offset pagination helpers")
+    PAGINATION_COUNT_CACHE_TTL_SECONDS: int = Field(30, description="Lifetime of cached pagination counts in seconds")
+    PAGINATION_COUNT_CACHE_SIZE: int = Field(1024, description="Maximum number of cached pagination counts per process")
+    EXPORT_CHUNK_SIZE: int = Field(5000, description="Rows fetched per server-side cursor round trip in ledger exports")
+    BALANCE_SNAPSHOT_INTERVAL_SECONDS: int = Field(3600, description="Interval between wallet balance snapshot runs in seconds")
+    BALANCE_SNAPSHOT_GRACE_SECONDS: int = Field(300, description="Snapshots stop this many seconds before now so in-flight transactions are not missed")
+    BALANCE_SERIES_MAX_POINTS: int = Field(1000, description="Maximum number of points in a balance time series")
+    TRANSACTION_PARTITION_MONTHS_AHEAD: int = Field(3, description="Monthly transaction partitions kept created ahead of the current month")
+    TRANSACTION_DEFAULT_WINDOW_DAYS: int = Field(365, description="Lookback of transaction queries that do not give a start time, so partitions are pruned")
+    PASSWORD_HASH_ROUNDS: int = Field(12, description="bcrypt cost factor; existing hashes are upgraded on the next sign-in when it changes")
+    PASSWORD_HASH_EXECUTOR: Literal["thread", "process"] = Field("thread", description="Worker pool that runs bcrypt off the event loop")
+    PASSWORD_HASH_WORKERS: int = Field(4, description="Concurrent bcrypt operations per process")
+    PASSWORD_HASH_QUEUE_SIZE: int = Field(64, description="bcrypt operations allowed to wait for a worker before requests are rejected with 503")
+    TOKEN_CACHE_SIZE: int = Field(10000, description="Maximum number of verified access tokens cached per process")
+    TOKEN_DENYLIST_CAPACITY: int = Field(100000, description="Revoked tokens the in-process Bloom filter is sized for")
+    TOKEN_DENYLIST_ERROR_RATE: float = Field(0.001, description="Target false-positive rate of the revoked-token Bloom filter")
+    TOKEN_DENYLIST_REFRESH_SECONDS: float = Field(5, description="Maximum age of the revoked-token Bloom filter before it is refreshed")
+    USER_IDENTITY_CACHE_TTL_SECONDS: int = Field(60, description="Lifetime of cached user identities in seconds")
+    USER_IDENTITY_CACHE_SIZE: int = Field(10000, description="Maximum number of user identities cached per process")
+    PROJECT_CATALOG_CACHE_TTL_SECONDS: int = Field(300, description="Lifetime of cached project prices in seconds")
+    PROJECT_CATALOG_CACHE_SIZE: int = Field(10000, description="Maximum number of projects cached per process")
+    PROJECT_NEGATIVE_CACHE_TTL_SECONDS: int = Field(10, description="Lifetime of cached inactive or sold-out projects in seconds")
+    INVALIDATION_LISTENER_ENABLED: bool = Field(True, description="Run the LISTEN connection that evicts cache entries changed by other workers")
+    INVALIDATION_RECONNECT_SECONDS: float = Field(1, description="Delay before the cache invalidation listener reconnects")
     # DEBUG: bool = Field(False, description="Enable debug mode")
     # ENV: str = Field("development", description="Environment type")
 
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from config.database import AsyncSessionLocal
+from config.invalidation_bus import invalidation_bus
+from config.settings import settings
+from repository.revoked_token_repository import RevokedTokenRepository
+from utils.bloom_filter import BloomFilter
+from utils.utils import get_utc_now
+
+logger = logging.getLogger(__name__)
+
+# Re-read revocations recorded slightly before the last refresh so rows
+# committed late (or stamped by a host with a skewed clock) are not missed
+REFRESH_OVERLAP = timedelta(seconds=60)
+
+
+class TokenDenylist:
+    """
+    In-process Bloom filter in front of the revoked_token table.
+
+    A token whose jti is not in the filter is certainly not revoked, so the
+    common path costs a few hash computations. Only filter positives are
+    confirmed against the table. The filter is refreshed incrementally
+    (revocations recorded since the last refresh) at most every
+    TOKEN_DENYLIST_REFRESH_SECONDS, and rebuilt from the unexpired rows
+    when it reaches capacity. A failed refresh keeps the current filter and
+    is retried after another refresh_seconds; only the first load can fail
+    a request.
+
+    Database access uses its own short-lived session so the request's
+    session is left untouched for the endpoint.
+    """
+
+    def __init__(self, capacity: int, error_rate: float, refresh_seconds: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_seconds = refresh_seconds
+        self._filter = BloomFilter(capacity=capacity, error_rate=error_rate)
+        self._loaded_at: Optional[datetime] = None
+        self._refreshed_at = 0.0
+        self._lock = asyncio.Lock()
+        self.lookups = 0
+        self.positives = 0
+        self.confirmed = 0
+        self.refresh_failures = 0
+
+    async def _refresh(self) -> None:
+        started = get_utc_now()
+        rebuild = self._loaded_at is None or self._filter.is_full
+        since = None if rebuild else self._loaded_at - REFRESH_OVERLAP
+
+        async with AsyncSessionLocal() as session:
+            jtis = await RevokedTokenRepository(session=session).active_jtis(since=since)
+
+        if rebuild:
+            bloom = BloomFilter(capacity=max(self.capacity, len(jtis) * 2), error_rate=self.error_rate)
+            bloom.update(jtis)
+            self._filter = bloom
+        else:
+            self._filter.update(jtis)
+
+        self._loaded_at = started
+        self._refreshed_at = time.monotonic()
+
+    async def refresh_if_stale(self) -> None:
+        """
+        Refresh the filter when it is older than refresh_seconds.
+
+        Once the filter has been loaded, concurrent callers do not wait for a
+        refresh already in progress; they keep using the current filter.
+        Until then they wait for the first load, since an empty filter
+        would accept every revoked token.
+        """
+        if time.monotonic() - self._refreshed_at < self.refresh_seconds:
+            return
+        if self._lock.locked() and self._loaded_at is not None:
+            return
+        async with self._lock:
+            if time.monotonic() - self._refreshed_at < self.refresh_seconds:
+                return
+            if self._loaded_at is None:
+                await self._refresh()
+                return
+            try:
+                await self._refresh()
+            except Exception:
+                # Back off instead of retrying on every request
+                self.refresh_failures += 1
+                self._refreshed_at = time.monotonic()
+                logger.exception("Could not refresh the revoked-token filter; keeping the current one")
+
+    async def is_revoked(self, jti: str) -> bool:
+        """
+        Whether the token id has been revoked.
+        """
+        await self.refresh_if_stale()
+        self.lookups += 1
+        if jti not in self._filter:
+            return False
+
+        self.positives += 1
+        async with AsyncSessionLocal() as session:
+            revoked = await RevokedTokenRepository(session=session).is_revoked(jti)
+        if revoked:
+            self.confirmed += 1
+        return revoked
+
+    def add(self, jti: str) -> None:
+        """
+        Add a token revoked by this process without waiting for a refresh.
+        """
+        self._filter.add(jti)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._filter),
+            "capacity": self._filter.capacity,
+            "lookups": self.lookups,
+            "filter_positives": self.positives,
+            "confirmed_revoked": self.confirmed,
+            "false_positives": self.positives - self.confirmed,
+            "refresh_failures": self.refresh_failures,
+        }
+
+
+token_denylist = TokenDenylist(
+    capacity=settings.TOKEN_DENYLIST_CAPACITY,
+    error_rate=settings.TOKEN_DENYLIST_ERROR_RATE,
+    refresh_seconds=settings.TOKEN_DENYLIST_REFRESH_SECONDS
+)
+invalidation_bus.subscribe("token", evict=token_denylist.add)
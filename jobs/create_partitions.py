@@ -0,0 +1,53 @@
+"""
+Create upcoming monthly partitions of the transaction table.
+
+Usage:
+    python -m jobs.create_partitions
+    python -m jobs.create_partitions --months-ahead 6
+
+Run daily (e.g. from cron). Partitions for the current month and the
+next TRANSACTION_PARTITION_MONTHS_AHEAD months are created if missing,
+so new rows always land in a monthly partition rather than the default
+one. Creating a partition briefly locks the parent table; a short
+lock_timeout makes a busy run fail fast and retry on the next schedule.
+"""
+import argparse
+import asyncio
+from config.database import maintenance_engine
+from config.settings import settings
+from utils.partitions import TRANSACTION_TABLE, ensure_monthly_partitions
+from utils.utils import get_utc_now
+
+
+async def create_partitions(months_ahead: int) -> list:
+    """
+    Create the missing transaction partitions and return their names.
+    """
+    try:
+        async with maintenance_engine.begin() as connection:
+            await connection.exec_driver_sql("SET LOCAL lock_timeout = '5s'")
+            return await ensure_monthly_partitions(
+                connection,
+                table=TRANSACTION_TABLE,
+                now=get_utc_now(),
+                months_ahead=months_ahead
+            )
+    finally:
+        await maintenance_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Create upcoming monthly transaction partitions")
+    parser.add_argument(
+        "--months-ahead",
+        type=int,
+        default=settings.TRANSACTION_PARTITION_MONTHS_AHEAD,
+        help="Months to create ahead of the current one"
+    )
+    args = parser.parse_args()
+    created = asyncio.run(create_partitions(months_ahead=args.months_ahead))
+    print(f"Created {len(created)} partition(s): {', '.join(created) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Export the transaction ledger to a Parquet or Arrow IPC file.
+
+Usage:
+    python -m jobs.export_ledger --output ledger.parquet
+    python -m jobs.export_ledger --format arrow --output ledger.arrows \\
+        --created-from 2025-01-01 --created-to 2025-02-01
+
+Rows are streamed through a server-side cursor and written one record
+batch (Parquet row group) per chunk, so memory stays bounded by
+EXPORT_CHUNK_SIZE whatever the size of the ledger.
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime
+from config.database import ReportingSessionLocal, reporting_engine
+from service.transaction_service import TransactionService
+from utils.columnar_export import ColumnarFormat, encode_columnar
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Export the transaction ledger in a columnar format")
+    parser.add_argument("--output", required=True, help="Path of the file to write")
+    parser.add_argument(
+        "--format",
+        dest="columnar_format",
+        type=ColumnarFormat,
+        choices=list(ColumnarFormat),
+        default=ColumnarFormat.PARQUET,
+        help="parquet (default) or arrow (Arrow IPC stream)"
+    )
+    parser.add_argument("--created-from", type=datetime.fromisoformat, help="Only transactions created at or after this time")
+    parser.add_argument("--created-to", type=datetime.fromisoformat, help="Only transactions created before this time")
+    return parser.parse_args()
+
+
+async def export_ledger(output: str, columnar_format: ColumnarFormat, created_from=None, created_to=None) -> int:
+    """
+    Write the ledger to output and return the number of bytes written.
+    """
+    written = 0
+    async with ReportingSessionLocal() as session:
+        service = TransactionService(session=session)
+        filters = service.ledger_time_filters(created_from=created_from, created_to=created_to)
+
+        with open(output, "wb") as file:
+            async for chunk in encode_columnar(service.ledger_rows(filters), columnar_format):
+                file.write(chunk)
+                written += len(chunk)
+
+    await reporting_engine.dispose()
+    return written
+
+
+def main() -> None:
+    args = parse_args()
+    started = time.perf_counter()
+    written = asyncio.run(
+        export_ledger(
+            output=args.output,
+            columnar_format=args.columnar_format,
+            created_from=args.created_from,
+            created_to=args.created_to
+        )
+    )
+    print(f"Wrote {written} bytes to {args.output} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
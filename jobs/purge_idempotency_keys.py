@@ -0,0 +1,35 @@
+"""
+Purge idempotency keys, and their stored responses, past their expiry.
+
+Usage:
+    python -m jobs.purge_idempotency_keys
+
+Run periodically (e.g. hourly from cron) to keep the idempotency_key table
+bounded by the requests of one IDEMPOTENCY_KEY_TTL_SECONDS window. Expired
+keys that have not been purged yet are not replayed: a new request with the
+same key takes them over.
+"""
+import asyncio
+from config.database import MaintenanceSessionLocal, maintenance_engine
+from repository.idempotency_key_repository import IdempotencyKeyRepository
+
+
+async def purge_idempotency_keys() -> int:
+    """
+    Delete expired idempotency keys and return the number removed.
+    """
+    try:
+        async with MaintenanceSessionLocal() as session:
+            async with session.begin():
+                return await IdempotencyKeyRepository(session=session).delete_expired()
+    finally:
+        await maintenance_engine.dispose()
+
+
+def main() -> None:
+    deleted = asyncio.run(purge_idempotency_keys())
+    print(f"Purged {deleted} expired idempotency key(s)")
+
+
+if __name__ == "__main__":
+    main()
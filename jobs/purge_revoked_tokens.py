@@ -0,0 +1,34 @@
+"""
+Purge denylist entries of tokens that have expired anyway.
+
+Usage:
+    python -m jobs.purge_revoked_tokens
+
+Run periodically (e.g. hourly from cron) to keep the revoked_token table,
+and the Bloom filters rebuilt from it, bounded by the number of
+revocations within one token lifetime.
+"""
+import asyncio
+from config.database import MaintenanceSessionLocal, maintenance_engine
+from repository.revoked_token_repository import RevokedTokenRepository
+
+
+async def purge_revoked_tokens() -> int:
+    """
+    Delete expired revocations and return the number removed.
+    """
+    try:
+        async with MaintenanceSessionLocal() as session:
+            async with session.begin():
+                return await RevokedTokenRepository(session=session).delete_expired()
+    finally:
+        await maintenance_engine.dispose()
+
+
+def main() -> None:
+    deleted = asyncio.run(purge_revoked_tokens())
+    print(f"Purged {deleted} expired revocation(s)")
+
+
+if __name__ == "__main__":
+    main()
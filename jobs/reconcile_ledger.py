@@ -0,0 +1,354 @@
+"""
+Reconcile stored wallet and project balances against the transaction ledger.
+
+Usage:
+    python -m jobs.reconcile_ledger
+    python -m jobs.reconcile_ledger --workers 8 --chunk-size 200000
+
+Completed transactions are streamed in chunks as fixed-point integer
+cents and summed per wallet and per project with NumPy grouped sums.
+The wallet-id space is split into contiguous ranges that are reconciled
+in parallel by a process pool; project partial sums from every range
+are merged in the parent. Every drift from the stored columns is
+printed as one JSON line, and the exit status is 1 when any is found.
+
+All reads see one snapshot of the database, so purchases and top-ups
+committing while the job runs are not reported as drifts: the parent
+opens a REPEATABLE READ READ ONLY transaction, exports its snapshot
+(pg_export_snapshot) and keeps it open until every worker is done; each
+worker imports it (SET TRANSACTION SNAPSHOT) before reading its range.
+Connections use the maintenance pool's settings (DB_MAINTENANCE_*). The
+parent's transaction sits idle while the workers run, so
+idle_in_transaction_session_timeout must exceed the job's duration.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from sqlalchemy import BigInteger, cast, func, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from config.database import maintenance_engine
+from model.project import Project
+from repository.project_repository import shard_credits
+from model.transaction import Transaction
+from model.wallet import Wallet
+from utils.utils import AVAILABLE_CREDITS_SIGN, BALANCE_SIGN, TransactionStatus, TransactionType
+
+# Ids are compared as 16 raw bytes; PostgreSQL orders uuid the same way
+KEY_DTYPE = "S16"
+NO_PROJECT = bytes(16)
+
+# Wallet columns recomputed from the ledger, in array column order
+WALLET_FIELDS = ["balance", "credit_balance", "total_invested"]
+
+# Format of the ids returned by pg_export_snapshot(), e.g. 00000003-0000001B-1
+SNAPSHOT_ID = re.compile(r"[0-9A-F]+-[0-9A-F]+(-[0-9]+)?")
+
+
+@dataclass
+class Drift:
+    entity: str
+    id: str
+    field: str
+    stored: str
+    expected: str
+
+
+def cents(column):
+    """
+    SQL expression of a DECIMAL(.., 2) column as integer cents.
+    """
+    return cast(func.round(column * 100), BigInteger)
+
+
+def format_cents(value: int) -> str:
+    sign = "-" if value < 0 else ""
+    value = abs(int(value))
+    return f"{sign}{value // 100}.{value % 100:02d}"
+
+
+def _key_bytes(key: bytes) -> bytes:
+    # NumPy strips trailing NUL bytes from fixed-width byte strings
+    return bytes(key).ljust(16, b"\0")
+
+
+def wallet_id_ranges(partitions: int) -> List[Tuple[Optional[uuid.UUID], Optional[uuid.UUID]]]:
+    """
+    Split the uuid space into contiguous [lower, upper) ranges.
+
+    The first range has no lower bound and the last no upper bound.
+    """
+    step = (1 << 128) // partitions
+    bounds = [None] + [uuid.UUID(int=step * index) for index in range(1, partitions)] + [None]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def grouped_sum(keys: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sum the rows of values per key.
+
+    :param keys: 1-D array of group keys
+    :param values: 2-D int64 array with one row per key
+    :return: Sorted unique keys and the per-key sums
+    """
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    sums = np.zeros((len(unique_keys), values.shape[1]), dtype=np.int64)
+    np.add.at(sums, inverse.ravel(), values)
+    return unique_keys, sums
+
+
+def aggregate_chunk(rows: Sequence[Sequence]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Per-wallet and per-project sums of one ledger chunk.
+
+    Rows are (wallet_id bytes, project_id bytes, transaction_type,
+    credit cents, price cents). Wallet sums follow WALLET_FIELDS; project
+    sums are the change in available credits.
+    """
+    wallet_ids, project_ids, types, credit_cents, price_cents = zip(*rows)
+    wallet_keys = np.array(wallet_ids, dtype=KEY_DTYPE)
+    project_keys = np.array(project_ids, dtype=KEY_DTYPE)
+    types = np.array([getattr(value, "value", value) for value in types])
+    credit_cents = np.array(credit_cents, dtype=np.int64)
+    price_cents = np.array(price_cents, dtype=np.int64)
+
+    def signs(rules: Dict[TransactionType, int]) -> np.ndarray:
+        return np.select([types == key.value for key in rules], list(rules.values()), 0)
+
+    is_purchase = types == TransactionType.PURCHASE.value
+    wallet_values = np.column_stack((
+        signs(BALANCE_SIGN) * price_cents,
+        credit_cents,
+        np.where(is_purchase, price_cents, 0),
+    ))
+    project_values = (signs(AVAILABLE_CREDITS_SIGN) * credit_cents)[:, None]
+
+    return (*grouped_sum(wallet_keys, wallet_values), *grouped_sum(project_keys, project_values))
+
+
+def merge_sums(parts: Sequence[Tuple[np.ndarray, np.ndarray]], width: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Merge (keys, sums) pairs from several chunks or workers.
+    """
+    parts = [part for part in parts if len(part[0])]
+    if not parts:
+        return np.array([], dtype=KEY_DTYPE), np.zeros((0, width), dtype=np.int64)
+    return grouped_sum(
+        np.concatenate([keys for keys, _ in parts]),
+        np.concatenate([sums for _, sums in parts])
+    )
+
+
+def compare(
+    entity: str,
+    fields: Sequence[str],
+    stored_keys: np.ndarray,
+    stored: np.ndarray,
+    expected_keys: np.ndarray,
+    expected: np.ndarray
+) -> Iterator[Drift]:
+    """
+    Yield a Drift for every stored value that differs from the ledger.
+
+    Stored rows without ledger entries are expected to be zero. Ledger
+    keys without a stored row are reported with field "missing".
+    """
+    aligned = np.zeros_like(stored)
+    if len(expected_keys):
+        positions = np.searchsorted(expected_keys, stored_keys)
+        positions = np.minimum(positions, len(expected_keys) - 1)
+        found = expected_keys[positions] == stored_keys
+        aligned[found] = expected[positions[found]]
+
+    rows, columns = np.nonzero(stored != aligned)
+    for row, column in zip(rows, columns):
+        yield Drift(
+            entity=entity,
+            id=str(uuid.UUID(bytes=_key_bytes(stored_keys[row]))),
+            field=fields[column],
+            stored=format_cents(stored[row, column]),
+            expected=format_cents(aligned[row, column]),
+        )
+
+    orphans = np.setdiff1d(expected_keys, stored_keys)
+    for key in orphans:
+        yield Drift(entity=entity, id=str(uuid.UUID(bytes=_key_bytes(key))), field="missing", stored="", expected="")
+
+
+def _range_filter(column, lower: Optional[uuid.UUID], upper: Optional[uuid.UUID]) -> list:
+    filters = []
+    if lower is not None:
+        filters.append(column >= lower)
+    if upper is not None:
+        filters.append(column < upper)
+    return filters
+
+
+async def snapshot_connection(connection: AsyncConnection) -> AsyncConnection:
+    """
+    The connection set up for a REPEATABLE READ READ ONLY transaction, so
+    every read of the transaction sees the same snapshot.
+    """
+    return await connection.execution_options(isolation_level="REPEATABLE READ", postgresql_readonly=True)
+
+
+async def import_snapshot(connection: AsyncConnection, snapshot_id: str) -> None:
+    """
+    Make the connection's transaction see the snapshot exported by the parent.
+    Must be the transaction's first statement.
+    """
+    if not SNAPSHOT_ID.fullmatch(snapshot_id):
+        raise ValueError(f"Not a snapshot id: {snapshot_id!r}")
+    # SET does not take bind parameters
+    await connection.execute(text(f"SET TRANSACTION SNAPSHOT '{snapshot_id}'"))
+
+
+async def _reconcile_range(lower, upper, chunk_size: int, snapshot_id: str):
+    wallet_parts, project_parts = [], []
+    try:
+        async with maintenance_engine.connect() as connection:
+            connection = await snapshot_connection(connection)
+            async with connection.begin():
+                await import_snapshot(connection, snapshot_id)
+                ledger = (
+                    select(
+                        func.uuid_send(Transaction.wallet_id),
+                        func.coalesce(func.uuid_send(Transaction.project_id), NO_PROJECT),
+                        Transaction.transaction_type,
+                        cents(Transaction.credit_amount),
+                        cents(Transaction.price_paid),
+                    )
+                    .where(
+                        Transaction.status == TransactionStatus.COMPLETED,
+                        *_range_filter(Transaction.wallet_id, lower, upper)
+                    )
+                    .execution_options(yield_per=chunk_size)
+                )
+                result = await connection.stream(ledger)
+                async for rows in result.partitions():
+                    wallet_keys, wallet_sums, project_keys, project_sums = aggregate_chunk(rows)
+                    wallet_parts.append((wallet_keys, wallet_sums))
+                    project_parts.append((project_keys, project_sums))
+
+                wallets = (await connection.execute(
+                    select(
+                        func.uuid_send(Wallet.id),
+                        cents(Wallet.balance),
+                        cents(Wallet.credit_balance),
+                        cents(Wallet.total_invested),
+                    )
+                    .where(*_range_filter(Wallet.id, lower, upper))
+                    .order_by(Wallet.id)
+                )).all()
+    finally:
+        # Pooled connections are bound to this range's event loop
+        await maintenance_engine.dispose()
+
+    expected_keys, expected = merge_sums(wallet_parts, len(WALLET_FIELDS))
+    stored_keys = np.array([row[0] for row in wallets], dtype=KEY_DTYPE)
+    stored = np.array([row[1:] for row in wallets], dtype=np.int64).reshape(-1, len(WALLET_FIELDS))
+    drifts = list(compare("wallet", WALLET_FIELDS, stored_keys, stored, expected_keys, expected))
+    return drifts, merge_sums(project_parts, 1)
+
+
+def reconcile_range(lower, upper, chunk_size: int, snapshot_id: str):
+    """
+    Process pool entry point: wallet drifts and project partial sums of
+    one wallet-id range, as of the snapshot snapshot_id.
+    """
+    return asyncio.run(_reconcile_range(lower, upper, chunk_size, snapshot_id))
+
+
+async def _stored_projects(connection: AsyncConnection):
+    return (await connection.execute(
+        select(
+            func.uuid_send(Project.id),
+            cents(Project.total_credits),
+            cents(Project.available_credits + shard_credits(Project.id)),
+        )
+        .order_by(Project.id)
+    )).all()
+
+
+async def _reconcile(workers: int, partitions: int, chunk_size: int) -> List[Drift]:
+    drifts: List[Drift] = []
+    project_parts = []
+    loop = asyncio.get_running_loop()
+    try:
+        async with maintenance_engine.connect() as connection:
+            connection = await snapshot_connection(connection)
+            async with connection.begin():
+                # Stays valid while this transaction is open
+                snapshot_id = (await connection.execute(text("SELECT pg_export_snapshot()"))).scalar_one()
+
+                # Spawned workers do not inherit this process's open connection
+                with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+                    results = await asyncio.gather(*(
+                        loop.run_in_executor(executor, reconcile_range, lower, upper, chunk_size, snapshot_id)
+                        for lower, upper in wallet_id_ranges(partitions)
+                    ))
+                projects = await _stored_projects(connection)
+    finally:
+        await maintenance_engine.dispose()
+
+    for wallet_drifts, project_sums in results:
+        drifts.extend(wallet_drifts)
+        project_parts.append(project_sums)
+
+    expected_keys, expected = merge_sums(project_parts, 1)
+    keep = expected_keys != NO_PROJECT
+    expected_keys, expected = expected_keys[keep], expected[keep]
+
+    stored_keys = np.array([row[0] for row in projects], dtype=KEY_DTYPE)
+    totals = np.array([row[1] for row in projects], dtype=np.int64).reshape(-1, 1)
+    stored = np.array([row[2] for row in projects], dtype=np.int64).reshape(-1, 1)
+
+    # Available credits start at total_credits and move with the ledger
+    expected_keys, expected = merge_sums([(expected_keys, expected), (stored_keys, totals)], 1)
+    drifts.extend(compare("project", ["available_credits"], stored_keys, stored, expected_keys, expected))
+    return drifts
+
+
+def reconcile(workers: int, partitions: int, chunk_size: int) -> List[Drift]:
+    """
+    Reconcile every wallet and project, as of one snapshot, and return all drifts.
+    """
+    return asyncio.run(_reconcile(workers, partitions, chunk_size))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Reconcile wallet and project balances against the ledger")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--partitions", type=int, default=None, help="Wallet-id ranges (default: 4 per worker)")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="Ledger rows fetched per chunk")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    workers = args.workers or os.cpu_count() or 1
+    partitions = args.partitions or workers * 4
+    started = time.perf_counter()
+
+    drifts = reconcile(workers=workers, partitions=partitions, chunk_size=args.chunk_size)
+    for drift in drifts:
+        print(json.dumps(asdict(drift)))
+
+    print(
+        f"Found {len(drifts)} drift(s) in {time.perf_counter() - started:.1f}s",
+        file=sys.stderr
+    )
+    sys.exit(1 if drifts else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Write periodic wallet balance snapshots.
+
+Usage:
+    python -m jobs.snapshot_balances            # run forever
+    python -m jobs.snapshot_balances --once     # single run (e.g. from cron)
+
+Every BALANCE_SNAPSHOT_INTERVAL_SECONDS, each wallet whose ledger changed
+since its last snapshot gets a new one. Cutoffs are aligned to the
+interval and lag BALANCE_SNAPSHOT_GRACE_SECONDS behind now, so
+transactions still being committed around the cutoff are not missed and
+a rerun of the same period writes nothing.
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from config.database import MaintenanceSessionLocal, maintenance_engine
+from config.settings import settings
+from repository.wallet_balance_snapshot_repository import WalletBalanceSnapshotRepository
+from utils.utils import get_utc_now
+
+
+def snapshot_cutoff(now: datetime, interval_seconds: int, grace_seconds: int) -> datetime:
+    """
+    Latest interval boundary at least grace_seconds before now.
+    """
+    lagged = (now - timedelta(seconds=grace_seconds)).timestamp()
+    return datetime.fromtimestamp(lagged - lagged % interval_seconds, tz=timezone.utc)
+
+
+async def snapshot_balances(cutoff: datetime) -> int:
+    """
+    Snapshot every changed wallet as of cutoff and return the number written.
+    """
+    async with MaintenanceSessionLocal() as session:
+        async with session.begin():
+            return await WalletBalanceSnapshotRepository(session=session).create_snapshots(cutoff=cutoff)
+
+
+async def run(once: bool) -> None:
+    interval = settings.BALANCE_SNAPSHOT_INTERVAL_SECONDS
+    try:
+        while True:
+            started = time.perf_counter()
+            cutoff = snapshot_cutoff(get_utc_now(), interval, settings.BALANCE_SNAPSHOT_GRACE_SECONDS)
+            written = await snapshot_balances(cutoff)
+            print(f"Wrote {written} snapshot(s) as of {cutoff.isoformat()} in {time.perf_counter() - started:.1f}s")
+            if once:
+                break
+            await asyncio.sleep(interval)
+    finally:
+        await maintenance_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write periodic wallet balance snapshots")
+    parser.add_argument("--once", action="store_true", help="Write one round of snapshots and exit")
+    args = parser.parse_args()
+    asyncio.run(run(once=args.once))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,35 @@
+from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import FastAPI
+from config.admission_control import AdmissionControlMiddleware, admission_controllers
+from config.invalidation_bus import invalidation_bus
+from config.settings import settings
 from router.api import router
 
 swagger_docs = "docs"
 redoc_docs = "redoc"
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Evict cache entries changed by other workers
+    if settings.INVALIDATION_LISTENER_ENABLED:
+        await invalidation_bus.start()
+    yield
+    await invalidation_bus.stop()
+
+
 app = FastAPI(
     debug=True,
+    lifespan=lifespan,
     docs_url=f"/{swagger_docs}" if swagger_docs else None,
     redoc_url=f"/{redoc_docs}" if redoc_docs else None,
 )
 
+# Shed load before it queues on the connection pools; added before CORS so
+# CORS stays outermost and shed responses carry its headers
+if settings.ADMISSION_CONTROL_ENABLED:
+    app.add_middleware(AdmissionControlMiddleware, controllers=admission_controllers)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
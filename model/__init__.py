@@ -2,10 +2,18 @@ from .transaction import Transaction
 from .user import User
 from .wallet import Wallet
 from .project import Project
+from .project_inventory_shard import ProjectInventoryShard
+from .wallet_balance_snapshot import WalletBalanceSnapshot
+from .revoked_token import RevokedToken
+from .idempotency_key import IdempotencyKey
 
 __all__ = [
     "Transaction",
     "User",
     "Wallet",
-    "Project"
+    "Project",
+    "ProjectInventoryShard",
+    "WalletBalanceSnapshot",
+    "RevokedToken",
+    "IdempotencyKey"
 ]
\ No newline at end of file
@@ -0,0 +1,65 @@
+from sqlalchemy import UUID, Column, DateTime, ForeignKey, Index, Integer, String, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
+from .base_model import BaseModel
+from sqlalchemy.orm import relationship
+
+class IdempotencyKey(BaseModel):
+    """
+    Idempotency-Key of a write request and, once it completed, its response
+    Inherits: id, created_at, updated_at, is_active, created_by_id, updated_by_id
+    """
+
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey('user.id', ondelete='CASCADE'),
+        nullable=False,
+        doc="User that sent the request"
+    )
+
+    key = Column(
+        String(255),
+        nullable=False,
+        doc="Idempotency-Key header sent by the client"
+    )
+
+    fingerprint = Column(
+        String(64),
+        nullable=False,
+        doc="SHA-256 of the request method, path and body the key was first used with"
+    )
+
+    status_code = Column(
+        Integer,
+        nullable=True,
+        doc="Status of the stored response; NULL while the first request is in flight"
+    )
+
+    response = Column(
+        JSONB,
+        nullable=True,
+        doc="Serialized response body replayed to retries"
+    )
+
+    committed_at = Column(
+        DateTime(timezone=True),
+        nullable=True,
+        doc="When the request's write committed; set in the write's own transaction"
+    )
+
+    expires_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        doc="End of the in-flight lease, or of the retention once the write committed"
+    )
+
+    # Relationships
+    user = relationship("User", foreign_keys=[user_id])
+
+    # Indexes
+    __table_args__ = (
+        UniqueConstraint('user_id', 'key', name='uq_idempotency_key_user_key'),
+        Index('idx_idempotency_key_expires', 'expires_at'),
+    )
+
+    def __repr__(self):
+        return f"<IdempotencyKey(user_id={self.user_id}, key={self.key}, status_code={self.status_code})>"
@@ -1,6 +1,6 @@
 from decimal import Decimal
 import uuid
-from sqlalchemy import DECIMAL, Column, Index, String, Text
+from sqlalchemy import DECIMAL, Column, Index, Integer, String, Text
 from .base_model import BaseModel
 from sqlalchemy.orm import relationship
 from utils.utils import get_utc_now
@@ -44,26 +44,65 @@ class Project(BaseModel):
         nullable=False,
         doc="Price per credit in USD"
     )
+
+    # 1: available_credits holds the project's inventory. N > 1: the
+    # inventory is split across N ProjectInventoryShard rows and
+    # available_credits only keeps what has not been moved into them
+    inventory_shard_count = Column(
+        Integer,
+        default=1,
+        server_default="1",
+        nullable=False,
+        doc="Number of inventory shards purchases spread across"
+    )
+
+    # Row version, checked and bumped by every ORM update (optimistic
+    # concurrency) and bumped by the guarded Core updates
+    version = Column(
+        Integer,
+        default=1,
+        server_default="1",
+        nullable=False,
+        doc="Row version for optimistic concurrency control"
+    )
     
     # Relationships
     created_by_user = relationship("User", foreign_keys="[Project.created_by]", back_populates="projects_created")
     updated_by_user = relationship("User", foreign_keys="[Project.updated_by]", back_populates="projects_updated")
     transactions = relationship("Transaction",back_populates="project")
+    inventory_shards = relationship(
+        "ProjectInventoryShard",
+        back_populates="project",
+        order_by="ProjectInventoryShard.shard_no",
+        cascade="all, delete-orphan",
+        lazy="selectin"
+    )
     
     # Indexes
     __table_args__ = (
         Index('idx_project_active_credits', 'is_active', 'available_credits'),
         Index('idx_project_created_at', 'created_at'),
     )
+    __mapper_args__ = {"version_id_col": version}
     
     def __repr__(self):
         return f"<Project(id={self.id}, name={self.name}, available_credits={self.available_credits})>"
     
+    @property
+    def total_available_credits(self) -> Decimal:
+        """
+        Credits available for purchase, summed over the inventory shards
+        """
+        return self.available_credits + sum(
+            (shard.available_credits for shard in self.inventory_shards),
+            Decimal('0.00')
+        )
+
     async def has_sufficient_credits(self, amount: Decimal) -> bool:
         """
         Check if project has enough credits for purchase
         """
-        return self.available_credits >= amount
+        return self.total_available_credits >= amount
     
     async def reserve_credits(self, session, amount: Decimal, updated_by: uuid.UUID, commit: bool = True):
         """
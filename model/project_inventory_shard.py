@@ -0,0 +1,42 @@
+from decimal import Decimal
+from sqlalchemy import DECIMAL, UUID, Column, ForeignKey, Integer, UniqueConstraint
+from .base_model import BaseModel
+from sqlalchemy.orm import relationship
+
+class ProjectInventoryShard(BaseModel):
+    """
+    A slice of a sharded project's available credits; purchases take
+    credits from one shard so they do not all lock the project row
+    Inherits: id, created_at, updated_at, is_active, created_by_id, updated_by_id
+    """
+
+    project_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey('project.id', ondelete='CASCADE'),
+        nullable=False,
+        doc="Project this shard belongs to"
+    )
+
+    shard_no = Column(
+        Integer,
+        nullable=False,
+        doc="Position of the shard, 0 to the project's inventory_shard_count - 1"
+    )
+
+    available_credits = Column(
+        DECIMAL(precision=15, scale=2),
+        default=Decimal('0.00'),
+        nullable=False,
+        doc="Credits of this shard still available for purchase"
+    )
+
+    # Relationships
+    project = relationship("Project", back_populates="inventory_shards")
+
+    # Indexes
+    __table_args__ = (
+        UniqueConstraint('project_id', 'shard_no', name='uq_project_inventory_shard_project_no'),
+    )
+
+    def __repr__(self):
+        return f"<ProjectInventoryShard(project_id={self.project_id}, shard_no={self.shard_no}, available_credits={self.available_credits})>"
@@ -0,0 +1,41 @@
+from sqlalchemy import UUID, Column, DateTime, ForeignKey, Index, String
+from .base_model import BaseModel
+from sqlalchemy.orm import relationship
+
+class RevokedToken(BaseModel):
+    """
+    Access token revoked before its expiry (denylist entry)
+    Inherits: id, created_at, updated_at, is_active, created_by_id, updated_by_id
+    """
+
+    jti = Column(
+        String(64),
+        nullable=False,
+        unique=True,
+        doc="Token id (jti claim) of the revoked token"
+    )
+
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey('user.id', ondelete='CASCADE'),
+        nullable=False,
+        doc="User the token was issued to"
+    )
+
+    expires_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        doc="Expiry of the revoked token; the entry can be purged afterwards"
+    )
+
+    # Relationships
+    user = relationship("User", foreign_keys=[user_id])
+
+    # Indexes
+    __table_args__ = (
+        Index('idx_revoked_token_created', 'created_at'),
+        Index('idx_revoked_token_expires', 'expires_at'),
+    )
+
+    def __repr__(self):
+        return f"<RevokedToken(jti={self.jti}, user_id={self.user_id}, expires_at={self.expires_at})>"
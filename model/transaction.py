@@ -1,4 +1,4 @@
-from sqlalchemy import DECIMAL, UUID, Column, Enum, ForeignKey, Index, String
+from sqlalchemy import DECIMAL, UUID, Boolean, Column, DateTime, Enum, ForeignKey, Index, String, text
 from .base_model import BaseModel
 from sqlalchemy.orm import relationship
 from utils.utils import get_utc_now,TransactionStatus,TransactionType,PurchaseType
@@ -8,15 +8,39 @@ from utils.utils import get_utc_now,TransactionStatus,TransactionType,PurchaseTy
 class Transaction(BaseModel):
     """
     Transaction history for all credit movements
-    Inherits: id, created_at, updated_at, is_active, created_by_id, updated_by_id
+    Inherits: updated_at, created_by_id, updated_by_id
+
+    Range-partitioned by month on created_at (see jobs.create_partitions),
+    so created_at is part of the primary key and queries should carry a
+    created_at predicate to prune partitions.
     """
-    
-    
+
+    id = Column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=text("gen_random_uuid()"),
+        doc="Unique identifier for this record"
+    )
+
+    created_at = Column(
+        DateTime(timezone=True),
+        primary_key=True,
+        default=get_utc_now,
+        nullable=False,
+        doc="Timestamp when this record was created (partition key)"
+    )
+
+    is_active = Column(
+        Boolean,
+        default=True,
+        nullable=False,
+        doc="Whether this record is active (soft delete)"
+    )
+
     user_id = Column(
         UUID(as_uuid=True),
         ForeignKey('user.id', ondelete='CASCADE'),
         nullable=False,
-        index=True,
         doc="User involved in the transaction"
     )
     
@@ -24,7 +48,6 @@ class Transaction(BaseModel):
         UUID(as_uuid=True),
         ForeignKey('project.id', ondelete='SET NULL'),
         nullable=True,
-        index=True,
         doc="Project involved in the transaction (nullable for topups)"
     )
 
@@ -32,14 +55,12 @@ class Transaction(BaseModel):
         UUID(as_uuid=True),
         ForeignKey('wallet.id', ondelete='CASCADE'),
         nullable=False,
-        index=True,
         doc="Wallet involved in the transaction"
     )
     
     transaction_type = Column(
         Enum(TransactionType, name="transaction_type_enum"),
         nullable=False,
-        index=True,
         doc="Type of transaction (TOPUP, PURCHASE, REFUND)"
     )
 
@@ -84,7 +105,6 @@ class Transaction(BaseModel):
         Enum(TransactionStatus, name="transaction_status_enum"),
         default=TransactionStatus.PENDING,
         nullable=False,
-        index=True,
         doc="Transaction status"
     )
     
@@ -102,10 +122,21 @@ class Transaction(BaseModel):
     updated_by_user = relationship("User", foreign_keys="[Transaction.updated_by]", back_populates="transactions_updated")
 
     # Indexes
+    # The (..., created_at, id) indexes serve the ledger search and exports:
+    # equality filters first, then the keyset / export order. They also
+    # cover the foreign keys, so no single-column indexes are kept; every
+    # index is local to its monthly partition.
     __table_args__ = (
-        Index('idx_transaction_user_type', 'user_id', 'transaction_type'),
         Index('idx_transaction_status_created', 'status', 'created_at'),
-        Index('idx_transaction_project', 'project_id'),
+        Index('idx_transaction_project_created', 'project_id', 'created_at', 'id'),
+        Index('idx_transaction_created_id', 'created_at', 'id'),
+        Index('idx_transaction_user_created', 'user_id', 'created_at', 'id'),
+        Index('idx_transaction_user_type_created', 'user_id', 'transaction_type', 'created_at', 'id'),
+        Index('idx_transaction_user_status_created', 'user_id', 'status', 'created_at', 'id'),
+        Index('idx_transaction_user_project_created', 'user_id', 'project_id', 'created_at', 'id'),
+        # Replays a wallet's ledger from its last balance snapshot
+        Index('idx_transaction_wallet_created', 'wallet_id', 'created_at'),
+        {'postgresql_partition_by': 'RANGE (created_at)'},
     )
     
     def __repr__(self):
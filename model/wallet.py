@@ -1,8 +1,8 @@
 from decimal import Decimal
-from sqlalchemy import DECIMAL, UUID, Column, ForeignKey, Index
+from sqlalchemy import DECIMAL, UUID, Column, ForeignKey, Index, Integer
 from .base_model import BaseModel
 from sqlalchemy.orm import relationship
-from utils.utils import get_utc_now
+from utils.utils import TransactionType, get_utc_now
 
 class Wallet(BaseModel):
     """
@@ -26,6 +26,34 @@ class Wallet(BaseModel):
         index=True,
         doc="Current credit balance"
     )
+
+    # Running aggregates over completed transactions, maintained by every
+    # write path in the same DB transaction as the ledger insert
+    credit_balance = Column(
+        DECIMAL(precision=15, scale=2),
+        default=Decimal('0.00'),
+        server_default="0",
+        nullable=False,
+        doc="Sum of credit_amount over completed transactions"
+    )
+
+    total_invested = Column(
+        DECIMAL(precision=15, scale=2),
+        default=Decimal('0.00'),
+        server_default="0",
+        nullable=False,
+        doc="Sum of price_paid over completed purchases (USD)"
+    )
+
+    # Row version, checked and bumped by every ORM update (optimistic
+    # concurrency) and bumped by the guarded Core updates
+    version = Column(
+        Integer,
+        default=1,
+        server_default="1",
+        nullable=False,
+        doc="Row version for optimistic concurrency control"
+    )
     
     # Relationships
     transactions = relationship("Transaction", back_populates="wallet")
@@ -38,6 +66,7 @@ class Wallet(BaseModel):
         Index('idx_wallet_user_active', 'user_id', 'is_active'),
         Index('idx_wallet_balance', 'balance'),
     )
+    __mapper_args__ = {"version_id_col": version}
     
     def __repr__(self):
         return f"<Wallet(id={self.id}, user_id={self.user_id}, balance={self.balance})>"
@@ -77,12 +106,10 @@ class Wallet(BaseModel):
         """
         return self.balance >= amount
 
-    async def credit_balance(self):
-        """Calculate balance from transactions"""
-        return sum(t.credit_amount for t in self.transactions if t.status == 'COMPLETED')
-    
-   
-    async def total_invested(self):
-        """Calculate total USD invested"""
-        return sum(t.price_paid for t in self.transactions 
-                  if t.transaction_type == 'PURCHASE' and t.status == 'COMPLETED')
\ No newline at end of file
+    async def record_transaction(self, transaction_type: TransactionType, credit_amount: Decimal, price_paid: Decimal):
+        """
+        Fold a completed transaction into the persisted aggregates
+        """
+        self.credit_balance += credit_amount
+        if transaction_type == TransactionType.PURCHASE:
+            self.total_invested += price_paid
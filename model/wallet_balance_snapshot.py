@@ -0,0 +1,56 @@
+from decimal import Decimal
+from sqlalchemy import DECIMAL, UUID, Column, DateTime, ForeignKey, Index, UniqueConstraint
+from .base_model import BaseModel
+from sqlalchemy.orm import relationship
+
+class WalletBalanceSnapshot(BaseModel):
+    """
+    Wallet totals as of snapshot_at: every completed transaction created
+    before snapshot_at is folded in, none after
+    Inherits: id, created_at, updated_at, is_active, created_by_id, updated_by_id
+    """
+
+    wallet_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey('wallet.id', ondelete='CASCADE'),
+        nullable=False,
+        doc="Wallet this snapshot belongs to"
+    )
+
+    snapshot_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        doc="Exclusive upper bound of the transactions folded into this snapshot"
+    )
+
+    balance = Column(
+        DECIMAL(precision=15, scale=2),
+        default=Decimal('0.00'),
+        nullable=False,
+        doc="Wallet balance as of snapshot_at"
+    )
+
+    credit_balance = Column(
+        DECIMAL(precision=15, scale=2),
+        default=Decimal('0.00'),
+        nullable=False,
+        doc="Sum of credit_amount over completed transactions as of snapshot_at"
+    )
+
+    total_invested = Column(
+        DECIMAL(precision=15, scale=2),
+        default=Decimal('0.00'),
+        nullable=False,
+        doc="Sum of price_paid over completed purchases as of snapshot_at"
+    )
+
+    # Relationships
+    wallet = relationship("Wallet", foreign_keys=[wallet_id])
+
+    # Indexes
+    __table_args__ = (
+        UniqueConstraint('wallet_id', 'snapshot_at', name='uq_wallet_balance_snapshot_wallet_at'),
+    )
+
+    def __repr__(self):
+        return f"<WalletBalanceSnapshot(wallet_id={self.wallet_id}, snapshot_at={self.snapshot_at}, balance={self.balance})>"
@@ -1,19 +1,49 @@
 import uuid
-from sqlalchemy import Select
+import json
+from sqlalchemy import Row, Select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.future import select
 from sqlalchemy.sql import text
 from sqlalchemy.orm import joinedload,selectinload
-from sqlalchemy.sql.elements import UnaryExpression
-from schema.pagination_schema import PaginatedResponse,PaginatedRequest
-from typing import Type, TypeVar, List, Any, Dict, Optional
+from sqlalchemy.sql.elements import ClauseElement, UnaryExpression
+from sqlalchemy.sql.expression import Executable
+from schema.pagination_schema import PaginatedResponse,PaginatedRequest,CursorPaginatedResponse,CursorPaginatedRequest
+from typing import AsyncIterator, Sequence, Type, TypeVar, List, Any, Dict, Optional
 from sqlalchemy.sql import func
 from pydantic import BaseModel
-from utils.utils import  get_utc_now
+from utils.cache import TTLCache
+from utils.utils import  get_utc_now, encode_cursor, decode_cursor, CountStrategy
+from config.settings import settings
 
 ModelType = TypeVar("ModelType")
 ResponseType = TypeVar("ResponseType")
 
+# Per-process cache of exact counts for CountStrategy.CACHED,
+# keyed by table, count SQL and bound filter values
+_count_cache = TTLCache(
+    maxsize=settings.PAGINATION_COUNT_CACHE_SIZE,
+    ttl=settings.PAGINATION_COUNT_CACHE_TTL_SECONDS,
+    name="pagination_count"
+)
+
+
+class _ExplainJson(Executable, ClauseElement):
+    """
+    EXPLAIN (FORMAT JSON) of a statement, compiled with the statement's
+    bound parameters so they are typed and sent like any query's.
+    """
+    inherit_cache = False
+
+    def __init__(self, statement: Select):
+        self.statement = statement
+
+
+@compiles(_ExplainJson)
+def _compile_explain_json(element: _ExplainJson, compiler, **kw) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
 class BaseORM:
     def __init__(self, db: AsyncSession, model: Type[ModelType]):
         """
@@ -66,6 +96,13 @@ class BaseORM:
     #         await self.db.refresh(obj)
     #     return obj
 
+    def on_change(self, obj: Any) -> None:
+        """
+        Hook called when a record is updated or deleted, before the commit,
+        e.g. to publish cache invalidations.
+        :param obj: The changed model instance
+        """
+
     async def update(self, obj: Any, commit: bool = True) -> Optional[ModelType]:
         """
         Update a record by its ID.
@@ -75,6 +112,7 @@ class BaseORM:
         if obj.updated_at is None:
             obj.updated_at = get_utc_now()
         
+        self.on_change(obj)
         if commit:
             await self.db.commit()
             await self.db.refresh(obj)
@@ -88,6 +126,7 @@ class BaseORM:
         """
         obj = await self.get_by_id(obj_id)
         if obj:
+            self.on_change(obj)
             if soft_delete == False:
                 await self.db.delete(obj)
             else:
@@ -104,14 +143,22 @@ class BaseORM:
             return True
         return False
 
-    async def get_by_id(self, obj_id: Any, relationships: Optional[List[str]] = None) -> Optional[ModelType]:
+    async def get_by_id(
+        self,
+        obj_id: Any,
+        relationships: Optional[List[str]] = None,
+        for_update: bool = False
+    ) -> Optional[ModelType]:
         """
         Get a record by its ID with optional relationships.
         :param obj_id: ID of the record
         :param relationships: List of relationships to load (eager loading)
+        :param for_update: Lock the row (SELECT ... FOR UPDATE) and refresh it from the database
         :return: Model instance or None if not found
         """
         query = select(self.model).filter(self.model.id == obj_id)
+        if for_update:
+            query = query.with_for_update().execution_options(populate_existing=True)
         if relationships:
             for rel in relationships:
                     attr = getattr(self.model, rel, None)
@@ -205,15 +252,19 @@ class BaseORM:
         pagination: PaginatedRequest,
         response_model: Type[ResponseType],
         filters: Optional[List[Any]] = None,  # List of SQLAlchemy filter conditions
-        order_by: Optional[List[Any]] = None
+        order_by: Optional[List[Any]] = None,
+        count_strategy: Optional[CountStrategy] = None
     ) -> PaginatedResponse[ResponseType]:
         """
         Get all records with pagination and optional filters.
         :param pagination: PaginatedRequest object containing skip and limit.
         :param response_model: Pydantic model to map database results.
         :param filters: List of filter conditions (SQLAlchemy expressions).
+        :param count_strategy: How to obtain total_count (defaults to settings).
         :return: PaginatedResponse object containing data and pagination details.
         """
+        strategy = self._resolve_count_strategy(count_strategy)
+
         # Build the base query
         query = select(self.model)
         count_query = select(func.count(self.model.id))
@@ -232,29 +283,24 @@ class BaseORM:
                 query = query.order_by(order_condition)
 
         # Query for the total count of records
-        count_result = await self.db.execute(count_query)
-        total_count = count_result.scalar()
+        total_count = await self._count_total(
+            count_query=count_query,
+            rows_query=select(self.model.id).where(*(filters or [])),
+            filtered=bool(filters),
+            strategy=strategy
+        )
 
         # Query for paginated records
         data_query = await self.db.execute(
-            query.offset(pagination.skip).limit(pagination.limit)
+            query.offset(pagination.skip).limit(self._page_fetch_size(pagination, strategy))
         )
         records = data_query.scalars().all()
 
         # Map records to the response model
         data = [response_model.from_orm(record) for record in records]
 
-        # Calculate total pages
-        total_pages = (total_count + pagination.limit - 1) // pagination.limit
-
         # Return paginated response
-        return PaginatedResponse[ResponseType](
-            page=(pagination.skip // pagination.limit) + 1,
-            page_size=pagination.limit,
-            total_count=total_count,
-            total_pages=total_pages,
-            data=data,
-        )
+        return self._build_page(pagination, data, total_count, strategy)
     
     async def get_by_filter_with_pagination(
         self, 
@@ -263,7 +309,8 @@ class BaseORM:
         response_model: Type[ResponseType],
         relationships: Optional[List[str]] = None,
         joins: Optional[List[Any]] = None,
-        order_by: Optional[List[Any]] = None
+        order_by: Optional[List[Any]] = None,
+        count_strategy: Optional[CountStrategy] = None
     ) -> PaginatedResponse[ResponseType]:
                 
             """
@@ -273,8 +320,11 @@ class BaseORM:
             :param response_model: Pydantic model to map database results.
             :param relationships: List of relationships to load (eager loading)
             :param order_by: List of columns or expressions to order by.
+            :param count_strategy: How to obtain total_count (defaults to settings).
             :return: PaginatedResponse object containing data and pagination details.
             """
+            strategy = self._resolve_count_strategy(count_strategy)
+
             # Build the base query with filters
             query = select(self.model).filter(*filters)
             count_query = select(func.count(self.model.id)).filter(*filters)
@@ -305,33 +355,25 @@ class BaseORM:
                     query = query.order_by(order_condition)
 
             # Query for the total count of records
-            count_result = await self.db.execute(count_query)
-            total_count = count_result.scalar()
+            total_count = await self._count_total(
+                count_query=count_query,
+                rows_query=select(self.model.id).filter(*filters),
+                filtered=bool(filters),
+                strategy=strategy
+            )
 
             # Query for paginated records
             data_query = await self.db.execute(
-                query.offset(pagination.skip).limit(pagination.limit)
+                query.offset(pagination.skip).limit(self._page_fetch_size(pagination, strategy))
             )
             records = data_query.unique().scalars().all()
 
-            for record in records:
-                print(record.__dict__)
             # Map records to the response model
             data = [response_model.from_orm(record) for record in records]
 
-            # Calculate total pages
-            total_pages = (total_count + pagination.limit - 1) // pagination.limit
-
             # Return paginated response
-            return PaginatedResponse[ResponseType](
-                page=(pagination.skip // pagination.limit) + 1,
-                page_size=pagination.limit,
-                total_count=total_count,
-                total_pages=total_pages,
-                data=data,
-            )
+            return self._build_page(pagination, data, total_count, strategy)
     
-
     async def get_by_filter_custom_options(
         self, 
         filters: List[Any], 
@@ -383,6 +425,7 @@ class BaseORM:
         options: Optional[List[Any]] = None,
         order_by: Optional[List[Any]] = None,
         filters: Optional[List[Any]] = None, 
+        count_strategy: Optional[CountStrategy] = None
     ) -> PaginatedResponse[ResponseType]:
                 
             """
@@ -392,8 +435,11 @@ class BaseORM:
             :param response_model: Pydantic model to map database results.
             :param relationships: List of relationships to load (eager loading)
             :param order_by: List of columns or expressions to order by.
+            :param count_strategy: How to obtain total_count (defaults to settings).
             :return: PaginatedResponse object containing data and pagination details.
             """
+            strategy = self._resolve_count_strategy(count_strategy)
+
             # Build the base query with filters
             query = custom_query if custom_query is not None else select(self.model).filter(*filters)
             if custom_query is not None and count_column is not None:
@@ -404,8 +450,6 @@ class BaseORM:
             if options:
                 query = query.options(*options)
 
-            print(options)
-
             # Apply ordering if provided
             if order_by:
                 for order_condition in order_by:
@@ -414,12 +458,16 @@ class BaseORM:
                     query = query.order_by(order_condition)
 
             # Query for the total count of records
-            count_result = await self.db.execute(count_query)
-            total_count = count_result.scalar()
+            total_count = await self._count_total(
+                count_query=count_query,
+                rows_query=custom_query if custom_query is not None else select(self.model.id).filter(*filters),
+                filtered=custom_query is not None or bool(filters),
+                strategy=strategy
+            )
 
             # Query for paginated records
             data_query = await self.db.execute(
-                query.offset(pagination.skip).limit(pagination.limit)
+                query.offset(pagination.skip).limit(self._page_fetch_size(pagination, strategy))
             )
 
             records = data_query.scalars().all() if custom_query is None else data_query.unique().fetchall()
@@ -429,20 +477,210 @@ class BaseORM:
             else:
                 data = [record._asdict() for record in records]
 
+            # Return paginated response
+            return self._build_page(pagination, data, total_count, strategy)
+
+    def _resolve_count_strategy(self, count_strategy: Optional[CountStrategy]) -> CountStrategy:
+        """
+        Return the requested count strategy, or the configured default.
+        """
+        if count_strategy is not None:
+            return CountStrategy(count_strategy)
+        return CountStrategy(settings.PAGINATION_COUNT_STRATEGY)
+
+    def _page_fetch_size(self, pagination: PaginatedRequest, strategy: CountStrategy) -> int:
+        """
+        Number of rows to fetch for a page; one extra row tells whether
+        another page exists when no count is taken.
+        """
+        if strategy == CountStrategy.NONE:
+            return pagination.limit + 1
+        return pagination.limit
+
+    def _build_page(
+        self,
+        pagination: PaginatedRequest,
+        data: List[Any],
+        total_count: Optional[int],
+        strategy: CountStrategy
+    ) -> PaginatedResponse:
+        """
+        Build the paginated response for the fetched page.
+        """
+        if strategy == CountStrategy.NONE:
+            has_more = len(data) > pagination.limit
+            data = data[:pagination.limit]
+            total_pages = None
+        else:
+            has_more = pagination.skip + len(data) < total_count
             # Calculate total pages
             total_pages = (total_count + pagination.limit - 1) // pagination.limit
 
-            # Return paginated response
-            return PaginatedResponse[ResponseType](
-                page=(pagination.skip // pagination.limit) + 1,
-                page_size=pagination.limit,
-                total_count=total_count,
-                total_pages=total_pages,
-                data=data,
+        return PaginatedResponse(
+            page=(pagination.skip // pagination.limit) + 1,
+            page_size=pagination.limit,
+            total_count=total_count,
+            total_pages=total_pages,
+            has_more=has_more,
+            data=data,
+        )
+
+    async def _count_total(
+        self,
+        count_query: Select,
+        rows_query: Select,
+        filtered: bool,
+        strategy: CountStrategy
+    ) -> Optional[int]:
+        """
+        Obtain the total count of a paginated query according to strategy.
+        :param count_query: SELECT count(...) with the page's filters.
+        :param rows_query: The filtered row query, explained for estimates.
+        :param filtered: Whether any filter applies to the query.
+        :param strategy: CountStrategy to use.
+        :return: The (possibly estimated or cached) count, or None for NONE.
+        """
+        if strategy == CountStrategy.NONE:
+            return None
+
+        if strategy == CountStrategy.ESTIMATED:
+            estimate = await self._estimate_count(rows_query, filtered)
+            if estimate is not None:
+                return estimate
+            # No usable statistics yet: fall back to an exact count
+            strategy = CountStrategy.EXACT
+
+        if strategy == CountStrategy.CACHED:
+            key = self._count_signature(count_query)
+            total_count = _count_cache.get(key)
+            if total_count is None:
+                count_result = await self.db.execute(count_query)
+                total_count = count_result.scalar()
+                _count_cache.set(key, total_count)
+            return total_count
+
+        count_result = await self.db.execute(count_query)
+        return count_result.scalar()
+
+    async def _estimate_count(self, rows_query: Select, filtered: bool) -> Optional[int]:
+        """
+        Estimate the row count from planner statistics.
+
+        Unfiltered queries read pg_class.reltuples; filtered ones use the
+        row estimate of EXPLAIN. Returns None when no estimate is available
+        (table never analyzed).
+        """
+        connection = await self.db.connection()
+
+        if not filtered:
+            result = await connection.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table AS regclass)"),
+                {"table": f'"{self.model.__tablename__}"'}
             )
+            estimate = result.scalar()
+            return estimate if estimate is not None and estimate >= 0 else None
 
+        result = await connection.execute(_ExplainJson(rows_query))
+        plan = result.scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
 
-    
+    def _count_signature(self, count_query: Select) -> tuple:
+        """
+        Cache key identifying a count query and its filter values.
+        """
+        compiled = count_query.compile()
+        return (
+            self.model.__tablename__,
+            str(compiled),
+            tuple(sorted((key, repr(value)) for key, value in compiled.params.items()))
+        )
+
+    async def get_by_filter_with_cursor_pagination(
+        self,
+        pagination: CursorPaginatedRequest,
+        response_model: Type[ResponseType],
+        filters: Optional[List[Any]] = None,
+        options: Optional[List[Any]] = None,
+    ) -> CursorPaginatedResponse[ResponseType]:
+        """
+        Get filtered records with keyset (cursor) pagination, newest first.
+
+        Records are ordered by (created_at, id) descending and the next page
+        seeks past the last row seen with a row-value comparison, so every
+        page costs the same as the first one when an index on
+        (created_at, id) - optionally prefixed by equality filter columns -
+        is available. No total count is computed.
+        :param pagination: CursorPaginatedRequest object containing cursor and limit.
+        :param response_model: Pydantic model to map database results.
+        :param filters: List of SQLAlchemy filter conditions.
+        :param options: List of loader options (eager loading).
+        :return: CursorPaginatedResponse object containing data and the next cursor.
+        :raises ValueError: If the cursor is malformed.
+        """
+        # Build the base query with filters
+        query = select(self.model)
+        if filters:
+            query = query.where(*filters)
+
+        # Seek past the last record of the previous page
+        if pagination.cursor:
+            created_at, last_id = decode_cursor(pagination.cursor)
+            query = query.where(
+                tuple_(self.model.created_at, self.model.id) < tuple_(created_at, last_id)
+            )
+
+        if options:
+            query = query.options(*options)
+
+        # Fetch one extra row to know whether another page exists
+        query = query.order_by(
+            self.model.created_at.desc(),
+            self.model.id.desc()
+        ).limit(pagination.limit + 1)
+
+        data_query = await self.db.execute(query)
+        records = data_query.unique().scalars().all()
+
+        has_more = len(records) > pagination.limit
+        records = records[:pagination.limit]
+        next_cursor = encode_cursor(records[-1].created_at, records[-1].id) if has_more else None
+
+        return CursorPaginatedResponse[ResponseType](
+            page_size=pagination.limit,
+            has_more=has_more,
+            next_cursor=next_cursor,
+            data=[response_model.model_validate(record) for record in records],
+        )
+
+    async def stream_by_filter(
+        self,
+        filters: List[Any],
+        columns: Optional[List[Any]] = None,
+        order_by: Optional[List[Any]] = None,
+        chunk_size: int = 1000
+    ) -> AsyncIterator[Sequence[Row]]:
+        """
+        Stream matching rows in chunks through a server-side cursor.
+
+        Only one chunk is held in memory at a time, so the first rows are
+        available immediately and memory stays flat however many rows
+        match. Select plain columns rather than the model for large reads to
+        skip ORM object construction.
+        :param filters: List of SQLAlchemy filter conditions
+        :param columns: Columns to select (defaults to the model)
+        :param order_by: List of columns or expressions to order by
+        :param chunk_size: Number of rows fetched per round trip
+        :return: Async iterator of row chunks
+        """
+        query = select(*(columns or [self.model])).where(*filters)
+        if order_by:
+            query = query.order_by(*order_by)
+
+        result = await self.db.stream(query.execution_options(yield_per=chunk_size))
+        async for partition in result.partitions():
+            yield partition
         
     async def get_filter_items(
     self, 
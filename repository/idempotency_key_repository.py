@@ -0,0 +1,201 @@
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Collection, FrozenSet, Iterable, Optional, Set
+from sqlalchemy import Update, delete, event, null, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from config.settings import settings
+from model.idempotency_key import IdempotencyKey
+from utils.utils import get_utc_now
+from .base_repository import BaseORM
+
+# session.info key of the claimed idempotency keys whose write commits with the session
+PENDING_KEY = "pending_idempotency_keys"
+
+
+class IdempotencyKeyTakenOver(Exception):
+    """
+    A write tried to commit for an idempotency key whose lease expired and
+    was claimed by a retry; the commit is aborted so the write runs once.
+    """
+
+
+def mark_on_commit(session: Any, record_ids: Iterable[uuid.UUID]) -> None:
+    """
+    Mark the claimed keys committed in the same transaction as the session's
+    next commit. Kept across rolled-back attempts so a retried transaction
+    is marked too.
+    """
+    session.info.setdefault(PENDING_KEY, set()).update(record_ids)
+
+
+def take_pending(session: Any) -> FrozenSet[uuid.UUID]:
+    """
+    Remove and return the keys waiting for the session's next commit, for a
+    write that commits in another session.
+    """
+    return frozenset(session.info.pop(PENDING_KEY, ()))
+
+
+def committed_update(record_ids: Collection[uuid.UUID]) -> Update:
+    """
+    Statement marking claims committed and retaining them for the full TTL;
+    claims already committed or taken over (under a new id) do not match.
+    """
+    now = get_utc_now()
+    return (
+        update(IdempotencyKey)
+        .where(IdempotencyKey.id.in_(record_ids), IdempotencyKey.committed_at.is_(None))
+        .values(
+            committed_at=now,
+            expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS),
+            updated_at=now
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+class IdempotencyKeyRepository(BaseORM):
+    def __init__(self, session: AsyncSession):
+        super().__init__(session, IdempotencyKey)
+
+    async def claim(
+        self,
+        user_id: uuid.UUID,
+        key: str,
+        fingerprint: str,
+        lease_expires_at: datetime
+    ) -> Optional[uuid.UUID]:
+        """
+        Record that a request with this key is in flight, unless the key is
+        already recorded and unexpired (the unique index on (user_id, key)
+        arbitrates between concurrent duplicates).
+
+        A record past its expiry is taken over: a purged-late key, or an
+        in-flight lease whose request died before its write committed. The
+        takeover gives the record a new id, so the abandoned request can no
+        longer mark it committed (see _mark_committed).
+        :param user_id: User that sent the request
+        :param key: Idempotency-Key header
+        :param fingerprint: Fingerprint of the request
+        :param lease_expires_at: When the claim may be taken over if the write has not committed
+        :return: Id of the claimed record, or None when the key is already recorded
+        """
+        now = get_utc_now()
+        statement = (
+            insert(self.model)
+            .values(
+                id=uuid.uuid4(),
+                user_id=user_id,
+                key=key,
+                fingerprint=fingerprint,
+                expires_at=lease_expires_at,
+                created_at=now,
+                updated_at=now,
+                is_active=True,
+                created_by=user_id
+            )
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[self.model.user_id, self.model.key],
+            set_={
+                "id": statement.excluded.id,
+                "fingerprint": statement.excluded.fingerprint,
+                "status_code": None,
+                "response": null(),
+                "committed_at": None,
+                "expires_at": statement.excluded.expires_at,
+                "updated_at": now,
+            },
+            where=self.model.expires_at <= now
+        ).returning(self.model.id)
+        return (await self.db.execute(statement)).scalar_one_or_none()
+
+    async def get(self, user_id: uuid.UUID, key: str) -> Optional[Row]:
+        """
+        Get the recorded fingerprint, commit time and response of a key.
+        :return: Row with fingerprint, committed_at, status_code and response, or None
+        """
+        query = select(
+            self.model.fingerprint,
+            self.model.committed_at,
+            self.model.status_code,
+            self.model.response
+        ).where(self.model.user_id == user_id, self.model.key == key)
+        return (await self.db.execute(query)).one_or_none()
+
+    async def is_committed(self, record_id: uuid.UUID) -> bool:
+        """
+        Whether the write of the request holding this claim has committed.
+        """
+        committed_at = (await self.db.execute(
+            select(self.model.committed_at).where(self.model.id == record_id)
+        )).scalar_one_or_none()
+        return committed_at is not None
+
+    async def held_claims(self, record_ids: Collection[uuid.UUID]) -> Set[uuid.UUID]:
+        """
+        Lock the claims still held by the requests that made them, until the
+        transaction ends, so they cannot be taken over meanwhile.
+        :return: The ids among record_ids that are neither committed nor taken over
+        """
+        rows = await self.db.execute(
+            select(self.model.id)
+            .where(self.model.id.in_(record_ids), self.model.committed_at.is_(None))
+            .order_by(self.model.id)
+            .with_for_update()
+        )
+        return set(rows.scalars().all())
+
+    async def mark_committed(self, record_ids: Collection[uuid.UUID]) -> None:
+        """
+        Mark claims committed in the current (write) transaction.
+        """
+        await self.db.execute(committed_update(record_ids))
+
+    async def complete(self, record_id: uuid.UUID, status_code: int, response: Any, expires_at: datetime) -> None:
+        """
+        Store the response of the request that claimed the key, and keep it
+        until expires_at.
+        """
+        await self.db.execute(
+            update(self.model)
+            .where(self.model.id == record_id)
+            .values(status_code=status_code, response=response, expires_at=expires_at, updated_at=get_utc_now())
+        )
+
+    async def release(self, record_id: uuid.UUID) -> None:
+        """
+        Forget a claim whose write rolled back without a response worth
+        replaying, so a retry runs it again.
+        """
+        await self.db.execute(
+            delete(self.model).where(self.model.id == record_id, self.model.committed_at.is_(None))
+        )
+
+    async def delete_expired(self) -> int:
+        """
+        Purge keys past their expiry.
+        :return: Number of rows deleted
+        """
+        result = await self.db.execute(
+            delete(self.model).where(self.model.expires_at <= get_utc_now())
+        )
+        return result.rowcount
+
+
+@event.listens_for(Session, "before_commit")
+def _mark_committed(session: Session) -> None:
+    record_ids = session.info.get(PENDING_KEY)
+    if not record_ids:
+        return
+    result = session.execute(committed_update(record_ids))
+    if result.rowcount != len(record_ids):
+        raise IdempotencyKeyTakenOver("An idempotency key of this write was taken over by a retry")
+
+
+@event.listens_for(Session, "after_commit")
+def _clear_committed(session: Session) -> None:
+    session.info.pop(PENDING_KEY, None)
@@ -1,9 +1,386 @@
+import uuid
+from dataclasses import dataclass
+from decimal import ROUND_FLOOR, Decimal
+from typing import Any, List, Optional
+from sqlalchemy import UUID, Numeric, column, delete, func, insert, update, values
+from sqlalchemy.orm import aliased
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
 from model.project import Project
+from model.project_inventory_shard import ProjectInventoryShard
+from config.settings import settings
+from config.invalidation_bus import invalidation_bus
+from utils.cache import TTLCache
+from utils.utils import get_utc_now
 from .base_repository import BaseORM
 
 
+@dataclass(frozen=True)
+class ProjectCatalogEntry:
+    """
+    The slowly changing project columns a purchase needs for pricing.
+
+    sold_out reflects the available credits (summed over the inventory
+    shards) when the entry was read; it only rejects purchases early,
+    availability is enforced by reserve_credits.
+    """
+    id: uuid.UUID
+    name: str
+    price_per_credit: Decimal
+    is_active: bool
+    sold_out: bool
+    inventory_shard_count: int = 1
+
+    @property
+    def sharded(self) -> bool:
+        return self.inventory_shard_count > 1
+
+    @property
+    def available(self) -> bool:
+        return self.is_active and not self.sold_out
+
+
+# Per-process catalog of purchasable projects keyed by project id
+project_catalog_cache = TTLCache(
+    maxsize=settings.PROJECT_CATALOG_CACHE_SIZE,
+    ttl=settings.PROJECT_CATALOG_CACHE_TTL_SECONDS,
+    name="project_catalog"
+)
+
+# Inactive and sold-out projects, kept briefly so doomed purchases
+# are rejected without a query
+project_unavailable_cache = TTLCache(
+    maxsize=settings.PROJECT_CATALOG_CACHE_SIZE,
+    ttl=settings.PROJECT_NEGATIVE_CACHE_TTL_SECONDS,
+    name="project_unavailable"
+)
+
 
 class ProjectRepository(BaseORM):
     def __init__(self, session: AsyncSession):        
-        super().__init__(session, Project)
\ No newline at end of file
+        super().__init__(session, Project)
+
+    def on_change(self, obj: Any) -> None:
+        invalidation_bus.publish(self.db, "project", obj.id)
+
+    def cached_entry(self, project_id: uuid.UUID) -> Optional[ProjectCatalogEntry]:
+        """
+        Get the project's catalog entry from the caches only, without querying.
+        :param project_id: ID of the project
+        :return: ProjectCatalogEntry or None if the project is not cached
+        """
+        entry = project_catalog_cache.get(project_id)
+        if entry is None:
+            entry = project_unavailable_cache.get(project_id)
+        return entry
+
+    async def get_catalog_entry(self, project_id: uuid.UUID) -> Optional[ProjectCatalogEntry]:
+        """
+        Get the project's catalog entry, served from the caches when possible.
+        :param project_id: ID of the project
+        :return: ProjectCatalogEntry or None if the project does not exist
+        """
+        entry = self.cached_entry(project_id)
+        if entry is not None:
+            return entry
+
+        query = select(
+            Project.id,
+            Project.name,
+            Project.price_per_credit,
+            Project.is_active,
+            (Project.available_credits + shard_credits(Project.id) <= 0).label("sold_out"),
+            Project.inventory_shard_count
+        ).filter(Project.id == project_id)
+        row = (await self.db.execute(query)).one_or_none()
+
+        if row is None:
+            return None
+
+        entry = ProjectCatalogEntry(**row._mapping)
+        if entry.available:
+            project_catalog_cache.set(project_id, entry)
+        else:
+            project_unavailable_cache.set(project_id, entry)
+        return entry
+
+    async def reserve_credits(
+        self,
+        project_id: uuid.UUID,
+        amount: Decimal,
+        updated_by: uuid.UUID,
+        shards: int = 1
+    ) -> Optional[Decimal]:
+        """
+        Take credits from an active project, guarded by availability.
+        :param project_id: ID of the project
+        :param amount: Credits to reserve
+        :param updated_by: ID of the purchasing user
+        :param shards: The project's inventory_shard_count; sharded projects
+            are reserved from their shards without touching the project row
+        :return: The remaining credits, or None when the guard did not match
+        """
+        if shards > 1:
+            return await self.reserve_from_shards(project_id, amount, updated_by)
+
+        query = (
+            update(Project)
+            .where(
+                Project.id == project_id,
+                Project.is_active.is_(True),
+                Project.available_credits >= amount
+            )
+            .values(
+                available_credits=Project.available_credits - amount,
+                version=Project.version + 1,
+                updated_at=get_utc_now(),
+                updated_by=updated_by
+            )
+            .returning(Project.available_credits)
+        )
+        remaining = (await self.db.execute(query)).scalar_one_or_none()
+        if remaining is not None and remaining <= 0:
+            # Other workers drop the entry and see the project sold out on their next read
+            invalidation_bus.publish(self.db, "project", project_id)
+        return remaining
+
+    async def reserve_from_shards(
+        self,
+        project_id: uuid.UUID,
+        amount: Decimal,
+        updated_by: uuid.UUID
+    ) -> Optional[Decimal]:
+        """
+        Take credits from one inventory shard of an active project.
+
+        A random shard with enough credits is picked, skipping shards locked
+        by concurrent purchases, so purchases spread across the shards. When
+        every such shard is busy, the purchase waits on the lock of a random
+        one instead. Only when no shard can cover the amount on its own are
+        the shards locked and rebalanced, taking the amount from their sum.
+        :param project_id: ID of the sharded project
+        :param amount: Credits to reserve
+        :param updated_by: ID of the purchasing user
+        :return: The remaining credits over all shards (approximate when
+            other shards are being purchased from), or None when they are
+            not enough
+        """
+        remaining = await self.take_from_shard(project_id, amount, updated_by, skip_locked=True)
+        if remaining is None:
+            # More concurrent purchases than free shards: queue on one
+            remaining = await self.take_from_shard(project_id, amount, updated_by, skip_locked=False)
+        if remaining is None:
+            remaining = await self.rebalance_shards(project_id, updated_by, take=amount)
+        if remaining is not None and remaining <= 0:
+            # Other workers drop the entry and see the project sold out on their next read
+            invalidation_bus.publish(self.db, "project", project_id)
+        return remaining
+
+    async def take_from_shard(
+        self,
+        project_id: uuid.UUID,
+        amount: Decimal,
+        updated_by: uuid.UUID,
+        skip_locked: bool
+    ) -> Optional[Decimal]:
+        """
+        Take credits from a random shard holding at least amount.
+        :param skip_locked: Pass over shards locked by concurrent purchases
+            instead of waiting for one of them
+        :return: The remaining credits over all shards, or None when no
+            (unlocked, with skip_locked) shard could cover the amount
+        """
+        shard = ProjectInventoryShard
+        picked = (
+            select(shard.id)
+            .join(Project, Project.id == shard.project_id)
+            .where(
+                shard.project_id == project_id,
+                shard.available_credits >= amount,
+                Project.is_active.is_(True)
+            )
+            .order_by(func.random())
+            .limit(1)
+            .with_for_update(of=shard, skip_locked=skip_locked)
+            .cte("picked")
+        )
+        other = aliased(ProjectInventoryShard)
+        others = (
+            select(func.coalesce(func.sum(other.available_credits), 0))
+            .where(other.project_id == project_id, other.id != picked.c.id)
+            .scalar_subquery()
+        )
+        query = (
+            update(shard)
+            .where(shard.id == picked.c.id)
+            .values(
+                available_credits=shard.available_credits - amount,
+                updated_at=get_utc_now(),
+                updated_by=updated_by
+            )
+            .returning(shard.available_credits + others)
+        )
+        return (await self.db.execute(query)).scalar_one_or_none()
+
+    async def rebalance_shards(
+        self,
+        project_id: uuid.UUID,
+        updated_by: uuid.UUID,
+        take: Decimal = Decimal('0.00')
+    ) -> Optional[Decimal]:
+        """
+        Lock every shard of an active project, take credits from their sum
+        and spread the rest evenly across them.
+        :param project_id: ID of the sharded project
+        :param updated_by: ID of the user on whose behalf the shards change
+        :param take: Credits to reserve while the shards are locked
+        :return: The remaining credits, or None when the shards hold less than take
+        """
+        shard = ProjectInventoryShard
+        rows = (await self.db.execute(
+            select(shard.id, shard.available_credits)
+            .join(Project, Project.id == shard.project_id)
+            .where(shard.project_id == project_id, Project.is_active.is_(True))
+            .order_by(shard.shard_no)
+            .with_for_update(of=shard)
+        )).all()
+        total = sum((row.available_credits for row in rows), Decimal('0.00'))
+        if not rows or total < take:
+            return None
+
+        remaining = total - take
+        balanced = values(
+            column("id", UUID),
+            column("available_credits", Numeric(15, 2)),
+            name="balanced"
+        ).data([(row.id, credits) for row, credits in zip(rows, split_credits(remaining, len(rows)))])
+        await self.db.execute(
+            update(shard)
+            .where(shard.id == balanced.c.id)
+            .values(
+                available_credits=balanced.c.available_credits,
+                updated_at=get_utc_now(),
+                updated_by=updated_by
+            )
+        )
+        return remaining
+
+    async def set_inventory_shards(
+        self,
+        project_id: uuid.UUID,
+        count: int,
+        updated_by: uuid.UUID
+    ) -> Optional[Decimal]:
+        """
+        Re-split a project's available credits across count inventory shards.
+
+        The project row and its shards are locked, their credits summed and
+        the shards replaced; count 1 moves every credit back onto the
+        project row. Purchases blocked on a replaced shard fall back to the
+        rebalancing pass, so resharding is best done before a launch.
+        :param project_id: ID of the project
+        :param count: New number of shards (1 disables sharding)
+        :param updated_by: ID of the user resharding the project
+        :return: The project's available credits, or None if it does not exist
+        """
+        shard = ProjectInventoryShard
+        project = (await self.db.execute(
+            select(Project.available_credits)
+            .where(Project.id == project_id)
+            .with_for_update()
+        )).one_or_none()
+        if project is None:
+            return None
+
+        # Aggregates cannot be locked: lock the rows and sum them here
+        shards = (await self.db.execute(
+            select(shard.id, shard.available_credits)
+            .where(shard.project_id == project_id)
+            .with_for_update()
+        )).all()
+        total = project.available_credits + sum((row.available_credits for row in shards), Decimal('0.00'))
+
+        await self.db.execute(delete(shard).where(shard.project_id == project_id))
+        if count > 1:
+            now = get_utc_now()
+            await self.db.execute(insert(shard), [
+                {
+                    "project_id": project_id,
+                    "shard_no": shard_no,
+                    "available_credits": credits,
+                    "created_at": now,
+                    "updated_at": now,
+                    "is_active": True,
+                    "created_by": updated_by,
+                }
+                for shard_no, credits in enumerate(split_credits(total, count))
+            ])
+        await self.db.execute(
+            update(Project)
+            .where(Project.id == project_id)
+            .values(
+                available_credits=total if count == 1 else 0,
+                inventory_shard_count=count,
+                version=Project.version + 1,
+                updated_at=get_utc_now(),
+                updated_by=updated_by
+            )
+        )
+        invalidation_bus.publish(self.db, "project", project_id)
+        return total
+
+
+def shard_credits(project_id: Any) -> Any:
+    """
+    SQL expression of the credits held by a project's inventory shards (0 when unsharded).
+    """
+    return (
+        select(func.coalesce(func.sum(ProjectInventoryShard.available_credits), 0))
+        .where(ProjectInventoryShard.project_id == project_id)
+        .scalar_subquery()
+    )
+
+
+def split_credits(total: Decimal, count: int) -> List[Decimal]:
+    """
+    Split credits into count shares that differ by at most one cent.
+    """
+    cents = int((total * 100).to_integral_value(rounding=ROUND_FLOOR))
+    share, extra = divmod(cents, count)
+    return [Decimal(share + (1 if position < extra else 0)) / 100 for position in range(count)]
+
+
+def mark_sold_out(entry: ProjectCatalogEntry) -> None:
+    """
+    Move a project whose last credits were reserved to the negative cache.
+    """
+    project_catalog_cache.invalidate(entry.id)
+    project_unavailable_cache.set(entry.id, ProjectCatalogEntry(
+        id=entry.id,
+        name=entry.name,
+        price_per_credit=entry.price_per_credit,
+        is_active=entry.is_active,
+        sold_out=True,
+        inventory_shard_count=entry.inventory_shard_count
+    ))
+
+
+def invalidate_project(project_id: uuid.UUID) -> None:
+    """
+    Drop a project from both catalog caches.
+    """
+    project_catalog_cache.invalidate(project_id)
+    project_unavailable_cache.invalidate(project_id)
+
+
+def _reset_catalog() -> None:
+    project_catalog_cache.clear()
+    project_unavailable_cache.clear()
+
+
+invalidation_bus.subscribe(
+    "project",
+    evict=lambda key: invalidate_project(uuid.UUID(key)),
+    reset=_reset_catalog
+)
+
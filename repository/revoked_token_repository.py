@@ -0,0 +1,63 @@
+import uuid
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from model.revoked_token import RevokedToken
+from utils.utils import get_utc_now
+from .base_repository import BaseORM
+
+
+class RevokedTokenRepository(BaseORM):
+    def __init__(self, session: AsyncSession):
+        super().__init__(session, RevokedToken)
+
+    async def revoke(self, jti: str, user_id: uuid.UUID, expires_at: datetime) -> None:
+        """
+        Add a token to the denylist (no-op when it is already there).
+        :param jti: Token id
+        :param user_id: User the token was issued to
+        :param expires_at: Token expiry
+        """
+        now = get_utc_now()
+        statement = insert(self.model).values(
+            id=uuid.uuid4(),
+            jti=jti,
+            user_id=user_id,
+            expires_at=expires_at,
+            created_at=now,
+            updated_at=now,
+            is_active=True,
+            created_by=user_id
+        ).on_conflict_do_nothing(index_elements=[self.model.jti])
+        await self.db.execute(statement)
+
+    async def is_revoked(self, jti: str) -> bool:
+        """
+        Exact denylist lookup of a token id.
+        """
+        query = select(self.model.id).where(self.model.jti == jti).limit(1)
+        result = await self.db.execute(query)
+        return result.first() is not None
+
+    async def active_jtis(self, since: Optional[datetime] = None) -> List[str]:
+        """
+        Token ids of unexpired revocations, optionally only those recorded
+        at or after since (served by the created_at index).
+        """
+        query = select(self.model.jti).where(self.model.expires_at > get_utc_now())
+        if since is not None:
+            query = query.where(self.model.created_at >= since)
+        result = await self.db.execute(query)
+        return list(result.scalars())
+
+    async def delete_expired(self) -> int:
+        """
+        Purge revocations whose token has expired anyway.
+        :return: Number of rows deleted
+        """
+        result = await self.db.execute(
+            delete(self.model).where(self.model.expires_at <= get_utc_now())
+        )
+        return result.rowcount
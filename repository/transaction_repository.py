@@ -1,9 +1,380 @@
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from decimal import ROUND_FLOOR, ROUND_HALF_UP, Decimal
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence
+from sqlalchemy import UUID, Numeric, column, func, insert, literal, select, true, update, values
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
+from model.project import Project
 from model.transaction import Transaction
+from model.wallet import Wallet
+from config.settings import settings
+from config.invalidation_bus import invalidation_bus
+from .idempotency_key_repository import IdempotencyKeyRepository
+from utils.utils import PurchaseType, TransactionStatus, TransactionType, get_utc_now
 from .base_repository import BaseORM
 
+# Why a purchase of a batch was not applied
+PROJECT_NOT_FOUND = "project_not_found"
+WALLET_NOT_FOUND = "wallet_not_found"
+INSUFFICIENT_CREDITS = "insufficient_credits"
+INSUFFICIENT_FUNDS = "insufficient_funds"
+IDEMPOTENCY_KEY_TAKEN_OVER = "idempotency_key_taken_over"
+
+CENT = Decimal("0.01")
+
+
+@dataclass(frozen=True)
+class BatchPurchase:
+    """One purchase request of a batch on a single project."""
+    user_id: uuid.UUID
+    amount: Decimal
+    purchase_type: PurchaseType
+    # Idempotency keys claimed by the request, marked committed with the
+    # batch; the purchase is rejected if one was taken over by a retry
+    idempotency_keys: FrozenSet[uuid.UUID] = frozenset()
+
+
+@dataclass
+class PurchaseBatchResult:
+    """
+    Outcome of a batch: per purchase, in request order, either the inserted
+    transaction row or the reason it was rejected.
+    """
+    transactions: List[Optional[Row]] = field(default_factory=list)
+    rejections: List[Optional[str]] = field(default_factory=list)
+    project_name: Optional[str] = None
+    price_per_credit: Optional[Decimal] = None
+    remaining_credits: Optional[Decimal] = None
+
 
 
 class TransactionRepository(BaseORM):
-    def __init__(self, session: AsyncSession):        
-        super().__init__(session, Transaction)
\ No newline at end of file
+    def __init__(self, session: AsyncSession):
+        super().__init__(session, Transaction)
+
+    def time_window(
+        self,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None
+    ) -> List[Any]:
+        """
+        created_at predicates for a query on the partitioned ledger.
+
+        A missing start defaults to TRANSACTION_DEFAULT_WINDOW_DAYS before
+        the end (or now), so the planner can always prune partitions.
+        :param created_from: Inclusive start (defaults to the window start)
+        :param created_to: Exclusive end (unbounded when None)
+        :return: List of filter conditions on Transaction.created_at
+        """
+        if created_from is None:
+            created_from = (created_to or get_utc_now()) - timedelta(days=settings.TRANSACTION_DEFAULT_WINDOW_DAYS)
+
+        filters = [self.model.created_at >= created_from]
+        if created_to is not None:
+            filters.append(self.model.created_at < created_to)
+        return filters
+
+    async def purchase_atomic(
+        self,
+        user_id: uuid.UUID,
+        project_id: uuid.UUID,
+        amount: Decimal,
+        purchase_type: PurchaseType
+    ) -> Row:
+        """
+        Debit the wallet, reserve project credits and record the transaction
+        in a single statement (one round trip).
+
+        Credits and cost are derived from the project's price inside the
+        statement, and both UPDATEs are guarded (`balance >= cost`,
+        `available_credits >= credits`) so concurrent purchases can never
+        oversell: a purchase blocked on the row lock re-checks its guard
+        against the committed value. Nothing is raised here; the caller
+        inspects the returned counters and rolls back when a guard did not
+        match.
+
+        :param user_id: UUID of the purchasing user (owner of the wallet)
+        :param project_id: UUID of the project to purchase from
+        :param amount: Requested credits (BY_CREDIT) or budget (BY_BUDGET)
+        :param purchase_type: PurchaseType of the request
+        :return: Row with project_found, credits_available, wallet_found,
+            debited and reserved counters plus the inserted transaction columns (NULL when the
+            insert did not happen)
+        """
+        now = get_utc_now()
+        amount = literal(amount, Numeric(15, 2))
+
+        # Credits and cost, computed from the current price.
+        # BY_BUDGET floors the credits to 2 decimal places like the ORM path.
+        if purchase_type == PurchaseType.BY_CREDIT:
+            credits = amount
+            requested_credits = amount
+            requested_budget = literal(None, Numeric(15, 2))
+        else:
+            credits = func.floor(amount / Project.price_per_credit * 100) / 100
+            requested_credits = literal(None, Numeric(15, 2))
+            requested_budget = credits * Project.price_per_credit
+
+        priced = select(
+            Project.id.label("project_id"),
+            Project.price_per_credit.label("price_per_credit"),
+            credits.label("credits"),
+            (credits * Project.price_per_credit).label("cost"),
+            requested_credits.label("requested_credits"),
+            requested_budget.label("requested_budget"),
+            (Project.available_credits >= credits).label("credits_available"),
+        ).where(Project.id == project_id, Project.is_active.is_(True)).cte("priced")
+
+        wallet_row = select(Wallet.id).where(Wallet.user_id == user_id).cte("wallet_row")
+
+        # Debit the wallet first (wallet before project, the lock order
+        # used by every write path), guarded by balance, and fold the
+        # purchase into the wallet's persisted totals
+        debited = (
+            update(Wallet)
+            .where(
+                Wallet.user_id == user_id,
+                Wallet.balance >= priced.c.cost,
+                priced.c.credits_available
+            )
+            .values(
+                balance=Wallet.balance - priced.c.cost,
+                credit_balance=Wallet.credit_balance + priced.c.credits,
+                total_invested=Wallet.total_invested + priced.c.cost,
+                version=Wallet.version + 1,
+                updated_at=now,
+                updated_by=user_id
+            )
+            .returning(Wallet.id)
+            .cte("debited")
+        )
+
+        # Reserve project credits, guarded by availability and only if the debit matched
+        reserved = (
+            update(Project)
+            .where(
+                Project.id == priced.c.project_id,
+                Project.available_credits >= priced.c.credits,
+                select(debited.c.id).exists()
+            )
+            .values(
+                available_credits=Project.available_credits - priced.c.credits,
+                version=Project.version + 1,
+                updated_at=now,
+                updated_by=user_id
+            )
+            .returning(Project.id)
+            .cte("reserved")
+        )
+
+        # Record the transaction only when both guards matched
+        inserted = (
+            insert(Transaction)
+            .from_select(
+                [
+                    "id", "user_id", "project_id", "wallet_id", "transaction_type",
+                    "purchase_type", "credit_amount", "price_paid",
+                    "requested_credits", "requested_budget", "price_per_credit",
+                    "status", "created_at", "updated_at", "is_active"
+                ],
+                select(
+                    func.gen_random_uuid(),
+                    literal(user_id, Transaction.user_id.type),
+                    priced.c.project_id,
+                    debited.c.id,
+                    literal(TransactionType.PURCHASE, Transaction.transaction_type.type),
+                    literal(purchase_type.value, Transaction.purchase_type.type),
+                    priced.c.credits,
+                    priced.c.cost,
+                    priced.c.requested_credits,
+                    priced.c.requested_budget,
+                    priced.c.price_per_credit,
+                    literal(TransactionStatus.COMPLETED, Transaction.status.type),
+                    literal(now, Transaction.created_at.type),
+                    literal(now, Transaction.updated_at.type),
+                    true()
+                ).select_from(priced.join(debited, true()).join(reserved, true())),
+                include_defaults=False
+            )
+            .returning(*Transaction.__table__.c)
+            .cte("inserted")
+        )
+
+        def counter(cte):
+            return select(func.count()).select_from(cte).scalar_subquery()
+
+        anchor = select(literal(1).label("anchor")).cte("anchor")
+        stmt = select(
+            counter(priced).label("project_found"),
+            select(priced.c.credits_available).scalar_subquery().label("credits_available"),
+            counter(wallet_row).label("wallet_found"),
+            counter(reserved).label("reserved"),
+            counter(debited).label("debited"),
+            *inserted.c
+        ).select_from(anchor.outerjoin(inserted, true()))
+
+        result = await self.db.execute(stmt)
+        return result.one()
+
+    async def purchase_batch(
+        self,
+        project_id: uuid.UUID,
+        purchases: Sequence[BatchPurchase]
+    ) -> PurchaseBatchResult:
+        """
+        Apply many purchases of one project with a fixed number of statements.
+
+        The wallets are locked in id order, then the project (wallet before
+        project, the lock order used by every write path). Purchases are
+        checked in request order against the locked balances and the
+        remaining availability, so each one sees the purchases accepted
+        before it. The accepted ones are applied with one decrement of the
+        project, one multi-row wallet debit and one bulk insert of their
+        transactions. The purchases' idempotency claims are locked and checked
+        up front; a purchase whose claim was taken over by a retry is
+        rejected on its own, and the others' claims are marked committed in
+        the batch's transaction.
+
+        :param project_id: UUID of the project every purchase is for
+        :param purchases: The purchases, in arrival order
+        :return: PurchaseBatchResult with one transaction row or rejection per purchase
+        """
+        now = get_utc_now()
+        result = PurchaseBatchResult()
+
+        wallets = {
+            row.user_id: row
+            for row in await self.db.execute(
+                select(Wallet.id, Wallet.user_id, Wallet.balance)
+                .where(Wallet.user_id.in_({purchase.user_id for purchase in purchases}))
+                .order_by(Wallet.id)
+                .with_for_update()
+            )
+        }
+        project = (await self.db.execute(
+            select(Project.name, Project.price_per_credit, Project.available_credits)
+            .where(Project.id == project_id, Project.is_active.is_(True))
+            .with_for_update()
+        )).one_or_none()
+
+        if project is None:
+            result.transactions = [None] * len(purchases)
+            result.rejections = [PROJECT_NOT_FOUND] * len(purchases)
+            return result
+
+        # Lock the purchases' idempotency claims so none is taken over before the batch commits
+        idempotency_keys = IdempotencyKeyRepository(self.db)
+        claimed = set().union(*(purchase.idempotency_keys for purchase in purchases))
+        held = await idempotency_keys.held_claims(claimed) if claimed else set()
+        committed_keys = set()
+
+        price = project.price_per_credit
+        available = project.available_credits
+        balances = {user_id: wallet.balance for user_id, wallet in wallets.items()}
+        debits: Dict[uuid.UUID, List[Any]] = {}
+        rows = []
+        positions = []
+
+        for position, purchase in enumerate(purchases):
+            # Credits and cost, derived like the single-purchase paths
+            if purchase.purchase_type == PurchaseType.BY_CREDIT:
+                credits = purchase.amount
+            else:
+                credits = (purchase.amount / price).quantize(CENT, rounding=ROUND_FLOOR)
+            # Rounded as the numeric(15, 2) columns store it, so the summed
+            # wallet debit matches the ledger
+            cost = (credits * price).quantize(CENT, rounding=ROUND_HALF_UP)
+
+            wallet = wallets.get(purchase.user_id)
+            if not purchase.idempotency_keys <= held:
+                rejection = IDEMPOTENCY_KEY_TAKEN_OVER
+            elif wallet is None:
+                rejection = WALLET_NOT_FOUND
+            elif available < credits:
+                rejection = INSUFFICIENT_CREDITS
+            elif balances[purchase.user_id] < cost:
+                rejection = INSUFFICIENT_FUNDS
+            else:
+                rejection = None
+            result.rejections.append(rejection)
+            result.transactions.append(None)
+            if rejection is not None:
+                continue
+
+            available -= credits
+            balances[purchase.user_id] -= cost
+            committed_keys.update(purchase.idempotency_keys)
+            debit = debits.setdefault(wallet.id, [wallet.id, purchase.user_id, Decimal(0), Decimal(0)])
+            debit[2] += cost
+            debit[3] += credits
+            positions.append(position)
+            rows.append({
+                "id": uuid.uuid4(),
+                "user_id": purchase.user_id,
+                "project_id": project_id,
+                "wallet_id": wallet.id,
+                "transaction_type": TransactionType.PURCHASE,
+                "purchase_type": purchase.purchase_type,
+                "credit_amount": credits,
+                "price_paid": cost,
+                "requested_credits": credits if purchase.purchase_type == PurchaseType.BY_CREDIT else None,
+                "requested_budget": cost if purchase.purchase_type == PurchaseType.BY_BUDGET else None,
+                "price_per_credit": price,
+                "status": TransactionStatus.COMPLETED,
+                "created_at": now,
+                "updated_at": now,
+                "is_active": True,
+            })
+
+        result.project_name = project.name
+        result.price_per_credit = price
+        result.remaining_credits = available
+        if not rows:
+            return result
+
+        # One debit per wallet, summed over its purchases in the batch
+        debit_values = values(
+            column("wallet_id", UUID),
+            column("user_id", UUID),
+            column("cost", Numeric(15, 2)),
+            column("credits", Numeric(15, 2)),
+            name="debits"
+        ).data([tuple(debit) for debit in debits.values()])
+        await self.db.execute(
+            update(Wallet)
+            .where(Wallet.id == debit_values.c.wallet_id)
+            .values(
+                balance=Wallet.balance - debit_values.c.cost,
+                credit_balance=Wallet.credit_balance + debit_values.c.credits,
+                total_invested=Wallet.total_invested + debit_values.c.cost,
+                version=Wallet.version + 1,
+                updated_at=now,
+                updated_by=debit_values.c.user_id
+            )
+        )
+
+        await self.db.execute(
+            update(Project)
+            .where(Project.id == project_id)
+            .values(
+                available_credits=Project.available_credits - (project.available_credits - available),
+                version=Project.version + 1,
+                updated_at=now,
+                updated_by=purchases[positions[-1]].user_id
+            )
+        )
+        if available <= 0:
+            # Other workers drop the entry and see the project sold out on their next read
+            invalidation_bus.publish(self.db, "project", project_id)
+
+        inserted = await self.db.execute(
+            insert(Transaction).returning(*Transaction.__table__.c, sort_by_parameter_order=True),
+            rows
+        )
+        for position, row in zip(positions, inserted):
+            result.transactions[position] = row
+        if committed_keys:
+            await idempotency_keys.mark_committed(committed_keys)
+        return result
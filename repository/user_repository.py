@@ -1,9 +1,81 @@
+import uuid
+from dataclasses import dataclass
+from typing import Any, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
 from model.user import User
+from model.wallet import Wallet
+from config.settings import settings
+from config.invalidation_bus import invalidation_bus
+from utils.cache import TTLCache
 from .base_repository import BaseORM
 
 
+@dataclass(frozen=True)
+class UserIdentity:
+    """
+    The user columns needed on hot paths, safe to share across sessions.
+    """
+    id: uuid.UUID
+    username: str
+    email: str
+    is_active: bool
+    wallet_id: Optional[uuid.UUID]
+
+
+# Per-process cache of user identities keyed by user id; entries are
+# dropped on every worker when the user is updated or deleted through
+# UserRepository
+user_identity_cache = TTLCache(
+    maxsize=settings.USER_IDENTITY_CACHE_SIZE,
+    ttl=settings.USER_IDENTITY_CACHE_TTL_SECONDS,
+    name="user_identity"
+)
+invalidation_bus.subscribe(
+    "user",
+    evict=lambda key: user_identity_cache.invalidate(uuid.UUID(key)),
+    reset=user_identity_cache.clear
+)
+
 
 class UserRepository(BaseORM):
     def __init__(self, session: AsyncSession):        
-        super().__init__(session, User)
\ No newline at end of file
+        super().__init__(session, User)
+
+    def on_change(self, obj: Any) -> None:
+        invalidation_bus.publish(self.db, "user", obj.id)
+
+    async def get_identity(self, user_id: uuid.UUID) -> Optional[UserIdentity]:
+        """
+        Get the user's identity and wallet id, served from the cache when possible.
+        :param user_id: ID of the user
+        :return: UserIdentity or None if the user does not exist
+        """
+        identity = user_identity_cache.get(user_id)
+        if identity is not None:
+            return identity
+
+        query = (
+            select(User.id, User.username, User.email, User.is_active, Wallet.id.label("wallet_id"))
+            .outerjoin(Wallet, Wallet.user_id == User.id)
+            .filter(User.id == user_id)
+        )
+        row = (await self.db.execute(query)).one_or_none()
+        if row is None:
+            return None
+
+        identity = UserIdentity(**row._mapping)
+        user_identity_cache.set(user_id, identity)
+        return identity
+
+    async def get_wallet(self, user_id: uuid.UUID, for_update: bool = False) -> Optional[Wallet]:
+        """
+        Get the user's wallet by its cached id, without loading the user.
+        :param user_id: ID of the user
+        :param for_update: Lock the wallet row (SELECT ... FOR UPDATE)
+        :return: Wallet or None if the user or wallet does not exist
+        """
+        identity = await self.get_identity(user_id)
+        if identity is None or identity.wallet_id is None:
+            return None
+        return await self.db.get(Wallet, identity.wallet_id, with_for_update=for_update, populate_existing=for_update)
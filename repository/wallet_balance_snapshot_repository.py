@@ -0,0 +1,192 @@
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import case, func, literal, or_, select, true
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from model.transaction import Transaction
+from model.wallet import Wallet
+from model.wallet_balance_snapshot import WalletBalanceSnapshot
+from utils.utils import BALANCE_SIGN, TransactionStatus, TransactionType, get_utc_now
+from .base_repository import BaseORM
+
+
+def balance_delta():
+    """
+    Signed effect of a transaction on the wallet balance (BALANCE_SIGN).
+    """
+    return case(
+        *[(Transaction.transaction_type == transaction_type, sign * Transaction.price_paid)
+          for transaction_type, sign in BALANCE_SIGN.items()],
+        else_=0
+    )
+
+
+def ledger_totals() -> List:
+    """
+    Aggregates folding completed transactions into the wallet totals,
+    labelled like the snapshot columns.
+    """
+    return [
+        func.coalesce(func.sum(balance_delta()), 0).label("balance"),
+        func.coalesce(func.sum(Transaction.credit_amount), 0).label("credit_balance"),
+        func.coalesce(
+            func.sum(Transaction.price_paid).filter(Transaction.transaction_type == TransactionType.PURCHASE), 0
+        ).label("total_invested"),
+    ]
+
+
+class WalletBalanceSnapshotRepository(BaseORM):
+    def __init__(self, session: AsyncSession):
+        super().__init__(session, WalletBalanceSnapshot)
+
+    async def latest_before(self, wallet_id: uuid.UUID, at: datetime) -> Optional[WalletBalanceSnapshot]:
+        """
+        Nearest snapshot of a wallet taken at or before a point in time.
+        :param wallet_id: UUID of the wallet
+        :param at: Point in time
+        :return: Snapshot or None when the wallet has none yet
+        """
+        query = (
+            select(self.model)
+            .where(self.model.wallet_id == wallet_id, self.model.snapshot_at <= at)
+            .order_by(self.model.snapshot_at.desc())
+            .limit(1)
+        )
+        result = await self.db.execute(query)
+        return result.scalars().first()
+
+    async def balance_as_of(self, wallet_id: uuid.UUID, at: datetime) -> Dict:
+        """
+        Wallet totals over completed transactions created before at.
+
+        Starts from the nearest earlier snapshot and replays only the
+        transactions after it, so the cost is bounded by the activity since
+        the last snapshot rather than by the wallet's history.
+        :param wallet_id: UUID of the wallet
+        :param at: Point in time (exclusive)
+        :return: balance, credit_balance, total_invested and the snapshot_at the replay started from
+        """
+        snapshot = await self.latest_before(wallet_id=wallet_id, at=at)
+
+        filters = [
+            Transaction.wallet_id == wallet_id,
+            Transaction.status == TransactionStatus.COMPLETED,
+            Transaction.created_at < at,
+        ]
+        if snapshot is not None:
+            filters.append(Transaction.created_at >= snapshot.snapshot_at)
+
+        delta = (await self.db.execute(select(*ledger_totals()).where(*filters))).one()
+
+        base = {
+            "balance": snapshot.balance if snapshot else Decimal(0),
+            "credit_balance": snapshot.credit_balance if snapshot else Decimal(0),
+            "total_invested": snapshot.total_invested if snapshot else Decimal(0),
+        }
+        totals = {key: value + getattr(delta, key) for key, value in base.items()}
+        totals["snapshot_at"] = snapshot.snapshot_at if snapshot else None
+        return totals
+
+    async def balance_deltas_by_bucket(
+        self,
+        wallet_id: uuid.UUID,
+        start: datetime,
+        end: datetime,
+        interval: timedelta
+    ) -> List[Tuple[int, Decimal]]:
+        """
+        Balance change per interval-sized bucket of [start, end).
+
+        Bucket k holds the transactions created in
+        [start + k * interval, start + (k + 1) * interval); the grouping
+        runs in the database so only one row per active bucket is returned.
+        :param wallet_id: UUID of the wallet
+        :param start: Start of the first bucket
+        :param end: Exclusive end of the range
+        :param interval: Bucket width
+        :return: (bucket index, balance change) pairs ordered by bucket
+        """
+        bucket = func.floor(
+            func.extract("epoch", Transaction.created_at - start) / interval.total_seconds()
+        ).label("bucket")
+        query = (
+            select(bucket, func.sum(balance_delta()))
+            .where(
+                Transaction.wallet_id == wallet_id,
+                Transaction.status == TransactionStatus.COMPLETED,
+                Transaction.created_at >= start,
+                Transaction.created_at < end,
+            )
+            .group_by(bucket)
+            .order_by(bucket)
+        )
+        result = await self.db.execute(query)
+        return [(int(index), amount) for index, amount in result.all()]
+
+    async def create_snapshots(self, cutoff: datetime) -> int:
+        """
+        Snapshot every wallet whose ledger changed since its last snapshot.
+
+        Each snapshot is the previous one plus the completed transactions in
+        [previous snapshot_at, cutoff), computed in a single INSERT ... SELECT.
+        Wallets without a snapshot yet are folded from their full history.
+        Reruns with the same cutoff are no-ops.
+        :param cutoff: snapshot_at of the new snapshots
+        :return: Number of snapshots written
+        """
+        snapshot = self.model
+        last = (
+            select(snapshot.snapshot_at, snapshot.balance, snapshot.credit_balance, snapshot.total_invested)
+            .where(snapshot.wallet_id == Wallet.id, snapshot.snapshot_at <= cutoff)
+            .order_by(snapshot.snapshot_at.desc())
+            .limit(1)
+            .lateral("last")
+        )
+        delta = (
+            select(*ledger_totals(), func.count().label("changes"))
+            .where(
+                Transaction.wallet_id == Wallet.id,
+                Transaction.status == TransactionStatus.COMPLETED,
+                Transaction.created_at < cutoff,
+                or_(last.c.snapshot_at.is_(None), Transaction.created_at >= last.c.snapshot_at),
+            )
+            .lateral("delta")
+        )
+
+        now = get_utc_now()
+        rows = (
+            select(
+                func.gen_random_uuid(),
+                Wallet.id,
+                literal(cutoff, snapshot.snapshot_at.type),
+                func.coalesce(last.c.balance, 0) + delta.c.balance,
+                func.coalesce(last.c.credit_balance, 0) + delta.c.credit_balance,
+                func.coalesce(last.c.total_invested, 0) + delta.c.total_invested,
+                literal(now, snapshot.created_at.type),
+                literal(now, snapshot.updated_at.type),
+                true(),
+            )
+            .select_from(Wallet)
+            .outerjoin(last, true())
+            .join(delta, true())
+            .where(or_(last.c.snapshot_at.is_(None), delta.c.changes > 0))
+        )
+        statement = insert(snapshot).from_select(
+            [
+                snapshot.id,
+                snapshot.wallet_id,
+                snapshot.snapshot_at,
+                snapshot.balance,
+                snapshot.credit_balance,
+                snapshot.total_invested,
+                snapshot.created_at,
+                snapshot.updated_at,
+                snapshot.is_active,
+            ],
+            rows,
+            include_defaults=False
+        ).on_conflict_do_nothing(constraint="uq_wallet_balance_snapshot_wallet_at")
+        result = await self.db.execute(statement)
+        return result.rowcount
@@ -1,7 +1,11 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from model.wallet import Wallet
+from config.settings import settings
+from utils.keyed_lock import KeyedLock
 from .base_repository import BaseORM
 
+# Per-process queue of the write requests of each wallet, keyed by wallet id
+wallet_locks = KeyedLock(name="wallet", enabled=settings.WALLET_LOCKS_ENABLED)
 
 
 
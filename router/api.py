@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from .v1 import user,wallet,project,transaction
+from .v1 import user,wallet,project,transaction,metrics
 
 router = APIRouter(
     prefix="/api/v1"
@@ -10,3 +10,4 @@ router.include_router(user.router)
 router.include_router(wallet.router)
 router.include_router(project.router)
 router.include_router(transaction.router)
+router.include_router(metrics.router)
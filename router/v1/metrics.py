@@ -0,0 +1,69 @@
+from typing import Any, Dict
+from fastapi import APIRouter, Depends
+from schema.response_schema import ResponseModel
+from config.admission_control import admission_controllers
+from config.concurrency_control import transaction_stats
+from config.invalidation_bus import invalidation_bus
+from config.token_denylist import token_denylist
+from config.pool_metrics import pool_stats
+from config.read_replicas import replica_router
+from service.idempotency_service import idempotency_service
+from service.purchase_batcher import purchase_batcher
+from utils.cache import cache_stats
+from utils.keyed_lock import keyed_lock_stats
+from utils.utils import get_api_key
+
+
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["Metrics"],
+    dependencies=[Depends(get_api_key)]
+)
+
+@router.get("/caches/",status_code=200, description="""
+    Counters of this process's in-memory caches.
+
+    Each cache reports its size, hits, misses, evictions and hit ratio.
+    Counters are per process; aggregate across workers when scraping.
+    """,response_model=ResponseModel[Dict[str, Any]])
+async def caches() -> ResponseModel[Dict[str, Any]]:
+    detail = cache_stats()
+    detail["token_denylist"] = token_denylist.stats()
+    detail["invalidation_bus"] = invalidation_bus.stats()
+    return ResponseModel[Dict[str, Any]](msg="Cache Metrics",detail=detail)
+
+@router.get("/pool/",status_code=200, description="""
+    Connection pool counters of this process, by pool.
+
+    Includes checked-out and overflow connections, checkout timeouts and
+    the time requests waited for a connection (average, p50, p99, max).
+    `read_routing` counts reads served by replicas and reads pinned to the
+    primary by read-your-writes. `transactions` counts committed write
+    transactions and those retried or given up after concurrency conflicts;
+    `purchase_batcher` counts batches and purchases applied by the batched
+    purchase engine; `locks` reports how long requests queued in process
+    for a wallet instead of waiting on its row lock with a connection;
+    `idempotency` counts keyed write requests executed, replayed, still in
+    progress after the wait, rejected for reusing a key, and answered 500
+    because their committed write's response was never recorded.
+    """,response_model=ResponseModel[Dict[str, Any]])
+async def pool() -> ResponseModel[Dict[str, Any]]:
+    detail = pool_stats()
+    detail["read_routing"] = replica_router.stats()
+    detail["transactions"] = transaction_stats.stats()
+    detail["purchase_batcher"] = purchase_batcher.stats()
+    detail["locks"] = keyed_lock_stats()
+    detail["idempotency"] = idempotency_service.stats()
+    return ResponseModel[Dict[str, Any]](msg="Pool Metrics",detail=detail)
+
+@router.get("/admission/",status_code=200, description="""
+    Admission control of this process per connection pool: in-flight
+    DB-bound requests, and requests admitted and shed per route class
+    (critical and standard on the transactional pool, export on the
+    reporting pool).
+    """,response_model=ResponseModel[Dict[str, Any]])
+async def admission() -> ResponseModel[Dict[str, Any]]:
+    detail = {controller.pool_name: controller.stats() for controller in admission_controllers}
+    return ResponseModel[Dict[str, Any]](msg="Admission Metrics",detail=detail)
+
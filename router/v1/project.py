@@ -1,13 +1,15 @@
 from typing import Annotated
 import uuid
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 from schema.response_schema import ResponseModel
 from schema.user_schema import *
-from config.database import get_db
+from config.database import get_db, get_reporting_db
 from sqlalchemy.ext.asyncio import AsyncSession
 from service.project_service import ProjectService
 from config.jwt_provider import get_current_user
 from schema.project_schema import *
+from utils.ledger_export import ExportFormat, EXPORT_MEDIA_TYPES
 
 
 
@@ -28,4 +30,48 @@ async def create_project(
         data = await service.create(data=data,user_id=user_id)
         return ResponseModel[ProjectResponse](msg="Project Created Successfully",detail=data)
     except Exception as e:
-        raise e
\ No newline at end of file
+        raise e
+
+@router.put("/{project_id}/inventory-shards/",status_code=200, description="""
+    Split the project's available credits across `count` inventory shards. Only the project owner may reshard it.
+
+    - Purchases of a sharded project take credits from one shard, so concurrent purchases lock different rows.
+    - `count` 1 moves every credit back onto the project row.
+    """,response_model=ResponseModel[ProjectResponse])
+async def set_project_inventory_shards(
+    project_id: uuid.UUID,
+    data: ProjectInventoryShardsRequest,
+    user_id: Annotated[uuid.UUID, Depends(get_current_user)],
+    session: AsyncSession = Depends(get_db),
+    ) -> ResponseModel[ProjectResponse]:
+
+    try:
+        service = ProjectService(session=session)
+        data = await service.set_inventory_shards(project_id=project_id, user_id=user_id, data=data)
+        return ResponseModel[ProjectResponse](msg="Project Inventory Resharded",detail=data)
+    except Exception as e:
+        raise e
+
+@router.get("/{project_id}/export/",status_code=200, description="""
+    Stream the full ledger of a project, oldest first. Only the project owner may export it.
+
+    - `format` is either `ndjson` (one JSON object per line) or `csv`.
+    - Amounts are exported as exact decimal strings.
+    """,response_class=StreamingResponse)
+async def export_project_ledger(
+    project_id: uuid.UUID,
+    user_id: Annotated[uuid.UUID, Depends(get_current_user)],
+    session: AsyncSession = Depends(get_reporting_db),
+    export_format: ExportFormat = Query(ExportFormat.NDJSON, alias="format"),
+    ) -> StreamingResponse:
+
+    try:
+        service = ProjectService(session=session)
+        stream = await service.export_ledger(project_id=project_id, user_id=user_id, export_format=export_format)
+        return StreamingResponse(
+            stream,
+            media_type=EXPORT_MEDIA_TYPES[export_format],
+            headers={"Content-Disposition": f'attachment; filename="project-{project_id}-ledger.{export_format.value}"'}
+        )
+    except Exception as e:
+        raise e
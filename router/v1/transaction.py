@@ -1,13 +1,20 @@
-from typing import Annotated
+from datetime import datetime
+from typing import Annotated, Optional
 import uuid
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from schema.response_schema import ResponseModel
 from schema.user_schema import *
-from config.database import get_db
+from config.database import get_db, get_reporting_db
+from config.read_replicas import get_read_db
 from sqlalchemy.ext.asyncio import AsyncSession
+from service.idempotency_service import IDEMPOTENCY_HEADER, idempotency_service, request_fingerprint
 from service.transaction_service import TransactionService
 from config.jwt_provider import get_current_user
 from schema.transaction_schema import *
+from schema.pagination_schema import CursorPaginatedResponse
+from utils.columnar_export import ColumnarFormat, COLUMNAR_MEDIA_TYPES, ensure_pyarrow
+from utils.utils import get_api_key
 
 
 
@@ -24,16 +31,80 @@ router = APIRouter(
     - `project_id` should be a valid UUID of the target project.
 
     This endpoint will return a transaction record after a successful purchase.
+
+    Send an `Idempotency-Key` header to make retries safe: a repeated request with
+    the same key returns the stored response (with `Idempotent-Replayed: true`)
+    instead of purchasing again.
     """,response_model=ResponseModel[TransactionResponse])
 async def purchase(
     data: PurchaseRequest,
     user_id: Annotated[uuid.UUID, Depends(get_current_user)],
     session: AsyncSession = Depends(get_db),
+    idempotency_key: Annotated[Optional[str], Header(alias=IDEMPOTENCY_HEADER, min_length=1, max_length=255)] = None,
     ) -> ResponseModel[TransactionResponse]:
 
     try:
         service = TransactionService(session=session)
-        return await service.purchase(data=data,user_id=user_id)
+        if idempotency_key is None:
+            return await service.purchase(data=data,user_id=user_id)
+        return await idempotency_service.run(
+            session=session,
+            user_id=user_id,
+            key=idempotency_key,
+            fingerprint=request_fingerprint("POST", "/transaction/purchase/", data),
+            execute=lambda: service.purchase(data=data,user_id=user_id),
+            status_code=status.HTTP_201_CREATED
+        )
   
     except Exception as e:
-        raise e
\ No newline at end of file
+        raise e
+
+@router.get("/",status_code=200, description="""
+    Search the current user's transactions, newest first.
+
+    - Filter by `transaction_type`, `status`, `project_id`, a `created_from` / `created_to`
+      date range and a `min_amount` / `max_amount` range on the price paid.
+    - Pass the `next_cursor` of a response as `cursor` to fetch the next page.
+    """,response_model=CursorPaginatedResponse[TransactionResponse])
+async def search_transactions(
+    params: Annotated[TransactionSearchRequest, Query()],
+    user_id: Annotated[uuid.UUID, Depends(get_current_user)],
+    session: AsyncSession = Depends(get_read_db),
+    ) -> CursorPaginatedResponse[TransactionResponse]:
+
+    try:
+        service = TransactionService(session=session)
+        return await service.search(user_id=user_id, params=params)
+
+    except Exception as e:
+        raise e
+
+@router.get("/export/",status_code=200,dependencies=[Depends(get_api_key)], description="""
+    Download the transaction ledger in a columnar format for analytics (requires the API key).
+
+    - `format` is either `parquet` or `arrow` (Arrow IPC stream).
+    - Amounts are fixed-point decimals, enums are dictionary-encoded and timestamps are UTC.
+    - Optionally restrict the export to a `created_from` / `created_to` range.
+    """,response_class=StreamingResponse)
+async def export_ledger_columnar(
+    session: AsyncSession = Depends(get_reporting_db),
+    columnar_format: ColumnarFormat = Query(ColumnarFormat.PARQUET, alias="format"),
+    created_from: Optional[datetime] = Query(None, description="Only transactions created at or after this time"),
+    created_to: Optional[datetime] = Query(None, description="Only transactions created before this time"),
+    ) -> StreamingResponse:
+
+    try:
+        ensure_pyarrow()
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(e))
+
+    try:
+        service = TransactionService(session=session)
+        filters = service.ledger_time_filters(created_from=created_from, created_to=created_to)
+        return StreamingResponse(
+            TransactionService.export_ledger_columnar(filters=filters, columnar_format=columnar_format),
+            media_type=COLUMNAR_MEDIA_TYPES[columnar_format],
+            headers={"Content-Disposition": f'attachment; filename="ledger.{columnar_format.value}"'}
+        )
+    except Exception as e:
+        raise e
@@ -1,5 +1,7 @@
 from fastapi import APIRouter, Depends, Security
 from fastapi.security import OAuth2PasswordRequestForm
+from config.jwt_provider import get_current_token
+from schema.jwt_schema import TokenData
 from utils.utils import get_api_key,api_key_header
 from schema.response_schema import ResponseModel
 from schema.user_schema import *
@@ -39,4 +41,17 @@ async def sign_in_user(
         return ResponseModel[dict](msg="Signed In Successfully",detail=data)
     except Exception as e:
         raise e
-        
\ No newline at end of file
+
+@router.post("/sign-out",status_code=200,response_model=ResponseModel[dict])
+async def sign_out_user(
+    token_data: TokenData = Depends(get_current_token),
+    session: AsyncSession = Depends(get_db),
+    ) -> ResponseModel[dict]:
+
+    try:
+        service = UserService(session=session)
+        data = await service.sign_out(token_data=token_data)
+        return ResponseModel[dict](msg="Signed Out Successfully",detail=data)
+    except Exception as e:
+        raise e
+
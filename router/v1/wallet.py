@@ -1,13 +1,19 @@
-from typing import Annotated
+from datetime import datetime
+from typing import Annotated, Optional
 import uuid
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Query, status
+from fastapi.responses import StreamingResponse
 from config.jwt_provider import get_current_user
 from schema.response_schema import ResponseModel
 from schema.wallelt_schema import *
-from config.database import get_db
+from config.database import get_db, get_reporting_db
+from config.read_replicas import get_read_db
 from sqlalchemy.ext.asyncio import AsyncSession
+from service.idempotency_service import IDEMPOTENCY_HEADER, idempotency_service, request_fingerprint
 from service.wallet_service import WalletService
 from schema.pagination_schema import PaginatedRequest,PaginatedResponse
+from utils.ledger_export import ExportFormat, EXPORT_MEDIA_TYPES
+from utils.utils import get_utc_now
 
 
 
@@ -22,32 +28,103 @@ async def sign_in_user(
     wallet_id: uuid.UUID,
     user_id: Annotated[uuid.UUID, Depends(get_current_user)],
     session: AsyncSession = Depends(get_db),
+    idempotency_key: Annotated[Optional[str], Header(alias=IDEMPOTENCY_HEADER, min_length=1, max_length=255)] = None,
     
     ) -> ResponseModel[WalletResponse]:
 
-    try:
+    async def top_up() -> ResponseModel[WalletResponse]:
         service = WalletService(session=session)
         wallet_data = await service.add_balance(wallet_id=wallet_id, data=data,user_id=user_id)
         print(wallet_data)
         return ResponseModel[WalletResponse](msg="Credited Successfully",detail=wallet_data)
+
+    try:
+        if idempotency_key is None:
+            return await top_up()
+        return await idempotency_service.run(
+            session=session,
+            user_id=user_id,
+            key=idempotency_key,
+            fingerprint=request_fingerprint("PUT", f"/wallet/topup/{wallet_id}/", data),
+            execute=top_up,
+            status_code=status.HTTP_201_CREATED
+        )
     except Exception as e:
         raise e
     
 @router.get("/",status_code=200,response_model=WalletResponse)
 async def get_wallet(
     user_id: Annotated[uuid.UUID, Depends(get_current_user)],
-    session: AsyncSession = Depends(get_db),
+    session: AsyncSession = Depends(get_read_db),
+    include_transactions: bool = Query(True, description="Embed the wallet's transactions of the last TRANSACTION_DEFAULT_WINDOW_DAYS days; pass false for the summary only"),
     
     ) -> WalletResponse:
 
     try:
         service = WalletService(session=session)
-        wallet_data = await service.get_by_user(user_id = user_id)
+        wallet_data = await service.get_by_user(user_id = user_id, include_transactions=include_transactions)
         return wallet_data
     except Exception as e:
         raise e
-    
-    
 
-    
-        
\ No newline at end of file
+@router.get("/export/",status_code=200, description="""
+    Stream the full ledger of the current user's wallet, oldest first.
+
+    - `format` is either `ndjson` (one JSON object per line) or `csv`.
+    - Amounts are exported as exact decimal strings.
+    """,response_class=StreamingResponse)
+async def export_wallet_ledger(
+    user_id: Annotated[uuid.UUID, Depends(get_current_user)],
+    session: AsyncSession = Depends(get_reporting_db),
+    export_format: ExportFormat = Query(ExportFormat.NDJSON, alias="format"),
+
+    ) -> StreamingResponse:
+
+    try:
+        service = WalletService(session=session)
+        stream = await service.export_ledger(user_id=user_id, export_format=export_format)
+        return StreamingResponse(
+            stream,
+            media_type=EXPORT_MEDIA_TYPES[export_format],
+            headers={"Content-Disposition": f'attachment; filename="wallet-ledger.{export_format.value}"'}
+        )
+    except Exception as e:
+        raise e
+
+@router.get("/balance/",status_code=200,response_model=WalletBalanceAsOfResponse, description="""
+    Wallet totals as of a point in time (transactions created before `as_of`).
+
+    Served from the nearest earlier balance snapshot plus the transactions
+    after it. Defaults to now.
+    """)
+async def get_wallet_balance_as_of(
+    user_id: Annotated[uuid.UUID, Depends(get_current_user)],
+    session: AsyncSession = Depends(get_read_db),
+    as_of: Optional[datetime] = Query(None, description="Point in time (defaults to now)"),
+
+    ) -> WalletBalanceAsOfResponse:
+
+    try:
+        service = WalletService(session=session)
+        return await service.balance_as_of(user_id=user_id, as_of=as_of or get_utc_now())
+    except Exception as e:
+        raise e
+
+@router.get("/balance/series/",status_code=200,response_model=WalletBalanceSeriesResponse, description="""
+    Balance of the current user's wallet sampled every `interval` from `start` to `end`.
+
+    - `interval` is an ISO 8601 duration (e.g. `PT1H`), one day by default.
+    - Each point is the balance over transactions created before its `at`.
+    """)
+async def get_wallet_balance_series(
+    params: Annotated[WalletBalanceSeriesRequest, Query()],
+    user_id: Annotated[uuid.UUID, Depends(get_current_user)],
+    session: AsyncSession = Depends(get_read_db),
+
+    ) -> WalletBalanceSeriesResponse:
+
+    try:
+        service = WalletService(session=session)
+        return await service.balance_series(user_id=user_id, params=params)
+    except Exception as e:
+        raise e
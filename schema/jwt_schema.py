@@ -1,4 +1,5 @@
 
+from datetime import datetime
 from typing import Optional
 import uuid
 from pydantic import BaseModel
@@ -9,4 +10,6 @@ __all__ = [
 ]
 
 class TokenData(BaseModel):
-    id: Optional[uuid.UUID] = None
\ No newline at end of file
+    id: Optional[uuid.UUID] = None
+    jti: Optional[str] = None
+    expires_at: Optional[datetime] = None
\ No newline at end of file
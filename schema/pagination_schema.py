@@ -5,7 +5,9 @@ from typing import Optional
 
 __all__ = [
     "PaginatedResponse",
-    "PaginatedRequest"    
+    "PaginatedRequest",
+    "CursorPaginatedResponse",
+    "CursorPaginatedRequest"
 ]
 
 T = TypeVar('T')
@@ -13,8 +15,9 @@ T = TypeVar('T')
 class PaginatedResponse(BaseModel, Generic[T]):
     page: int
     page_size: int
-    total_count: int
-    total_pages: int
+    total_count: Optional[int] = Field(None, description="Exact, estimated or cached total; null when no count was taken")
+    total_pages: Optional[int] = None
+    has_more: Optional[bool] = None
     data: List[T]
 
     class Config:
@@ -36,6 +39,30 @@ class PaginatedRequest(BaseModel):
     
 
 
+class CursorPaginatedResponse(BaseModel, Generic[T]):
+    page_size: int
+    has_more: bool
+    next_cursor: Optional[str] = None
+    data: List[T]
+
+    class Config:
+        from_attributes = True
+
+
+class CursorPaginatedRequest(BaseModel):
+    """
+    A Pydantic model for keyset (cursor) paginated requests.
+
+    Records are returned newest first; pass the `next_cursor` of a response
+    as `cursor` to fetch the following page.
+    """
+    cursor: Optional[str] = Field(None, description="Opaque cursor returned as next_cursor by the previous page")
+    limit: int = Field(10, ge=1, le=1000, description="Number of records to return (max 1000)")
+
+    class Config:
+        from_attributes = False
+
+
 # T = TypeVar("T", bound=BaseModel)
 
 # class ResponseModel(GenericModel, Generic[T]):
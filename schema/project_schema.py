@@ -3,15 +3,20 @@ import uuid
 from pydantic import BaseModel, Field, StrictFloat, confloat, constr, field_validator
 __all__ = [
     "ProjectCreateRequest",
+    "ProjectInventoryShardsRequest",
     "ProjectResponse",
 ]
 
+# Upper bound of a project's inventory shards
+MAX_INVENTORY_SHARDS = 64
+
 class Project(BaseModel):
     name: Annotated[str, constr(strip_whitespace=True, min_length=3, max_length=50)]
     description: Annotated[str, constr(strip_whitespace=True, min_length=3, max_length=500)]
     total_credits: Annotated[StrictFloat, Field(gt=0, description="Must be greater than 0")]
     available_credits: Annotated[StrictFloat, Field()]
     price_per_credit: Annotated[StrictFloat, Field(gt=0, description="Must be greater than 0")]
+    inventory_shard_count: Annotated[int, Field(ge=1, le=MAX_INVENTORY_SHARDS, description="Rows the available credits are split across; more than 1 spreads concurrent purchases")] = 1
     
 
     @field_validator('available_credits', mode='after')
@@ -24,6 +29,9 @@ class Project(BaseModel):
 class ProjectCreateRequest(Project):
     pass
 
+class ProjectInventoryShardsRequest(BaseModel):
+    count: Annotated[int, Field(ge=1, le=MAX_INVENTORY_SHARDS, description="New number of inventory shards; 1 disables sharding")]
+
 class ProjectResponse(Project):
     id: uuid.UUID
 
@@ -1,13 +1,16 @@
+from datetime import datetime
 from typing import Annotated, Optional
 import uuid
-from pydantic import BaseModel, Field, StrictFloat, confloat
+from pydantic import BaseModel, Field, StrictFloat, confloat, model_validator
+from schema.pagination_schema import CursorPaginatedRequest
 from utils.utils import TransactionType,TransactionStatus,PurchaseType
 
 __all__ = [
     "Transaction",
     "TransactionCreateRequest",
     "TransactionResponse",
-    "PurchaseRequest"
+    "PurchaseRequest",
+    "TransactionSearchRequest"
 ]
 
 class Transaction(BaseModel):
@@ -46,3 +49,22 @@ class TransactionResponse(Transaction):
         from_attributes = True
 
 
+class TransactionSearchRequest(CursorPaginatedRequest):
+    """
+    Filters of the transaction ledger search, cursor paginated newest first.
+    """
+    transaction_type: Optional[TransactionType] = None
+    status: Optional[TransactionStatus] = None
+    project_id: Optional[uuid.UUID] = None
+    created_from: Optional[datetime] = Field(None, description="Only transactions created at or after this time (defaults to TRANSACTION_DEFAULT_WINDOW_DAYS before created_to or now)")
+    created_to: Optional[datetime] = Field(None, description="Only transactions created before this time")
+    min_amount: Optional[float] = Field(None, ge=0, description="Minimum price paid (USD)")
+    max_amount: Optional[float] = Field(None, ge=0, description="Maximum price paid (USD)")
+
+    @model_validator(mode='after')
+    def check_ranges(self):
+        if self.created_from and self.created_to and self.created_from > self.created_to:
+            raise ValueError('created_from must not be after created_to')
+        if self.min_amount is not None and self.max_amount is not None and self.min_amount > self.max_amount:
+            raise ValueError('min_amount must not exceed max_amount')
+        return self
@@ -1,12 +1,17 @@
+from datetime import datetime, timedelta
 from typing import List, Optional
 import uuid
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from schema.transaction_schema import TransactionResponse
 
 __all__ = [
     "WalletCreateRequest",
     "WalletResponse",
-    "WalletUpdateRequest"
+    "WalletUpdateRequest",
+    "WalletBalanceAsOfResponse",
+    "WalletBalanceSeriesRequest",
+    "WalletBalancePoint",
+    "WalletBalanceSeriesResponse"
 ]
 
 class WalletCreateRequest(BaseModel):
@@ -23,13 +28,50 @@ class WalletResponse(BaseModel):
     id: uuid.UUID
     user_id: uuid.UUID
     balance: float
-     # Add computed fields
+     # Persisted totals (see Wallet.record_transaction)
     credit_balance: Optional[float] = Field(default=None, description="Balance calculated from completed transactions")
     total_invested: Optional[float] = Field(default=None, description="Total USD invested from purchases")
     transactions: Optional[List[TransactionResponse]] = None
 
     class Config:
-        from_attributes = True 
+        from_attributes = True
 
 
-    
+class WalletBalanceAsOfResponse(BaseModel):
+
+    wallet_id: uuid.UUID
+    as_of: datetime
+    balance: float
+    credit_balance: float
+    total_invested: float
+    snapshot_at: Optional[datetime] = Field(default=None, description="Snapshot the replay started from (none when replayed from the start)")
+
+
+class WalletBalanceSeriesRequest(BaseModel):
+    """
+    Balance time series sampled every interval from start to end.
+    """
+    start: datetime
+    end: datetime
+    interval: timedelta = Field(timedelta(days=1), description="Sampling interval as an ISO 8601 duration (e.g. PT1H, P1D)")
+
+    @model_validator(mode='after')
+    def check_range(self):
+        if self.start >= self.end:
+            raise ValueError('start must be before end')
+        if self.interval.total_seconds() <= 0:
+            raise ValueError('interval must be positive')
+        return self
+
+
+class WalletBalancePoint(BaseModel):
+
+    at: datetime
+    balance: float
+
+
+class WalletBalanceSeriesResponse(BaseModel):
+
+    wallet_id: uuid.UUID
+    interval: timedelta
+    points: List[WalletBalancePoint]
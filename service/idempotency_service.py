@@ -0,0 +1,238 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.database import AsyncSessionLocal
+from config.settings import settings
+from repository.idempotency_key_repository import IdempotencyKeyRepository, PENDING_KEY, mark_on_commit
+from utils.keyed_lock import KeyedLock
+from utils.utils import get_utc_now
+
+logger = logging.getLogger(__name__)
+
+# Header clients send to make a write request safe to retry
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+# Responses not stored for replay: the request may succeed when retried
+TRANSIENT_STATUSES = {status.HTTP_409_CONFLICT, status.HTTP_429_TOO_MANY_REQUESTS}
+
+
+def request_fingerprint(method: str, path: str, body: BaseModel) -> str:
+    """
+    SHA-256 of a request's method, path and body, to detect a key reused
+    for a different request.
+    """
+    payload = json.dumps(
+        {"method": method, "path": path, "body": body.model_dump(mode="json")},
+        sort_keys=True,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class IdempotencyService:
+    """
+    Runs a write request at most once per (user, Idempotency-Key).
+
+    The first request claims the key in the idempotency_key table for a
+    short lease, runs, and stores its response; retries replay the stored
+    response without running the write path again. Concurrent duplicates
+    wait for the first: in memory when they reach the same worker,
+    otherwise by polling the record until its response is stored (or
+    answering 409 after wait_seconds). A key reused with a different
+    request is rejected.
+
+    The write path marks the key committed in the write's own transaction
+    (mark_on_commit), so whether the write happened is known even when the
+    request fails afterwards or loses its connection during COMMIT. A key
+    whose write committed is never run again: a failure after the commit is
+    stored and replayed like any response. Only a key whose write is known
+    not to have committed is released, and only for server errors and
+    transient conflicts; errors the client caused (4xx) are stored. A claim
+    abandoned mid-flight is taken over by a retry once its lease expires.
+    Key records are read and written with their own sessions, outside the
+    request's transaction.
+    """
+
+    def __init__(
+            self,
+            sessionmaker,
+            ttl_seconds: float,
+            lease_seconds: float,
+            wait_seconds: float,
+            poll_ms: float,
+            name: Optional[str] = None
+    ):
+        """
+        :param name: Registers the service's lock registry in KEYED_LOCKS under this name
+        """
+        self.sessionmaker = sessionmaker
+        self.ttl_seconds = ttl_seconds
+        self.lease_seconds = lease_seconds
+        self.wait_seconds = wait_seconds
+        self.poll_ms = poll_ms
+        self.locks = KeyedLock(name=name)
+        self.executed = 0
+        self.replayed = 0
+        self.in_progress = 0
+        self.mismatched = 0
+        self.unrecorded = 0
+
+    async def run(
+            self,
+            session: AsyncSession,
+            user_id: uuid.UUID,
+            key: str,
+            fingerprint: str,
+            execute: Callable[[], Awaitable[Any]],
+            status_code: int
+    ) -> Any:
+        """
+        Run execute once for this key, or replay the response of the run that did.
+        :param session: Request session the write path commits with
+        :param user_id: User that sent the request
+        :param key: Idempotency-Key header
+        :param fingerprint: request_fingerprint of the request
+        :param execute: Runs the write path and returns the response model
+        :param status_code: Status of a successful response
+        :return: The response model of this run, or a JSONResponse replaying the stored one
+        """
+        # Duplicates on this worker queue here instead of polling the table
+        async with self.locks.hold((user_id, key)):
+            deadline = time.monotonic() + self.wait_seconds
+            while True:
+                record_id = await self._claim(user_id, key, fingerprint)
+                if record_id is not None:
+                    return await self._execute(session, record_id, execute, status_code)
+
+                record = await self._get(user_id, key)
+                if record is None:
+                    # Released by a failed first run; claim it again
+                    continue
+                if record.fingerprint != fingerprint:
+                    self.mismatched += 1
+                    raise HTTPException(
+                        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                        detail=f"{IDEMPOTENCY_HEADER} was already used for a different request"
+                    )
+                if record.status_code is not None:
+                    self.replayed += 1
+                    return JSONResponse(
+                        status_code=record.status_code,
+                        content=record.response,
+                        headers={"Idempotent-Replayed": "true"}
+                    )
+                if record.committed_at is not None and \
+                        record.committed_at <= get_utc_now() - timedelta(seconds=self.lease_seconds):
+                    # The write committed but its request died before storing the response
+                    self.unrecorded += 1
+                    raise HTTPException(
+                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                        detail=f"The request with this {IDEMPOTENCY_HEADER} was applied, but its response was not recorded"
+                    )
+                if time.monotonic() >= deadline:
+                    self.in_progress += 1
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail=f"A request with this {IDEMPOTENCY_HEADER} is still in progress",
+                        headers={"Retry-After": "1"}
+                    )
+                await asyncio.sleep(self.poll_ms / 1000)
+
+    async def _execute(
+            self,
+            session: AsyncSession,
+            record_id: uuid.UUID,
+            execute: Callable[[], Awaitable[Any]],
+            status_code: int
+    ) -> Any:
+        self.executed += 1
+        mark_on_commit(session, [record_id])
+        try:
+            result = await execute()
+        except Exception as e:
+            # Cancellation is not handled here: the write may still commit (a
+            # queued batched purchase), so the claim is left to be marked
+            # committed or taken over once its lease expires
+            if isinstance(e, HTTPException):
+                failed_status, detail = e.status_code, e.detail
+            else:
+                failed_status, detail = status.HTTP_500_INTERNAL_SERVER_ERROR, "Internal Server Error"
+            if await self._is_committed(record_id):
+                # The write happened: a retry must not run it again
+                await self._complete(record_id, failed_status, {"detail": detail})
+            elif failed_status >= 500 or failed_status in TRANSIENT_STATUSES:
+                await self._release(record_id)
+            else:
+                await self._complete(record_id, failed_status, {"detail": detail})
+            raise
+        finally:
+            session.info.pop(PENDING_KEY, None)
+        await self._complete(record_id, status_code, jsonable_encoder(result))
+        return result
+
+    async def _claim(self, user_id: uuid.UUID, key: str, fingerprint: str) -> Optional[uuid.UUID]:
+        async with self.sessionmaker() as session:
+            async with session.begin():
+                return await IdempotencyKeyRepository(session=session).claim(
+                    user_id=user_id,
+                    key=key,
+                    fingerprint=fingerprint,
+                    lease_expires_at=get_utc_now() + timedelta(seconds=self.lease_seconds)
+                )
+
+    async def _get(self, user_id: uuid.UUID, key: str):
+        async with self.sessionmaker() as session:
+            return await IdempotencyKeyRepository(session=session).get(user_id=user_id, key=key)
+
+    async def _is_committed(self, record_id: uuid.UUID) -> bool:
+        async with self.sessionmaker() as session:
+            return await IdempotencyKeyRepository(session=session).is_committed(record_id)
+
+    async def _complete(self, record_id: uuid.UUID, status_code: int, response: Any) -> None:
+        try:
+            async with self.sessionmaker() as session:
+                async with session.begin():
+                    await IdempotencyKeyRepository(session=session).complete(
+                        record_id,
+                        status_code,
+                        response,
+                        expires_at=get_utc_now() + timedelta(seconds=self.ttl_seconds)
+                    )
+        except Exception:
+            # Retries wait out the lease, then get a 500 if the write committed
+            # or take the key over if it did not
+            logger.exception("Could not store the response of idempotency key %s", record_id)
+
+    async def _release(self, record_id: uuid.UUID) -> None:
+        async with self.sessionmaker() as session:
+            async with session.begin():
+                await IdempotencyKeyRepository(session=session).release(record_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "executed": self.executed,
+            "replayed": self.replayed,
+            "in_progress": self.in_progress,
+            "mismatched": self.mismatched,
+            "unrecorded": self.unrecorded,
+        }
+
+
+idempotency_service = IdempotencyService(
+    sessionmaker=AsyncSessionLocal,
+    ttl_seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS,
+    lease_seconds=settings.IDEMPOTENCY_LEASE_SECONDS,
+    wait_seconds=settings.IDEMPOTENCY_WAIT_SECONDS,
+    poll_ms=settings.IDEMPOTENCY_POLL_MS,
+    name="idempotency"
+)
@@ -1,16 +1,23 @@
+from decimal import Decimal
+from typing import AsyncIterator
 import uuid
-from repository.project_repository import ProjectRepository
+from model.project_inventory_shard import ProjectInventoryShard
+from repository.project_repository import ProjectRepository, split_credits
+from repository.transaction_repository import TransactionRepository
 from schema.project_schema import *
 from sqlalchemy.exc import IntegrityError
 from utils.utils import UNIQUE_CONSTRAINT_MESSAGES
 from fastapi import HTTPException, status
 from schema.response_schema import ResponseModel
+from service.transaction_service import TransactionService
+from utils.ledger_export import ExportFormat
 
 
 class ProjectService:
     def __init__(self, session):
         self.session = session
         self.repository = ProjectRepository(session=session)
+        self.transaction_repository = TransactionRepository(session=session)
 
     async def create(
             self,
@@ -29,12 +36,21 @@ class ProjectService:
             # Dump the data to a dictionary and add the created_by field
             data_dump = data.model_dump()
             data_dump["created_by"] = user_id
+
+            # Split a sharded project's credits across its inventory shards
+            if data.inventory_shard_count > 1:
+                shares = split_credits(Decimal(str(data.available_credits)), data.inventory_shard_count)
+                data_dump["available_credits"] = Decimal('0.00')
+                data_dump["inventory_shards"] = [
+                    ProjectInventoryShard(shard_no=shard_no, available_credits=credits, created_by=user_id)
+                    for shard_no, credits in enumerate(shares)
+                ]
             
             # Create a new project record with the updated data
             project = await self.repository.create(obj_data=data_dump)
             
             # Return the created project details in a ProjectResponse object
-            return ProjectResponse.model_validate(project)
+            return self.to_response(project)
         except IntegrityError as e:
             # Rollback the current transaction to prevent partial writes
             await self.session.rollback()
@@ -56,4 +72,78 @@ class ProjectService:
             )
         except Exception as e:
             raise e
-    
\ No newline at end of file
+
+    async def set_inventory_shards(
+            self,
+            project_id: uuid.UUID,
+            user_id: uuid.UUID,
+            data: ProjectInventoryShardsRequest
+    ) -> ProjectResponse:
+        """
+        Re-split a project's available credits across a new number of inventory shards.
+
+        :param project_id: UUID of the project
+        :param user_id: UUID of the requesting user, who must have created the project
+        :param data: ProjectInventoryShardsRequest with the new shard count
+        :return: ProjectResponse object with the resharded project
+        """
+        async with self.session.begin():
+            project = await self.repository.get_by_id(obj_id=project_id)
+
+            if not project:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+
+            if project.created_by != user_id:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="Only the project owner can reshard its inventory"
+                )
+
+            await self.repository.set_inventory_shards(
+                project_id=project_id,
+                count=data.count,
+                updated_by=user_id
+            )
+
+        # Load the credits and shards as resharded
+        await self.session.refresh(project)
+        return self.to_response(project)
+
+    @staticmethod
+    def to_response(project) -> ProjectResponse:
+        """
+        ProjectResponse of a project, with its available credits summed over its inventory shards.
+        """
+        return ProjectResponse.model_validate(project).model_copy(
+            update={"available_credits": float(project.total_available_credits)}
+        )
+
+    async def export_ledger(
+            self,
+            project_id: uuid.UUID,
+            user_id: uuid.UUID,
+            export_format: ExportFormat
+    ) -> AsyncIterator[bytes]:
+        """
+        Export the full ledger of a project.
+
+        :param project_id: UUID of the project
+        :param user_id: UUID of the requesting user, who must have created the project
+        :param export_format: ExportFormat of the output
+        :return: Async iterator of the encoded ledger
+        """
+        project = await self.repository.get_by_id(obj_id=project_id)
+
+        if not project:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+
+        if project.created_by != user_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only the project owner can export its ledger"
+            )
+
+        return TransactionService.export_ledger(
+            filters=[self.transaction_repository.model.project_id == project_id],
+            export_format=export_format
+        )
@@ -0,0 +1,159 @@
+import asyncio
+import uuid
+from decimal import Decimal
+from typing import Any, Dict, FrozenSet, List
+from fastapi import HTTPException, status
+from sqlalchemy.engine import Row
+from config.concurrency_control import ConcurrencyStrategy, transaction_attempts
+from config.database import AsyncSessionLocal
+from config.settings import settings
+from repository.project_repository import ProjectCatalogEntry, mark_sold_out
+from repository.transaction_repository import (
+    IDEMPOTENCY_KEY_TAKEN_OVER,
+    INSUFFICIENT_CREDITS,
+    INSUFFICIENT_FUNDS,
+    PROJECT_NOT_FOUND,
+    WALLET_NOT_FOUND,
+    BatchPurchase,
+    TransactionRepository,
+)
+from utils.utils import PurchaseType
+
+# Response of each rejection, as the single-purchase paths report it
+REJECTIONS = {
+    PROJECT_NOT_FOUND: (status.HTTP_404_NOT_FOUND, "Project not found"),
+    WALLET_NOT_FOUND: (status.HTTP_404_NOT_FOUND, "User not found"),
+    INSUFFICIENT_CREDITS: (status.HTTP_400_BAD_REQUEST, "Insufficient project credits"),
+    INSUFFICIENT_FUNDS: (status.HTTP_400_BAD_REQUEST, "Insufficient wallet funds"),
+    IDEMPOTENCY_KEY_TAKEN_OVER: (status.HTTP_409_CONFLICT, "The Idempotency-Key of this purchase was taken over by a retry"),
+}
+
+
+class PendingPurchase:
+    def __init__(self, purchase: BatchPurchase, future: asyncio.Future):
+        self.purchase = purchase
+        self.future = future
+
+
+class PurchaseBatcher:
+    """
+    Coalesces concurrent purchases of the same project into one transaction.
+
+    The first purchase of a project opens a batch that collects purchases
+    for window_ms; the batch is then applied with one project decrement,
+    one multi-row wallet debit and one bulk transaction insert, so a hot
+    project's row is locked once per batch instead of once per purchase.
+    Each caller is resolved with its own transaction or rejection.
+
+    One batch per project is applied at a time; purchases arriving while
+    it runs are collected into the next one. Batching is per process.
+    """
+
+    def __init__(self, sessionmaker, window_ms: float, max_size: int):
+        self.sessionmaker = sessionmaker
+        self.window_ms = window_ms
+        self.max_size = max_size
+        self._pending: Dict[uuid.UUID, List[PendingPurchase]] = {}
+        self._drains: Dict[uuid.UUID, asyncio.Task] = {}
+        self.batches = 0
+        self.purchases = 0
+        self.largest_batch = 0
+        self.failed_batches = 0
+
+    async def submit(
+            self,
+            user_id: uuid.UUID,
+            project_id: uuid.UUID,
+            amount: Decimal,
+            purchase_type: PurchaseType,
+            idempotency_keys: FrozenSet[uuid.UUID] = frozenset()
+    ) -> Row:
+        """
+        Queue a purchase and wait for its batch to commit.
+        :param idempotency_keys: Claimed idempotency keys to mark committed if the purchase is applied
+        :return: The inserted transaction row
+        :raises HTTPException: When the purchase was rejected or its batch failed
+        """
+        future = asyncio.get_running_loop().create_future()
+        purchase = BatchPurchase(
+            user_id=user_id,
+            amount=amount,
+            purchase_type=purchase_type,
+            idempotency_keys=idempotency_keys
+        )
+        self._pending.setdefault(project_id, []).append(PendingPurchase(purchase, future))
+        if project_id not in self._drains:
+            self._drains[project_id] = asyncio.create_task(self._drain(project_id))
+        return await future
+
+    async def _drain(self, project_id: uuid.UUID) -> None:
+        try:
+            while self._pending.get(project_id):
+                await asyncio.sleep(self.window_ms / 1000)
+                queue = self._pending[project_id]
+                batch, self._pending[project_id] = queue[:self.max_size], queue[self.max_size:]
+                await self._apply(project_id, batch)
+        finally:
+            # Only left non-empty when the drain is cancelled (shutdown)
+            for pending in self._pending.pop(project_id, ()):
+                pending.future.cancel()
+            self._drains.pop(project_id, None)
+
+    async def _apply(self, project_id: uuid.UUID, batch: List[PendingPurchase]) -> None:
+        try:
+            async with self.sessionmaker() as session:
+                # The wallets and the project are locked, so only deadlocks are retried
+                async for attempt in transaction_attempts(session, strategy=ConcurrencyStrategy.PESSIMISTIC):
+                    async with attempt:
+                        result = await TransactionRepository(session).purchase_batch(
+                            project_id=project_id,
+                            purchases=[pending.purchase for pending in batch]
+                        )
+        except Exception as e:
+            self.failed_batches += 1
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.purchases += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+
+        if result.remaining_credits is not None and result.remaining_credits <= 0:
+            mark_sold_out(ProjectCatalogEntry(
+                id=project_id,
+                name=result.project_name,
+                price_per_credit=result.price_per_credit,
+                is_active=True,
+                sold_out=True
+            ))
+
+        for pending, transaction, rejection in zip(batch, result.transactions, result.rejections):
+            if pending.future.done():
+                # The caller went away; its purchase was applied regardless
+                continue
+            if rejection is not None:
+                status_code, detail = REJECTIONS[rejection]
+                pending.future.set_exception(HTTPException(status_code=status_code, detail=detail))
+            else:
+                pending.future.set_result(transaction)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "window_ms": self.window_ms,
+            "max_size": self.max_size,
+            "batches": self.batches,
+            "purchases": self.purchases,
+            "largest_batch": self.largest_batch,
+            "average_batch": round(self.purchases / self.batches, 2) if self.batches else None,
+            "failed_batches": self.failed_batches,
+            "queued": sum(len(queue) for queue in self._pending.values()),
+        }
+
+
+purchase_batcher = PurchaseBatcher(
+    sessionmaker=AsyncSessionLocal,
+    window_ms=settings.PURCHASE_BATCH_WINDOW_MS,
+    max_size=settings.PURCHASE_BATCH_MAX_SIZE
+)
@@ -1,16 +1,27 @@
 
 from decimal import Decimal
 from math import floor
+from typing import Any, AsyncIterator, List, Optional
 import uuid
 from fastapi import status
 from utils.utils import PurchaseType,TransactionType,TransactionStatus
 from fastapi.exceptions import HTTPException
+from config.settings import settings
+from config.database import AsyncSessionLocal, ReportingSessionLocal
+from config.concurrency_control import transaction_attempts
+from config.read_replicas import replica_router
 from schema.response_schema import ResponseModel
+from schema.pagination_schema import CursorPaginatedResponse
 from repository.transaction_repository import TransactionRepository
-from repository.project_repository import ProjectRepository
+from repository.idempotency_key_repository import take_pending
+from repository.project_repository import ProjectCatalogEntry, ProjectRepository, mark_sold_out
 from repository.user_repository import UserRepository
+from repository.wallet_repository import wallet_locks
+from service.purchase_batcher import purchase_batcher
 from sqlalchemy.ext.asyncio import AsyncSession
 from schema.transaction_schema import *
+from utils.ledger_export import ExportFormat, LEDGER_COLUMNS, encode_chunk, encode_header
+from utils.columnar_export import ColumnarFormat, encode_columnar
 class TransactionService:
     def __init__(self, session: AsyncSession):
         self.session = session        
@@ -26,139 +37,440 @@ class TransactionService:
         """
         Method to purchase credits from a project
         """
+        engine = settings.PURCHASE_ENGINE
+        # Sharded inventories are only reserved from by the ORM path
+        if engine != "orm" and await self.is_sharded(data.project_id):
+            engine = "orm"
+
+        # Batched purchases hold no connection while they queue
+        if engine == "batched":
+            return await self.purchase_batched(user_id=user_id, data=data)
+
+        # Purchases and top-ups of the same wallet queue here rather than
+        # on the wallet row lock, holding a pool connection
+        async with wallet_locks.hold(await self.wallet_lock_key(user_id)):
+            if engine == "atomic":
+                return await self.purchase_atomic(user_id=user_id, data=data)
+            return await self.purchase_orm(user_id=user_id, data=data)
+
+    async def wallet_lock_key(self, user_id: uuid.UUID) -> uuid.UUID:
+        """
+        Key of the user's wallet in wallet_locks: the wallet id, or the user
+        id for a user without a wallet (whose purchase fails anyway).
+        """
+        # Read outside the request session, which the purchase engines begin themselves
+        async with AsyncSessionLocal() as session:
+            identity = await UserRepository(session=session).get_identity(user_id)
+        return identity.wallet_id if identity is not None and identity.wallet_id else user_id
+
+    async def purchase_orm(
+            self,
+            user_id: uuid.UUID,
+            data: PurchaseRequest
+    ) -> ResponseModel[TransactionResponse]:
+        """
+        Method to purchase credits from a project by loading and mutating its rows
+        """
         try:
             # Get the user and project
-            async with self.session.begin():
-                # Get the user
-                user = await self.user_repository.get_by_id(
-                    obj_id=user_id,
-                    relationships=["wallet"]
-                )
-
-                if not user:
-                    # Raise an error
-                    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+            # Re-run the whole transaction if it loses to a concurrent writer
+            async for attempt in transaction_attempts(self.session):
+                async with attempt:
+                    # Get the wallet by the cached wallet id; the user row is not needed
+                    wallet = await self.user_repository.get_wallet(user_id, for_update=attempt.lock_rows)
 
-                # Get the project
-                project = await self.project_repository.get_by_id(obj_id=data.project_id)
+                    if not wallet:
+                        # Raise an error
+                        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
-                if not project:
-                    # Raise an error
-                    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+                    # Get the project's price from the catalog; missing, inactive
+                    # and sold-out projects are rejected before any write
+                    project = await self.project_repository.get_catalog_entry(data.project_id)
+                    self.check_project_available(project)
 
-                # Initialize variables
-                requested_credit = None
-                requested_bugdet = None
-                purchase_type = None
-                data.amount = Decimal(data.amount)
+                    # Initialize variables
+                    requested_credit = None
+                    requested_bugdet = None
+                    purchase_type = None
+                    data.amount = Decimal(data.amount)
                 
-                # Handle purchase by credit
-                if data.purchase_type.value == PurchaseType.BY_CREDIT.value:
-                    # Calculate the number of credits to be purchased
-                    credits = data.amount
+                    # Handle purchase by credit
+                    if data.purchase_type.value == PurchaseType.BY_CREDIT.value:
+                        # Calculate the number of credits to be purchased
+                        credits = data.amount
                     
-                    # Calculate the total cost
-                    total_cost = credits * project.price_per_credit
+                        # Calculate the total cost
+                        total_cost = credits * project.price_per_credit
                     
-                    # Set the purchase type
-                    requested_credit = credits
-                    purchase_type = PurchaseType.BY_CREDIT
+                        # Set the purchase type
+                        requested_credit = credits
+                        purchase_type = PurchaseType.BY_CREDIT
                     
-                # Handle purchase by budget
-                if data.purchase_type.value == PurchaseType.BY_BUDGET.value:
+                    # Handle purchase by budget
+                    if data.purchase_type.value == PurchaseType.BY_BUDGET.value:
                     
-                    # Calculate credits in all cases
-                    credits = data.amount / project.price_per_credit
+                        # Calculate credits in all cases
+                        credits = data.amount / project.price_per_credit
 
-                    # If not cleanly divisible, floor it to 2 decimal places
-                    if data.amount % project.price_per_credit != 0:
-                        credits = Decimal(floor(credits * 100) / 100)
+                        # If not cleanly divisible, floor it to 2 decimal places
+                        if data.amount % project.price_per_credit != 0:
+                            credits = Decimal(floor(credits * 100) / 100)
 
-                    # Calculate actual cost
-                    actual_cost = credits * project.price_per_credit
+                        # Calculate actual cost
+                        actual_cost = credits * project.price_per_credit
 
-                    # Calculate refund (optional, if needed)
-                    refund = data.amount - actual_cost
+                        # Calculate refund (optional, if needed)
+                        refund = data.amount - actual_cost
 
-                    # Set values
-                    total_cost = actual_cost
-                    requested_bugdet = total_cost
-                    purchase_type = PurchaseType.BY_BUDGET
+                        # Set values
+                        total_cost = actual_cost
+                        requested_bugdet = total_cost
+                        purchase_type = PurchaseType.BY_BUDGET
 
-                
-                # Check if the project has enough credits
-                sufficient_credits = await project.has_sufficient_credits(
-                    amount= Decimal(credits)
-                )    
-                if sufficient_credits == False:
+
+                    # Check if the wallet has enough balance
+                    sufficient_balance = await wallet.has_sufficient_balance(
+                        amount= Decimal(total_cost)
+                    )
+                    if  sufficient_balance == False:
+                        raise HTTPException(
+                            status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Insufficient wallet funds"
+                        )
+
+                    # Deduct credits from the wallet
+                    await wallet.deduct_credits(
+                        self.session,
+                        Decimal(total_cost),
+                        user_id,
+                        False
+                    )
+
+                    # Keep the wallet's persisted totals in step with the ledger
+                    await wallet.record_transaction(
+                        TransactionType.PURCHASE,
+                        Decimal(credits),
+                        Decimal(total_cost)
+                    )
+
+                    # Write the wallet before touching the project (lock order)
+                    await self.session.flush()
+
+                    # Reserve credits for the project; the guarded update is the
+                    # authoritative availability check
+                    remaining_credits = await self.project_repository.reserve_credits(
+                        project_id=project.id,
+                        amount=Decimal(credits),
+                        updated_by=user_id,
+                        shards=project.inventory_shard_count
+                    )
+                    if remaining_credits is None:
+                        raise HTTPException(
+                            status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Insufficient project credits"
+                        )
+
+                    # Create the transaction
+                    transaction_data = TransactionCreateRequest(
+                        user_id = user_id,
+                        project_id=project.id,
+                        wallet_id=wallet.id,
+                        transaction_type = TransactionType.PURCHASE,
+                        purchase_type= purchase_type,
+                        credit_amount = credits,
+                        price_paid = total_cost,
+                        requested_credits=requested_credit,
+                        requested_budget=requested_bugdet,
+                        price_per_credit = project.price_per_credit,
+                        status = TransactionStatus.COMPLETED
+                    )
+
+                    transaction = await self.repository.create(
+                        obj_data=transaction_data,
+                        commit=False
+                    )
+
+                    # Commit the transaction
+                    await self.session.flush()
+
+                    response = ResponseModel[TransactionResponse](
+                            msg="Purchased Successfully",
+                            detail=TransactionResponse.model_validate(transaction)
+                        )
+
+            if remaining_credits <= 0:
+                mark_sold_out(project)
+            await replica_router.record_write(self.session, user_id)
+            return response
+        except HTTPException as e :
+            # Re-raise HTTP exceptions as-is
+            raise e
+        except Exception as e:
+            # Log the exception if you have logging set up
+            # logger.error(f"Unexpected error in purchase: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="An unexpected error occurred during purchase"
+            )
+
+    async def is_sharded(self, project_id: uuid.UUID) -> bool:
+        """
+        Whether the project's inventory is split across shards.
+        """
+        project = self.project_repository.cached_entry(project_id)
+        if project is None:
+            # Read outside the request session, which the purchase engines begin themselves
+            async with AsyncSessionLocal() as session:
+                project = await ProjectRepository(session=session).get_catalog_entry(project_id)
+        return project is not None and project.sharded
+
+    @staticmethod
+    def check_project_available(project: Optional[ProjectCatalogEntry]) -> None:
+        """
+        Raise when a catalog entry shows the project cannot be purchased from.
+        """
+        if not project or not project.is_active:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+
+        if project.sold_out:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Insufficient project credits"
+            )
+
+    async def purchase_atomic(
+            self,
+            user_id: uuid.UUID,
+            data: PurchaseRequest
+    ) -> ResponseModel[TransactionResponse]:
+        """
+        Method to purchase credits from a project in a single round trip.
+
+        The wallet debit, the credit reservation and the transaction insert
+        are issued as one guarded statement; insufficient funds or credits
+        are reported from the affected-row counts and the whole transaction
+        is rolled back.
+        """
+        # Reject projects already known to be unavailable without a round trip
+        cached_project = self.project_repository.cached_entry(data.project_id)
+        if cached_project is not None:
+            self.check_project_available(cached_project)
+
+        try:
+            async with self.session.begin():
+                result = await self.repository.purchase_atomic(
+                    user_id=user_id,
+                    project_id=data.project_id,
+                    amount=Decimal(str(data.amount)),
+                    purchase_type=data.purchase_type
+                )
+
+                if not result.project_found:
+                    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+
+                if not result.wallet_found:
+                    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+                # A guard that did not match means nothing was written that
+                # should be kept; raising rolls back the partial updates
+                if not result.credits_available:
                     raise HTTPException(
                         status_code=status.HTTP_400_BAD_REQUEST,
                         detail="Insufficient project credits"
                     )
-                    
-                # Check if the wallet has enough balance
-                sufficient_balance = await user.wallet.has_sufficient_balance(
-                    amount= Decimal(total_cost)
-                )
-                if  sufficient_balance == False:
+
+                if not result.debited:
                     raise HTTPException(
                         status_code=status.HTTP_400_BAD_REQUEST,
                         detail="Insufficient wallet funds"
                     )
 
-                # Deduct credits from the wallet
-                await user.wallet.deduct_credits(
-                    self.session,
-                    Decimal(total_cost),
-                    user_id,
-                    False
-                )
+                if not result.reserved:
+                    # Credits were taken by a concurrent purchase after pricing
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="Insufficient project credits"
+                    )
 
-                # Reserve credits for the project
-                await project.reserve_credits(
-                    self.session,
-                    Decimal(credits),
-                    user_id,
-                    False
-                )
+                response = ResponseModel[TransactionResponse](
+                        msg="Purchased Successfully",
+                        detail=TransactionResponse.model_validate(dict(result._mapping))
+                    )
 
-                # Create the transaction
-                transaction_data = TransactionCreateRequest(
-                    user_id = user_id,
-                    project_id=project.id,
-                    wallet_id=user.wallet.id,
-                    transaction_type = TransactionType.PURCHASE,
-                    purchase_type= purchase_type,
-                    credit_amount = credits,
-                    price_paid = total_cost,
-                    requested_credits=requested_credit,
-                    requested_budget=requested_bugdet,
-                    price_per_credit = project.price_per_credit,
-                    status = TransactionStatus.COMPLETED
-                )
+            await replica_router.record_write(self.session, user_id)
+            return response
+        except HTTPException as e:
+            # Re-raise HTTP exceptions as-is
+            raise e
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="An unexpected error occurred during purchase"
+            )
 
-                transaction = await self.repository.create(
-                    obj_data=transaction_data,
-                    commit=False
-                )
+    async def purchase_batched(
+            self,
+            user_id: uuid.UUID,
+            data: PurchaseRequest
+    ) -> ResponseModel[TransactionResponse]:
+        """
+        Method to purchase credits from a project through the purchase batcher.
 
-                # Commit the transaction
-                await self.session.flush()
+        Concurrent purchases of the same project are applied together in one
+        transaction; this call returns once the batch holding this purchase
+        has committed, with this purchase's own transaction or error.
+        """
+        # Reject projects already known to be unavailable without queueing
+        cached_project = self.project_repository.cached_entry(data.project_id)
+        if cached_project is not None:
+            self.check_project_available(cached_project)
 
-                return ResponseModel[TransactionResponse](
-                        msg="Purchased Successfully",
-                        detail=TransactionResponse.model_validate(transaction)
-                    )
-        except HTTPException as e :
+        try:
+            transaction = await purchase_batcher.submit(
+                user_id=user_id,
+                project_id=data.project_id,
+                amount=Decimal(str(data.amount)),
+                purchase_type=data.purchase_type,
+                # The purchase commits in the batch's session, not this one
+                idempotency_keys=take_pending(self.session)
+            )
+        except HTTPException as e:
             # Re-raise HTTP exceptions as-is
             raise e
         except Exception as e:
-            # Log the exception if you have logging set up
-            # logger.error(f"Unexpected error in purchase: {str(e)}")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="An unexpected error occurred during purchase"
             )
-        
 
-        
+        await replica_router.record_write(self.session, user_id)
+        return ResponseModel[TransactionResponse](
+            msg="Purchased Successfully",
+            detail=TransactionResponse.model_validate(dict(transaction._mapping))
+        )
+
+    async def search(
+            self,
+            user_id: uuid.UUID,
+            params: TransactionSearchRequest
+    ) -> CursorPaginatedResponse[TransactionResponse]:
+        """
+        Search the user's transaction ledger, newest first.
+
+        Every filter is combined with the user id, so the lookup is served by
+        the (user_id, <filter>, created_at, id) indexes of the transaction
+        table and each page is a bounded index range scan.
+
+        :param user_id: UUID of the user whose transactions are searched
+        :param params: TransactionSearchRequest with filters, cursor and limit
+        :return: CursorPaginatedResponse of TransactionResponse
+        """
+        model = self.repository.model
+
+        # Always scope the search to the requesting user
+        filters = [model.user_id == user_id]
+
+        if params.transaction_type is not None:
+            filters.append(model.transaction_type == params.transaction_type)
+        if params.status is not None:
+            filters.append(model.status == params.status)
+        if params.project_id is not None:
+            filters.append(model.project_id == params.project_id)
+        filters.extend(self.repository.time_window(
+            created_from=params.created_from,
+            created_to=params.created_to
+        ))
+        if params.min_amount is not None:
+            filters.append(model.price_paid >= Decimal(str(params.min_amount)))
+        if params.max_amount is not None:
+            filters.append(model.price_paid <= Decimal(str(params.max_amount)))
+
+        try:
+            return await self.repository.get_by_filter_with_cursor_pagination(
+                pagination=params,
+                response_model=TransactionResponse,
+                filters=filters
+            )
+        except ValueError as e:
+            # Malformed cursor
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    def ledger_rows(self, filters: List[Any]) -> AsyncIterator[Any]:
+        """
+        Stream the matching ledger rows, oldest first, in chunks of
+        EXPORT_CHUNK_SIZE plain rows (no ORM or pydantic objects).
+
+        :param filters: SQLAlchemy filter conditions on Transaction
+        :return: Async iterator of row chunks selected with LEDGER_COLUMNS
+        """
+        return self.repository.stream_by_filter(
+            filters=filters,
+            columns=LEDGER_COLUMNS,
+            order_by=[self.repository.model.created_at, self.repository.model.id],
+            chunk_size=settings.EXPORT_CHUNK_SIZE
+        )
+
+    async def stream_ledger(
+            self,
+            filters: List[Any],
+            export_format: ExportFormat
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream the matching ledger rows, encoded chunk by chunk.
+
+        Rows are read through a server-side cursor and each chunk is encoded
+        in one pass, so memory stays flat regardless of the number of rows.
+
+        :param filters: SQLAlchemy filter conditions on Transaction
+        :param export_format: ExportFormat of the output
+        :return: Async iterator of encoded bytes
+        """
+        yield encode_header(export_format)
+
+        async for rows in self.ledger_rows(filters):
+            yield encode_chunk(rows, export_format)
+
+    @classmethod
+    async def export_ledger(
+            cls,
+            filters: List[Any],
+            export_format: ExportFormat
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream a ledger export on a session owned by the stream.
+
+        A StreamingResponse body is consumed after the request's dependencies
+        have been closed, so the export cannot use the request session. It
+        runs on the reporting pool.
+        """
+        async with ReportingSessionLocal() as session:
+            service = cls(session=session)
+            async for chunk in service.stream_ledger(filters=filters, export_format=export_format):
+                yield chunk
+
+    @classmethod
+    async def export_ledger_columnar(
+            cls,
+            filters: List[Any],
+            columnar_format: ColumnarFormat
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream a Parquet / Arrow IPC ledger export on a session owned by the
+        stream, one record batch per chunk.
+        """
+        async with ReportingSessionLocal() as session:
+            service = cls(session=session)
+            async for chunk in encode_columnar(service.ledger_rows(filters), columnar_format):
+                yield chunk
+
+    def ledger_time_filters(self, created_from=None, created_to=None) -> List[Any]:
+        """
+        Build the created_at range filters of a full ledger export.
+        """
+        model = self.repository.model
+        filters = []
+        if created_from is not None:
+            filters.append(model.created_at >= created_from)
+        if created_to is not None:
+            filters.append(model.created_at < created_to)
+        return filters
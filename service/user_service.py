@@ -3,8 +3,13 @@ from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
 from  repository.user_repository import UserRepository 
 from repository.wallet_repository import WalletRepository
+from repository.revoked_token_repository import RevokedTokenRepository
 from sqlalchemy.ext.asyncio import AsyncSession
-from config.jwt_provider import hash_password,verify_password,create_access_token
+from config.jwt_provider import hash_password,create_access_token
+from config.password_hasher import password_hasher
+from config.invalidation_bus import invalidation_bus
+from config.token_denylist import token_denylist
+from schema.jwt_schema import TokenData
 from schema.user_schema import *
 from schema.wallelt_schema import WalletCreateRequest
 from utils.utils import UNIQUE_CONSTRAINT_MESSAGES
@@ -14,6 +19,7 @@ class UserService:
         self.session = session
         self.repository = UserRepository(session=session)
         self.wallet_repository = WalletRepository(session=session)
+        self.revoked_token_repository = RevokedTokenRepository(session=session)
 
     async def create(
             self,
@@ -26,8 +32,8 @@ class UserService:
         :return: UserResponse object with the created user details.
         """
         try:
-            # Hash the user's password before saving to the database
-            data.password = hash_password(data.password)
+            # Hash the user's password (off the event loop) before saving to the database
+            data.password = await hash_password(data.password)
             async with self.session.begin():
                 # Create a new user record in the database
                 user = await self.repository.create(obj_data=data,commit=False)
@@ -78,13 +84,25 @@ class UserService:
                 ]
             )
             
-            # Verify the user's password
-            if ((not user) or 
-                (not verify_password(data.password, user.password))):
+            # Check that the user exists
+            if not user:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Incorrect email or passsword"
                 )
+
+            # Verify the user's password on the hasher pool
+            valid, new_hash = await password_hasher.verify_and_update(data.password, user.password)
+            if not valid:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Incorrect email or passsword"
+                )
+
+            # Upgrade the stored hash when the configured cost has changed
+            if new_hash is not None:
+                user.password = new_hash
+                await self.repository.update(obj=user)
             
             # Generate an access token for the user
             access_token = create_access_token(
@@ -97,4 +115,37 @@ class UserService:
             # Reraise any exceptions encountered during the process
             raise e
 
-    
+    async def sign_out(
+            self,
+            token_data: TokenData
+    ) -> Dict[str, str]:
+        """
+        Revoke the access token used for the request.
+        
+        The token's jti is added to the denylist table and to this process's
+        Bloom filter; other processes add it when the invalidation bus
+        delivers the commit, or at the latest on their next refresh.
+        
+        :param token_data: Verified TokenData of the current token.
+        :return: A confirmation message.
+        """
+        if token_data.jti is None or token_data.expires_at is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="This token cannot be revoked"
+            )
+
+        try:
+            async with self.session.begin():
+                await self.revoked_token_repository.revoke(
+                    jti=token_data.jti,
+                    user_id=token_data.id,
+                    expires_at=token_data.expires_at
+                )
+                invalidation_bus.publish(self.session, "token", token_data.jti)
+            token_denylist.add(token_data.jti)
+            return {"detail": "Token revoked"}
+        except Exception as e:
+            # Reraise any exceptions encountered during the process
+            raise e
+
@@ -1,5 +1,7 @@
 
+from datetime import datetime
 from decimal import Decimal
+from typing import AsyncIterator
 import uuid
 from fastapi.exceptions import HTTPException
 from fastapi import status
@@ -7,16 +9,23 @@ from sqlalchemy import func, select
 from sqlalchemy.orm import selectinload
 from schema.pagination_schema import PaginatedRequest,PaginatedResponse
 from utils.utils import TransactionStatus, TransactionType
-from repository.wallet_repository import WalletRepository
+from repository.wallet_repository import WalletRepository, wallet_locks
 from repository.transaction_repository import TransactionRepository
+from repository.wallet_balance_snapshot_repository import WalletBalanceSnapshotRepository
+from config.settings import settings
+from config.concurrency_control import transaction_attempts
+from config.read_replicas import replica_router
 from schema.transaction_schema import TransactionCreateRequest
 from sqlalchemy.ext.asyncio import AsyncSession
 from schema.wallelt_schema import *
+from service.transaction_service import TransactionService
+from utils.ledger_export import ExportFormat
 class WalletService:
     def __init__(self, session: AsyncSession):
         self.session = session        
         self.repository = WalletRepository(session=session)
         self.transaction_repository = TransactionRepository(session=session)
+        self.snapshot_repository = WalletBalanceSnapshotRepository(session=session)
 
     async def add_balance(
             self,
@@ -35,71 +44,107 @@ class WalletService:
         Returns:
         - WalletResponse: The updated wallet
         """
-        try:
-            async with self.session.begin():
-                # Get the wallet
-                wallet = await self.repository.get_by_id(obj_id=wallet_id)
-
-                # Check if the wallet exists
-                if not wallet:
-                    # Raise an error
-                    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Wallet not found")
-
-                # Add credits to the wallet
-                await wallet.add_credits(
-                    session=self.session,
-                    amount=Decimal(data.balance),  # Convert balance to Decimal
-                    updated_by=user_id,
-                    commit=False  # Do not commit yet
-                )
+        # Purchases and top-ups of the same wallet queue here rather than
+        # on the wallet row lock, holding a pool connection
+        async with wallet_locks.hold(wallet_id):
+            try:
+                # Re-run the whole transaction if it loses to a concurrent writer
+                async for attempt in transaction_attempts(self.session):
+                    async with attempt:
+                        # Get the wallet
+                        wallet = await self.repository.get_by_id(obj_id=wallet_id, for_update=attempt.lock_rows)
 
-                # Create a transaction for the topup
-                transaction_data = TransactionCreateRequest(
-                    user_id=user_id,
-                    wallet_id=wallet.id,
-                    transaction_type=TransactionType.TOPUP,
-                    credit_amount=0,  # Credit amount is 0 for topups
-                    price_paid=data.balance,  # Price paid is the balance
-                    status=TransactionStatus.COMPLETED
-                )
+                        # Check if the wallet exists
+                        if not wallet:
+                            # Raise an error
+                            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Wallet not found")
 
-                # Create the transaction
-                await self.transaction_repository.create(
-                    obj_data=transaction_data,
-                    commit=False  # Do not commit yet
-                )
+                        # Add credits to the wallet
+                        await wallet.add_credits(
+                            session=self.session,
+                            amount=Decimal(data.balance),  # Convert balance to Decimal
+                            updated_by=user_id,
+                            commit=False  # Do not commit yet
+                        )
 
-                # Build the response
-                wallet_data = {
-                    'id': wallet.id,
-                    'user_id': wallet.user_id,
-                    'balance': wallet.balance,
-                    'created_at': wallet.created_at,
-                    'updated_at': wallet.updated_at,
-                    'is_active': wallet.is_active
-                }
-
-            # Return the response
-            return WalletResponse.model_validate(wallet_data)
-        except ValueError as e:
-            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
-        except Exception as e:
-            raise e
+                        # Keep the wallet's persisted totals in step with the ledger
+                        await wallet.record_transaction(
+                            TransactionType.TOPUP,
+                            Decimal(0),  # Credit amount is 0 for topups
+                            Decimal(data.balance)
+                        )
+
+                        # Create a transaction for the topup
+                        transaction_data = TransactionCreateRequest(
+                            user_id=user_id,
+                            wallet_id=wallet.id,
+                            transaction_type=TransactionType.TOPUP,
+                            credit_amount=0,  # Credit amount is 0 for topups
+                            price_paid=data.balance,  # Price paid is the balance
+                            status=TransactionStatus.COMPLETED
+                        )
+
+                        # Create the transaction
+                        await self.transaction_repository.create(
+                            obj_data=transaction_data,
+                            commit=False  # Do not commit yet
+                        )
+
+                        # Build the response
+                        wallet_data = {
+                            'id': wallet.id,
+                            'user_id': wallet.user_id,
+                            'balance': wallet.balance,
+                            'credit_balance': wallet.credit_balance,
+                            'total_invested': wallet.total_invested,
+                            'created_at': wallet.created_at,
+                            'updated_at': wallet.updated_at,
+                            'is_active': wallet.is_active
+                        }
+
+                await replica_router.record_write(self.session, user_id)
+
+                # Return the response
+                return WalletResponse.model_validate(wallet_data)
+            except ValueError as e:
+                raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+            except Exception as e:
+                raise e
 
     async def get_by_user(
     self,
-    user_id: uuid.UUID  # Optional: for additional security to ensure user owns the wallet
+    user_id: uuid.UUID,  # Optional: for additional security to ensure user owns the wallet
+    include_transactions: bool = True
     ) -> WalletResponse:
-    
+        """
+        Get the wallet of a user
+
+        The balance totals are read from the wallet row, so the cost does not
+        depend on the size of the user's history unless the embedded
+        transaction list is requested.
+
+        Args:
+        - user_id (uuid.UUID): The user ID owning the wallet
+        - include_transactions (bool): Embed the wallet's transactions of the default time window in the response
+
+        Returns:
+        - WalletResponse: The wallet with its totals
+        """
         try:
             # Build filters - include user_id for security if provided
             filters = []
             filters.append(self.repository.model.user_id == user_id)
             
-            # Get the wallet record with transactions
-            query = select(self.repository.model).filter(*filters).options(
-                selectinload(self.repository.model.transactions)
-            )
+            # Get the wallet record, with transactions only when requested;
+            # embedded transactions are limited to the default time window so
+            # only recent partitions are scanned
+            query = select(self.repository.model).filter(*filters)
+            if include_transactions:
+                query = query.options(
+                    selectinload(self.repository.model.transactions.and_(
+                        *self.transaction_repository.time_window()
+                    ))
+                )
             
             result = await self.repository.db.execute(query)
             wallet = result.unique().scalars().first()
@@ -107,7 +152,7 @@ class WalletService:
             if not wallet:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Wallet not found")
             
-            # Convert to response object with computed values
+            # Convert to response object with the persisted totals
             response_data = {
                 'id': wallet.id,
                 'user_id': wallet.user_id,
@@ -115,14 +160,126 @@ class WalletService:
                 'created_at': wallet.created_at,
                 'updated_at': wallet.updated_at,
                 'is_active': wallet.is_active,
-                'credit_balance': await wallet.credit_balance(),
-                'total_invested': await wallet.total_invested(),
-                "transactions": wallet.transactions
+                'credit_balance': wallet.credit_balance,
+                'total_invested': wallet.total_invested,
+                "transactions": wallet.transactions if include_transactions else None
             }
             
             return WalletResponse(**response_data)
 
         except Exception as e:
             raise e
-            
-            
+
+    async def export_ledger(
+            self,
+            user_id: uuid.UUID,
+            export_format: ExportFormat
+    ) -> AsyncIterator[bytes]:
+        """
+        Export the full ledger of the user's wallet
+
+        The wallet is resolved before streaming starts so a missing wallet is
+        still reported as 404.
+
+        Args:
+        - user_id (uuid.UUID): The user ID owning the wallet
+        - export_format (ExportFormat): NDJSON or CSV
+
+        Returns:
+        - AsyncIterator[bytes]: The encoded ledger stream
+        """
+        wallet = await self.repository.get_by_filter(
+            filters=[self.repository.model.user_id == user_id]
+        )
+
+        if not wallet:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Wallet not found")
+
+        # Filtering on user_id too lets the (user_id, created_at, id) index
+        # return rows in export order without a sort
+        model = self.transaction_repository.model
+        return TransactionService.export_ledger(
+            filters=[model.user_id == user_id, model.wallet_id == wallet.id],
+            export_format=export_format
+        )
+
+    async def balance_as_of(
+            self,
+            user_id: uuid.UUID,
+            as_of: datetime
+    ) -> WalletBalanceAsOfResponse:
+        """
+        Get the wallet totals of a user as of a point in time
+
+        Replays only the transactions since the nearest earlier balance
+        snapshot.
+
+        Args:
+        - user_id (uuid.UUID): The user ID owning the wallet
+        - as_of (datetime): Point in time; transactions created before it are counted
+
+        Returns:
+        - WalletBalanceAsOfResponse: The historical totals
+        """
+        wallet = await self.repository.get_by_filter(
+            filters=[self.repository.model.user_id == user_id]
+        )
+
+        if not wallet:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Wallet not found")
+
+        totals = await self.snapshot_repository.balance_as_of(wallet_id=wallet.id, at=as_of)
+        return WalletBalanceAsOfResponse(wallet_id=wallet.id, as_of=as_of, **totals)
+
+    async def balance_series(
+            self,
+            user_id: uuid.UUID,
+            params: WalletBalanceSeriesRequest
+    ) -> WalletBalanceSeriesResponse:
+        """
+        Get the downsampled balance time series of a user's wallet
+
+        The balance at start comes from the nearest snapshot plus a replay;
+        every later point adds the per-interval balance changes, which are
+        summed in the database.
+
+        Args:
+        - user_id (uuid.UUID): The user ID owning the wallet
+        - params (WalletBalanceSeriesRequest): Range and sampling interval
+
+        Returns:
+        - WalletBalanceSeriesResponse: One point per interval from start to end
+        """
+        count = int((params.end - params.start) / params.interval) + 1
+        if count > settings.BALANCE_SERIES_MAX_POINTS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Too many points ({count}); use a larger interval (max {settings.BALANCE_SERIES_MAX_POINTS} points)"
+            )
+
+        wallet = await self.repository.get_by_filter(
+            filters=[self.repository.model.user_id == user_id]
+        )
+
+        if not wallet:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Wallet not found")
+
+        start = await self.snapshot_repository.balance_as_of(wallet_id=wallet.id, at=params.start)
+        deltas = dict(await self.snapshot_repository.balance_deltas_by_bucket(
+            wallet_id=wallet.id,
+            start=params.start,
+            end=params.start + params.interval * (count - 1),
+            interval=params.interval
+        ))
+
+        # Point i counts every transaction created before start + i * interval,
+        # i.e. every bucket below i
+        points = []
+        balance = start["balance"]
+        for index in range(count):
+            if index:
+                balance += deltas.get(index - 1, Decimal(0))
+            points.append(WalletBalancePoint(at=params.start + params.interval * index, balance=balance))
+
+        return WalletBalanceSeriesResponse(wallet_id=wallet.id, interval=params.interval, points=points)
+
@@ -45,6 +45,7 @@ def mock_user():
     user.wallet.id = uuid.uuid4()
     user.wallet.has_sufficient_balance = AsyncMock(return_value=True)
     user.wallet.deduct_credits = AsyncMock()
+    user.wallet.record_transaction = AsyncMock()
     return user
 
 
@@ -54,6 +55,9 @@ def mock_project():
     project = Mock()
     project.id = uuid.uuid4()
     project.price_per_credit = Decimal('0.10')
+    project.is_active = True
+    project.sold_out = False
+    project.inventory_shard_count = 1
     project.has_sufficient_credits = AsyncMock(return_value=True)
     project.reserve_credits = AsyncMock()
     return project
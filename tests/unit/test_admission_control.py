@@ -0,0 +1,109 @@
+"""
+Unit tests for admission control and load shedding
+"""
+import pytest
+from unittest.mock import Mock, patch
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.testclient import TestClient
+from main import app as main_app
+from config.admission_control import (
+    CRITICAL,
+    EXPORT,
+    STANDARD,
+    AdmissionControlMiddleware,
+    AdmissionController,
+    classify
+)
+
+
+def make_controller(capacity: int = 4, max_wait_ms: float = 100) -> AdmissionController:
+    return AdmissionController(
+        capacity=capacity,
+        shares={CRITICAL: 2.0, STANDARD: 1.0, EXPORT: 0.25},
+        max_wait_ms=max_wait_ms,
+        retry_after_seconds=2
+    )
+
+
+class TestAdmissionControl:
+    """Test class for AdmissionController and its middleware"""
+
+    def test_routes_are_classified(self):
+        """Test that purchases and top-ups are critical and exports are classed apart"""
+        assert classify("POST", "/api/v1/transaction/purchase/") == CRITICAL
+        assert classify("PUT", "/api/v1/wallet/topup/123/") == CRITICAL
+        assert classify("GET", "/api/v1/wallet/export/") == EXPORT
+        assert classify("GET", "/api/v1/wallet/") == STANDARD
+        assert classify("GET", "/api/v1/metrics/pool/") is None
+        assert classify("GET", "/docs") is None
+
+    def test_lower_classes_are_shed_first(self):
+        """Test that critical requests keep headroom once standard ones are shed"""
+        controller = make_controller(capacity=4)
+
+        assert controller.try_admit(EXPORT)
+        assert not controller.try_admit(EXPORT)
+        assert all(controller.try_admit(STANDARD) for _ in range(3))
+        assert not controller.try_admit(STANDARD)
+        assert all(controller.try_admit(CRITICAL) for _ in range(4))
+        assert not controller.try_admit(CRITICAL)
+
+        controller.release(STANDARD)
+        stats = controller.stats()
+        assert stats["in_flight"] == 7
+        assert stats["classes"][STANDARD]["shed"] == 1
+
+    def test_pool_wait_sheds_non_critical(self):
+        """Test that a slow pool sheds standard requests but admits critical ones"""
+        controller = make_controller(max_wait_ms=100)
+
+        with patch.object(AdmissionController, 'pool', Mock(recent_wait_ms=Mock(return_value=500))):
+            assert not controller.try_admit(STANDARD)
+            assert controller.try_admit(CRITICAL)
+
+    def test_middleware_rejects_with_retry_after(self):
+        """Test that a shed request gets 503 with Retry-After without reaching the endpoint"""
+        endpoint = Mock(return_value={"ok": True})
+        app = FastAPI()
+        app.get("/api/v1/wallet/")(lambda: endpoint())
+        controller = make_controller(capacity=1)
+        app.add_middleware(AdmissionControlMiddleware, controllers=[controller])
+        client = TestClient(app)
+
+        assert client.get("/api/v1/wallet/").status_code == 200
+        assert controller.stats()["in_flight"] == 0
+
+        controller.try_admit(CRITICAL)
+        response = client.get("/api/v1/wallet/")
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "2"
+        assert endpoint.call_count == 1
+
+    def test_exports_are_admitted_against_the_reporting_pool(self):
+        """Test that exports are limited by their own pool, not by the transactional pool's load"""
+        endpoint = Mock(return_value={"ok": True})
+        app = FastAPI()
+        app.get("/api/v1/wallet/")(lambda: endpoint())
+        app.get("/api/v1/wallet/export/")(lambda: endpoint())
+        transactional = AdmissionController(capacity=1, shares={CRITICAL: 2.0, STANDARD: 1.0}, max_wait_ms=100,
+                                            retry_after_seconds=2, pool_name="transactional")
+        reporting = AdmissionController(capacity=1, shares={EXPORT: 1.0}, max_wait_ms=100,
+                                        retry_after_seconds=2, pool_name="reporting")
+        app.add_middleware(AdmissionControlMiddleware, controllers=[transactional, reporting])
+        client = TestClient(app)
+        transactional.try_admit(CRITICAL)
+
+        assert client.get("/api/v1/wallet/").status_code == 503
+        assert client.get("/api/v1/wallet/export/").status_code == 200
+
+        reporting.try_admit(EXPORT)
+        assert client.get("/api/v1/wallet/export/").status_code == 503
+        assert reporting.stats()["classes"][EXPORT]["shed"] == 1
+        assert transactional.stats()["classes"][STANDARD]["shed"] == 1
+
+    def test_cors_wraps_admission_control(self):
+        """Test that CORS is the outermost middleware so shed responses keep its headers"""
+        assert main_app.user_middleware[0].cls is CORSMiddleware
+        assert any(middleware.cls is AdmissionControlMiddleware for middleware in main_app.user_middleware[1:])
@@ -0,0 +1,65 @@
+"""
+Unit tests for wallet balance snapshots and historical balance queries
+"""
+import pytest
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest.mock import AsyncMock, patch
+from main import app
+from config.jwt_provider import get_current_user
+from config.database import get_db
+from jobs.snapshot_balances import snapshot_cutoff
+
+
+class TestBalanceSnapshot:
+    """Test class for the balance snapshot job and the balance endpoints"""
+
+    def test_snapshot_cutoff_is_aligned_and_lagged(self):
+        """Test that cutoffs land on interval boundaries behind the grace period"""
+        now = datetime(2025, 6, 1, 12, 3, tzinfo=timezone.utc)
+
+        assert snapshot_cutoff(now, 3600, 300) == datetime(2025, 6, 1, 11, 0, tzinfo=timezone.utc)
+        assert snapshot_cutoff(now, 3600, 60) == datetime(2025, 6, 1, 12, 0, tzinfo=timezone.utc)
+
+    @pytest.mark.asyncio
+    async def test_balance_series_adds_bucket_deltas(self, client, mock_session, mock_user):
+        """Test that each point adds the buckets before it to the starting balance"""
+        app.dependency_overrides[get_current_user] = lambda: mock_user.id
+        app.dependency_overrides[get_db] = lambda: mock_session
+
+        with patch('service.wallet_service.WalletRepository') as MockWalletRepo, \
+                patch('service.wallet_service.WalletBalanceSnapshotRepository') as MockSnapshotRepo:
+            MockWalletRepo.return_value.get_by_filter = AsyncMock(return_value=mock_user.wallet)
+            snapshots = MockSnapshotRepo.return_value
+            snapshots.balance_as_of = AsyncMock(return_value={
+                "balance": Decimal("100.00"),
+                "credit_balance": Decimal("0.00"),
+                "total_invested": Decimal("0.00"),
+                "snapshot_at": None,
+            })
+            snapshots.balance_deltas_by_bucket = AsyncMock(return_value=[(0, Decimal("-40.00")), (2, Decimal("15.50"))])
+
+            response = client.get(
+                "/api/v1/wallet/balance/series/",
+                params={"start": "2025-06-01T00:00:00Z", "end": "2025-06-04T00:00:00Z", "interval": "P1D"},
+                headers={"Authorization": "Bearer test_token"}
+            )
+
+        assert response.status_code == 200
+        assert [point["balance"] for point in response.json()["points"]] == [100.0, 60.0, 60.0, 75.5]
+        kwargs = snapshots.balance_deltas_by_bucket.call_args.kwargs
+        assert kwargs["end"] == datetime(2025, 6, 4, tzinfo=timezone.utc)
+
+    @pytest.mark.asyncio
+    async def test_balance_series_limits_points(self, client, mock_session, mock_user):
+        """Test that a series with too many points is rejected"""
+        app.dependency_overrides[get_current_user] = lambda: mock_user.id
+        app.dependency_overrides[get_db] = lambda: mock_session
+
+        response = client.get(
+            "/api/v1/wallet/balance/series/",
+            params={"start": "2020-01-01T00:00:00Z", "end": "2025-01-01T00:00:00Z", "interval": "PT1M"},
+            headers={"Authorization": "Bearer test_token"}
+        )
+
+        assert response.status_code == 400
@@ -0,0 +1,113 @@
+"""
+Unit tests for the concurrency-control strategies and transaction retries
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
+from fastapi import HTTPException
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm.exc import StaleDataError
+from config.concurrency_control import ConcurrencyStrategy, conflict_reason, transaction_attempts
+
+
+def mock_session(commit_errors=()) -> Mock:
+    """Session whose transactions raise the given errors on commit, in turn"""
+    errors = list(commit_errors)
+
+    async def exit_transaction(exc_type, exc, tb):
+        if exc is None and errors:
+            error = errors.pop(0)
+            if error is not None:
+                raise error
+        return False
+
+    session = Mock()
+    session.begin = Mock(side_effect=lambda: MagicMock(
+        __aenter__=AsyncMock(),
+        __aexit__=AsyncMock(side_effect=exit_transaction)
+    ))
+    session.connection = AsyncMock()
+    return session
+
+
+def db_error(sqlstate: str) -> DBAPIError:
+    return DBAPIError("UPDATE wallet ...", {}, Mock(sqlstate=sqlstate))
+
+
+async def run(session, body, strategy=ConcurrencyStrategy.OPTIMISTIC, max_attempts=3) -> int:
+    """Run body in the retry loop and return the number of attempts"""
+    attempts = 0
+    with patch('config.concurrency_control.asyncio.sleep', AsyncMock()):
+        async for attempt in transaction_attempts(session, strategy=strategy, max_attempts=max_attempts):
+            attempts += 1
+            async with attempt:
+                await body(attempt)
+    return attempts
+
+
+async def noop(attempt):
+    pass
+
+
+class TestConcurrencyControl:
+    """Test class for transaction_attempts and conflict detection"""
+
+    def test_conflict_reasons(self):
+        """Test that only concurrency conflicts are retryable"""
+        assert conflict_reason(StaleDataError("stale")) == "stale_version"
+        assert conflict_reason(db_error("40001")) == "serialization_failure"
+        assert conflict_reason(db_error("40P01")) == "deadlock"
+        assert conflict_reason(db_error("23505")) is None
+        assert conflict_reason(ValueError("other")) is None
+
+    @pytest.mark.asyncio
+    async def test_stale_version_is_retried(self):
+        """Test that a stale write on commit re-runs the transaction"""
+        session = mock_session(commit_errors=[StaleDataError("stale"), None])
+
+        assert await run(session, noop) == 2
+        assert session.begin.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_exhausted_attempts_return_409(self):
+        """Test that a transaction losing every attempt is reported as a conflict"""
+        session = mock_session(commit_errors=[db_error("40001")] * 3)
+
+        with pytest.raises(HTTPException) as exc_info:
+            await run(session, noop, strategy=ConcurrencyStrategy.SERIALIZABLE)
+
+        assert exc_info.value.status_code == 409
+        assert exc_info.value.headers["Retry-After"] == "1"
+        assert session.begin.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_other_errors_are_not_retried(self):
+        """Test that business errors propagate from the first attempt"""
+        session = mock_session()
+
+        async def reject(attempt):
+            raise HTTPException(status_code=400, detail="Insufficient wallet funds")
+
+        with pytest.raises(HTTPException) as exc_info:
+            await run(session, reject)
+
+        assert exc_info.value.status_code == 400
+        assert session.begin.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_strategies_lock_or_isolate(self):
+        """Test that only pessimistic locks rows and only serializable raises isolation"""
+        seen = {}
+        for strategy in ConcurrencyStrategy:
+            session = mock_session()
+
+            async def record(attempt):
+                seen[strategy] = attempt.lock_rows
+
+            await run(session, record, strategy=strategy)
+            assert session.connection.called == (strategy == ConcurrencyStrategy.SERIALIZABLE)
+
+        assert seen == {
+            ConcurrencyStrategy.PESSIMISTIC: True,
+            ConcurrencyStrategy.OPTIMISTIC: False,
+            ConcurrencyStrategy.SERIALIZABLE: False,
+        }
@@ -0,0 +1,91 @@
+"""
+Unit tests for keyset (cursor) pagination
+"""
+import pytest
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import AsyncMock, Mock
+from sqlalchemy.dialects import postgresql
+from repository.transaction_repository import TransactionRepository
+from schema.pagination_schema import CursorPaginatedRequest
+from schema.transaction_schema import TransactionResponse
+from utils.utils import TransactionStatus, TransactionType, decode_cursor, encode_cursor, get_utc_now
+
+
+def make_transaction(created_at):
+    """Mock transaction row created at the given time"""
+    transaction = Mock()
+    transaction.id = uuid.uuid4()
+    transaction.created_at = created_at
+    transaction.user_id = uuid.uuid4()
+    transaction.project_id = None
+    transaction.wallet_id = uuid.uuid4()
+    transaction.transaction_type = TransactionType.TOPUP
+    transaction.purchase_type = None
+    transaction.credit_amount = Decimal('0.00')
+    transaction.price_paid = Decimal('10.00')
+    transaction.price_per_credit = None
+    transaction.requested_credits = None
+    transaction.requested_budget = None
+    transaction.reference = None
+    transaction.status = TransactionStatus.COMPLETED
+    return transaction
+
+
+class TestCursorPagination:
+    """Test class for cursor pagination helpers"""
+
+    def test_cursor_round_trip(self):
+        """Test that a cursor decodes to the values it was built from"""
+        created_at, record_id = get_utc_now(), uuid.uuid4()
+
+        assert decode_cursor(encode_cursor(created_at, record_id)) == (created_at, record_id)
+
+    @pytest.mark.parametrize("cursor", ["", "not-a-cursor", "eyJjIjoxfQ"])
+    def test_invalid_cursor(self, cursor):
+        """Test that malformed cursors are rejected"""
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
+
+    @pytest.mark.asyncio
+    async def test_page_seeks_past_cursor(self, mock_session):
+        """Test that a page seeks with a row-value comparison and returns the next cursor"""
+        now = get_utc_now()
+        rows = [make_transaction(now - timedelta(seconds=i)) for i in range(3)]
+        result = Mock()
+        result.unique.return_value.scalars.return_value.all.return_value = rows
+        mock_session.execute = AsyncMock(return_value=result)
+
+        repository = TransactionRepository(session=mock_session)
+        cursor = encode_cursor(now, uuid.uuid4())
+        page = await repository.get_by_filter_with_cursor_pagination(
+            pagination=CursorPaginatedRequest(cursor=cursor, limit=2),
+            response_model=TransactionResponse,
+        )
+
+        # One extra row was fetched, so there is another page
+        assert page.has_more is True
+        assert len(page.data) == 2
+        assert decode_cursor(page.next_cursor) == (rows[1].created_at, rows[1].id)
+
+        sql = str(mock_session.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+        assert "(transaction.created_at, transaction.id) < (" in sql
+        assert "ORDER BY transaction.created_at DESC, transaction.id DESC" in sql
+        assert "OFFSET" not in sql
+
+    @pytest.mark.asyncio
+    async def test_last_page_has_no_cursor(self, mock_session):
+        """Test that the last page does not return a next cursor"""
+        result = Mock()
+        result.unique.return_value.scalars.return_value.all.return_value = [make_transaction(get_utc_now())]
+        mock_session.execute = AsyncMock(return_value=result)
+
+        repository = TransactionRepository(session=mock_session)
+        page = await repository.get_by_filter_with_cursor_pagination(
+            pagination=CursorPaginatedRequest(limit=2),
+            response_model=TransactionResponse,
+        )
+
+        assert page.has_more is False
+        assert page.next_cursor is None
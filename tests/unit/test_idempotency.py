@@ -0,0 +1,251 @@
+"""
+Unit tests for Idempotency-Key handling of write requests
+"""
+import asyncio
+import json
+import uuid
+import pytest
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+from fastapi import HTTPException
+from repository.idempotency_key_repository import PENDING_KEY, IdempotencyKeyTakenOver, _mark_committed
+from schema.response_schema import ResponseModel
+from schema.wallelt_schema import WalletUpdateRequest
+from service.idempotency_service import IdempotencyService, request_fingerprint
+from utils.utils import get_utc_now
+
+
+class FakeSession:
+    """Session whose transactions do nothing; the fake repository keeps the state"""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def begin(self):
+        return self
+
+
+class FakeIdempotencyKeyRepository:
+    """In-memory stand-in for IdempotencyKeyRepository, keyed by (user_id, key)"""
+    records = {}
+
+    def __init__(self, session):
+        pass
+
+    async def claim(self, user_id, key, fingerprint, lease_expires_at):
+        record = self.records.get((user_id, key))
+        if record is not None and record.expires_at > get_utc_now():
+            return None
+        record_id = uuid.uuid4()
+        self.records[(user_id, key)] = SimpleNamespace(
+            id=record_id,
+            fingerprint=fingerprint,
+            committed_at=None,
+            status_code=None,
+            response=None,
+            expires_at=lease_expires_at
+        )
+        return record_id
+
+    async def get(self, user_id, key):
+        return self.records.get((user_id, key))
+
+    async def is_committed(self, record_id):
+        return any(record.id == record_id and record.committed_at is not None for record in self.records.values())
+
+    async def complete(self, record_id, status_code, response, expires_at):
+        for record in self.records.values():
+            if record.id == record_id:
+                record.status_code, record.response, record.expires_at = status_code, response, expires_at
+
+    async def release(self, record_id):
+        for index, record in list(self.records.items()):
+            if record.id == record_id and record.committed_at is None:
+                del self.records[index]
+
+
+def commit(session) -> None:
+    """What the before_commit listener does for the write's transaction"""
+    for record in FakeIdempotencyKeyRepository.records.values():
+        if record.id in session.info.get(PENDING_KEY, ()):
+            record.committed_at = get_utc_now()
+    session.info.pop(PENDING_KEY, None)
+
+
+@pytest.fixture
+def service():
+    FakeIdempotencyKeyRepository.records = {}
+    with patch("service.idempotency_service.IdempotencyKeyRepository", FakeIdempotencyKeyRepository):
+        yield IdempotencyService(sessionmaker=FakeSession, ttl_seconds=60, lease_seconds=30, wait_seconds=0.05, poll_ms=1)
+
+
+@pytest.fixture
+def request_session():
+    return SimpleNamespace(info={})
+
+
+class TestIdempotencyService:
+    """Test class for IdempotencyService"""
+
+    @pytest.mark.asyncio
+    async def test_retry_replays_the_stored_response(self, service, request_session):
+        """Test that a repeated key returns the first response without running the request again"""
+        user_id = uuid.uuid4()
+        execute = AsyncMock(return_value=ResponseModel[dict](msg="Credited Successfully", detail={"balance": 10.0}))
+
+        first = await service.run(request_session, user_id, "key-1", "fp", execute, 201)
+        replay = await service.run(request_session, user_id, "key-1", "fp", execute, 201)
+
+        assert execute.await_count == 1
+        assert first.detail == {"balance": 10.0}
+        assert replay.status_code == 201
+        assert replay.headers["Idempotent-Replayed"] == "true"
+        assert json.loads(replay.body) == {"msg": "Credited Successfully", "detail": {"balance": 10.0}}
+        assert PENDING_KEY not in request_session.info
+
+    @pytest.mark.asyncio
+    async def test_key_reused_for_another_request_is_rejected(self, service, request_session):
+        """Test that a key sent with a different request fingerprint is answered with 422"""
+        user_id = uuid.uuid4()
+        await service.run(request_session, user_id, "key-1", "fp-a", AsyncMock(return_value={}), 201)
+
+        with pytest.raises(HTTPException) as exc_info:
+            await service.run(request_session, user_id, "key-1", "fp-b", AsyncMock(), 201)
+
+        assert exc_info.value.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_client_errors_are_replayed_and_rolled_back_server_errors_released(self, service, request_session):
+        """Test that a 4xx is stored for replay while a 5xx whose write rolled back lets the retry run again"""
+        user_id = uuid.uuid4()
+        insufficient = HTTPException(status_code=400, detail="Insufficient funds in wallet")
+        with pytest.raises(HTTPException):
+            await service.run(request_session, user_id, "key-4xx", "fp", AsyncMock(side_effect=insufficient), 201)
+        retry = AsyncMock()
+        replay = await service.run(request_session, user_id, "key-4xx", "fp", retry, 201)
+        retry.assert_not_awaited()
+        assert replay.status_code == 400
+        assert json.loads(replay.body) == {"detail": "Insufficient funds in wallet"}
+
+        failing = AsyncMock(side_effect=HTTPException(status_code=500, detail="Internal Server Error"))
+        with pytest.raises(HTTPException):
+            await service.run(request_session, user_id, "key-5xx", "fp", failing, 201)
+        retry = AsyncMock(return_value={"ok": True})
+        assert await service.run(request_session, user_id, "key-5xx", "fp", retry, 201) == {"ok": True}
+        assert retry.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_failure_after_commit_is_replayed_not_rerun(self, service, request_session):
+        """Test that a request failing after its write committed keeps the key and replays the error"""
+        user_id = uuid.uuid4()
+
+        async def execute():
+            commit(request_session)
+            raise RuntimeError("connection lost after COMMIT")
+
+        with pytest.raises(RuntimeError):
+            await service.run(request_session, user_id, "key-1", "fp", execute, 201)
+        retry = AsyncMock()
+        replay = await service.run(request_session, user_id, "key-1", "fp", retry, 201)
+
+        retry.assert_not_awaited()
+        assert replay.status_code == 500
+
+    @pytest.mark.asyncio
+    async def test_cancelled_request_keeps_its_claim(self, service, request_session):
+        """Test that a cancelled request does not release a key its write may still commit"""
+        user_id = uuid.uuid4()
+
+        with pytest.raises(asyncio.CancelledError):
+            await service.run(request_session, user_id, "key-1", "fp", AsyncMock(side_effect=asyncio.CancelledError), 201)
+
+        assert (user_id, "key-1") in FakeIdempotencyKeyRepository.records
+
+    @pytest.mark.asyncio
+    async def test_concurrent_duplicates_run_once(self, service, request_session):
+        """Test that duplicates arriving while the first is in flight wait for its response"""
+        user_id = uuid.uuid4()
+        calls = 0
+
+        async def execute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"transaction": calls}
+
+        results = await asyncio.gather(*(
+            service.run(request_session, user_id, "key-1", "fp", execute, 201) for _ in range(5)
+        ))
+
+        assert calls == 1
+        assert results[0] == {"transaction": 1}
+        assert all(json.loads(result.body) == {"transaction": 1} for result in results[1:])
+        assert service.stats()["replayed"] == 4
+
+    @pytest.mark.asyncio
+    async def test_in_flight_key_on_another_worker_times_out(self, service, request_session):
+        """Test that a key claimed elsewhere within its lease is answered with 409"""
+        user_id = uuid.uuid4()
+        await FakeIdempotencyKeyRepository(None).claim(user_id, "key-1", "fp", get_utc_now() + timedelta(seconds=30))
+
+        with pytest.raises(HTTPException) as exc_info:
+            await service.run(request_session, user_id, "key-1", "fp", AsyncMock(), 201)
+
+        assert exc_info.value.status_code == 409
+        assert exc_info.value.headers["Retry-After"] == "1"
+
+    @pytest.mark.asyncio
+    async def test_stale_in_flight_key_is_taken_over(self, service, request_session):
+        """Test that a claim whose request died before committing is run again once its lease expired"""
+        user_id = uuid.uuid4()
+        stale_id = await FakeIdempotencyKeyRepository(None).claim(user_id, "key-1", "fp", get_utc_now() - timedelta(seconds=1))
+        execute = AsyncMock(return_value={"ok": True})
+
+        assert await service.run(request_session, user_id, "key-1", "fp", execute, 201) == {"ok": True}
+
+        record = FakeIdempotencyKeyRepository.records[(user_id, "key-1")]
+        assert record.id != stale_id
+        assert record.status_code == 201
+        assert record.expires_at > get_utc_now() + timedelta(seconds=30)
+
+    @pytest.mark.asyncio
+    async def test_committed_key_without_response_is_not_rerun(self, service, request_session):
+        """Test that a committed write whose response was never stored answers 500 after the lease"""
+        user_id = uuid.uuid4()
+        await FakeIdempotencyKeyRepository(None).claim(user_id, "key-1", "fp", get_utc_now() + timedelta(seconds=60))
+        FakeIdempotencyKeyRepository.records[(user_id, "key-1")].committed_at = get_utc_now() - timedelta(seconds=31)
+        execute = AsyncMock()
+
+        with pytest.raises(HTTPException) as exc_info:
+            await service.run(request_session, user_id, "key-1", "fp", execute, 201)
+
+        assert exc_info.value.status_code == 500
+        execute.assert_not_awaited()
+
+    def test_commit_marker_fences_taken_over_claims(self):
+        """Test that the write's commit is aborted when its claim was taken over by a retry"""
+        record_id = uuid.uuid4()
+        session = Mock(info={PENDING_KEY: {record_id}})
+
+        session.execute.return_value = Mock(rowcount=1)
+        _mark_committed(session)
+
+        session.execute.return_value = Mock(rowcount=0)
+        with pytest.raises(IdempotencyKeyTakenOver):
+            _mark_committed(session)
+
+    def test_fingerprint_covers_path_and_body(self):
+        """Test that the same body sent to another wallet or with another amount fingerprints differently"""
+        wallet_a, wallet_b = uuid.uuid4(), uuid.uuid4()
+        body = WalletUpdateRequest(balance=10.0)
+
+        assert request_fingerprint("PUT", f"/wallet/topup/{wallet_a}/", body) == \
+            request_fingerprint("PUT", f"/wallet/topup/{wallet_a}/", WalletUpdateRequest(balance=10.0))
+        assert request_fingerprint("PUT", f"/wallet/topup/{wallet_a}/", body) != \
+            request_fingerprint("PUT", f"/wallet/topup/{wallet_b}/", body)
+        assert request_fingerprint("PUT", f"/wallet/topup/{wallet_a}/", body) != \
+            request_fingerprint("PUT", f"/wallet/topup/{wallet_a}/", WalletUpdateRequest(balance=20.0))
@@ -0,0 +1,64 @@
+"""
+Unit tests for the cross-worker cache invalidation bus
+"""
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+from config.invalidation_bus import PENDING_KEY, InvalidationBus, listener_dsn
+
+
+class TestInvalidationBus:
+    """Test class for InvalidationBus"""
+
+    def test_commit_emits_one_notify_per_key(self):
+        """Test that queued invalidations become pg_notify calls before the commit"""
+        bus = InvalidationBus(dsn="postgresql://localhost/db")
+        session = Mock(info={})
+        bus.publish(session, "user", "a")
+        bus.publish(session, "user", "a")
+        bus.publish(session, "project", "b")
+
+        bus.emit(session, session.info[PENDING_KEY])
+
+        assert session.execute.call_count == 2
+        assert bus.stats()["published"] == 2
+
+    def test_notification_evicts_subscribed_key(self):
+        """Test that a delivered notification reaches the topic's evict callback"""
+        bus = InvalidationBus(dsn="postgresql://localhost/db")
+        evicted = []
+        bus.subscribe("project", evict=evicted.append)
+
+        bus._on_notification(None, 1, bus.channel, json.dumps({"topic": "project", "key": "b"}))
+        bus._on_notification(None, 1, bus.channel, json.dumps({"topic": "unknown", "key": "c"}))
+        bus._on_notification(None, 1, bus.channel, "not json")
+
+        assert evicted == ["b"]
+        assert bus.stats()["received"] == 3
+
+    @pytest.mark.asyncio
+    async def test_reconnect_resets_caches(self):
+        """Test that caches are reset after the listener reconnects"""
+        bus = InvalidationBus(dsn="postgresql://localhost/db", reconnect_seconds=0)
+        reset = Mock()
+        bus.subscribe("user", evict=Mock(), reset=reset)
+        connection = Mock(add_listener=AsyncMock(), close=AsyncMock(), is_closed=Mock(return_value=False))
+
+        with patch('config.invalidation_bus.asyncpg.connect', AsyncMock(return_value=connection)):
+            await bus.start()
+            await asyncio.sleep(0.01)
+            assert bus.connected and reset.call_count == 0
+
+            # The connection drops; the listener reconnects and resets
+            bus._on_termination(connection)
+            await asyncio.sleep(0.01)
+            await bus.stop()
+
+        assert bus.stats()["connects"] == 2
+        reset.assert_called_once()
+        assert not bus.connected
+
+    def test_listener_dsn_drops_driver(self):
+        """Test that the asyncpg driver suffix is removed from the URL"""
+        assert listener_dsn("postgresql+asyncpg://u:p@host:5432/db") == "postgresql://u:p@host:5432/db"
@@ -0,0 +1,208 @@
+"""
+Unit tests for sharded project inventory
+"""
+import uuid
+import pytest
+from types import SimpleNamespace
+from decimal import Decimal
+from unittest.mock import AsyncMock, Mock
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+from repository.project_repository import (
+    ProjectCatalogEntry,
+    ProjectRepository,
+    project_catalog_cache,
+    project_unavailable_cache,
+    split_credits
+)
+from schema.project_schema import ProjectCreateRequest, ProjectInventoryShardsRequest
+from service.project_service import ProjectService
+from service.transaction_service import TransactionService
+
+
+def shard_rows(*credits) -> Mock:
+    """Result of the locking select of a project's shards"""
+    rows = [Mock(id=uuid.uuid4(), available_credits=Decimal(amount)) for amount in credits]
+    return Mock(all=Mock(return_value=rows))
+
+
+class TestInventoryShards:
+    """Test class for sharded project inventory"""
+
+    def test_split_credits_is_exact_and_even(self):
+        """Test that shares add up to the total and differ by at most a cent"""
+        shares = split_credits(Decimal('10.05'), 4)
+
+        assert sum(shares) == Decimal('10.05')
+        assert max(shares) - min(shares) <= Decimal('0.01')
+
+    @pytest.mark.asyncio
+    async def test_reserve_falls_back_to_rebalancing(self):
+        """Test that a purchase no single shard can cover is taken from the shards' sum"""
+        session = AsyncMock()
+        session.info = {}
+        session.execute.side_effect = [
+            Mock(scalar_one_or_none=Mock(return_value=None)),  # no unlocked shard with enough credits
+            Mock(scalar_one_or_none=Mock(return_value=None)),  # no shard with enough credits at all
+            shard_rows('3.00', '2.00', '1.00'),
+            Mock(),  # rebalanced shards
+        ]
+        project_id = uuid.uuid4()
+
+        remaining = await ProjectRepository(session=session).reserve_credits(
+            project_id=project_id,
+            amount=Decimal('5.00'),
+            updated_by=uuid.uuid4(),
+            shards=3
+        )
+
+        assert remaining == Decimal('1.00')
+        assert session.execute.await_count == 4
+        assert "pending_invalidations" not in session.info
+
+    @pytest.mark.asyncio
+    async def test_busy_shards_are_waited_on_not_rebalanced(self):
+        """Test that a purchase finding every covering shard locked queues on one instead of rebalancing"""
+        session = AsyncMock()
+        session.info = {}
+        session.execute.side_effect = [
+            Mock(scalar_one_or_none=Mock(return_value=None)),  # every covering shard is locked
+            Mock(scalar_one_or_none=Mock(return_value=Decimal('95.00'))),
+        ]
+
+        remaining = await ProjectRepository(session=session).reserve_credits(
+            project_id=uuid.uuid4(),
+            amount=Decimal('5.00'),
+            updated_by=uuid.uuid4(),
+            shards=8
+        )
+
+        assert remaining == Decimal('95.00')
+        skip_locked, blocking = (call.args[0] for call in session.execute.await_args_list)
+        assert "SKIP LOCKED" in str(skip_locked.compile(dialect=postgresql.dialect()))
+        assert "SKIP LOCKED" not in str(blocking.compile(dialect=postgresql.dialect()))
+
+    @pytest.mark.asyncio
+    async def test_set_inventory_shards_locks_rows_and_resplits(self):
+        """Test that resharding locks the shard rows (not an aggregate) and splits their sum"""
+        session = AsyncMock()
+        session.info = {}
+        session.execute.side_effect = [
+            Mock(one_or_none=Mock(return_value=Mock(available_credits=Decimal('0.00')))),
+            shard_rows('3.00', '2.00', '1.00'),
+            Mock(),  # old shards deleted
+            Mock(),  # new shards inserted
+            Mock(),  # project updated
+        ]
+        project_id = uuid.uuid4()
+
+        total = await ProjectRepository(session=session).set_inventory_shards(
+            project_id=project_id,
+            count=4,
+            updated_by=uuid.uuid4()
+        )
+
+        assert total == Decimal('6.00')
+        shard_lock = str(session.execute.await_args_list[1].args[0].compile(dialect=postgresql.dialect()))
+        assert "FOR UPDATE" in shard_lock
+        assert "sum(" not in shard_lock
+        inserted = session.execute.await_args_list[3].args[1]
+        assert [row["available_credits"] for row in inserted] == [Decimal('1.50')] * 4
+        assert session.info["pending_invalidations"] == {("project", str(project_id))}
+
+    @pytest.mark.asyncio
+    async def test_reshard_requires_the_owner(self, mock_session):
+        """Test that only the project's creator can reshard it, and the response sums the new shards"""
+        owner = uuid.uuid4()
+        project = SimpleNamespace(
+            id=uuid.uuid4(),
+            name="Launch",
+            description="Launch-day project",
+            total_credits=1000.0,
+            available_credits=0.0,
+            price_per_credit=1.0,
+            inventory_shard_count=4,
+            total_available_credits=Decimal('1000.00'),
+            created_by=owner
+        )
+        mock_session.begin.return_value.__aexit__ = AsyncMock(return_value=False)
+        service = ProjectService(session=mock_session)
+        service.repository.get_by_id = AsyncMock(return_value=project)
+        service.repository.set_inventory_shards = AsyncMock(return_value=Decimal('1000.00'))
+
+        with pytest.raises(HTTPException) as exc_info:
+            await service.set_inventory_shards(project.id, uuid.uuid4(), ProjectInventoryShardsRequest(count=4))
+        assert exc_info.value.status_code == 403
+        service.repository.set_inventory_shards.assert_not_awaited()
+
+        response = await service.set_inventory_shards(project.id, owner, ProjectInventoryShardsRequest(count=4))
+
+        service.repository.set_inventory_shards.assert_awaited_once_with(project_id=project.id, count=4, updated_by=owner)
+        assert response.available_credits == 1000.0
+        assert response.inventory_shard_count == 4
+
+    @pytest.mark.asyncio
+    async def test_reserve_fails_when_shards_run_out(self):
+        """Test that the shards' sum bounds what can be reserved"""
+        session = AsyncMock()
+        session.info = {}
+        session.execute.side_effect = [
+            Mock(scalar_one_or_none=Mock(return_value=None)),
+            Mock(scalar_one_or_none=Mock(return_value=None)),
+            shard_rows('3.00', '2.00'),
+        ]
+
+        remaining = await ProjectRepository(session=session).reserve_credits(
+            project_id=uuid.uuid4(),
+            amount=Decimal('6.00'),
+            updated_by=uuid.uuid4(),
+            shards=2
+        )
+
+        assert remaining is None
+        assert session.execute.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_create_splits_credits_across_shards(self, mock_session):
+        """Test that a sharded project keeps its credits in the shards and reports their sum"""
+        service = ProjectService(session=mock_session)
+        service.repository.create = AsyncMock(side_effect=lambda obj_data: SimpleNamespace(
+            id=uuid.uuid4(),
+            total_available_credits=sum(shard.available_credits for shard in obj_data["inventory_shards"]),
+            **obj_data
+        ))
+        data = ProjectCreateRequest(
+            name="Launch",
+            description="Launch-day project",
+            total_credits=1000.0,
+            available_credits=1000.0,
+            price_per_credit=1.0,
+            inventory_shard_count=8
+        )
+
+        response = await service.create(data=data, user_id=uuid.uuid4())
+
+        created = service.repository.create.call_args.kwargs["obj_data"]
+        assert created["available_credits"] == 0
+        assert [shard.shard_no for shard in created["inventory_shards"]] == list(range(8))
+        assert response.available_credits == 1000.0
+        assert response.inventory_shard_count == 8
+
+    @pytest.mark.asyncio
+    async def test_sharded_projects_bypass_the_purchase_engines(self, mock_session):
+        """Test that sharded projects are detected from the catalog so they take the ORM path"""
+        project_id = uuid.uuid4()
+        entry = ProjectCatalogEntry(
+            id=project_id,
+            name="Launch",
+            price_per_credit=Decimal('1.00'),
+            is_active=True,
+            sold_out=False,
+            inventory_shard_count=8
+        )
+        project_catalog_cache.set(project_id, entry)
+        try:
+            assert await TransactionService(session=mock_session).is_sharded(project_id)
+        finally:
+            project_catalog_cache.clear()
+            project_unavailable_cache.clear()
@@ -0,0 +1,154 @@
+"""
+Unit tests for streaming ledger exports
+"""
+import json
+import pytest
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest.mock import AsyncMock, Mock, patch
+from main import app
+from config.jwt_provider import get_current_user
+from config.database import get_reporting_db
+from utils.ledger_export import ExportFormat, LEDGER_FIELDS, encode_chunk, encode_header
+from utils.utils import PurchaseType, TransactionStatus, TransactionType
+
+
+def make_ledger_row():
+    """Ledger row as selected with LEDGER_COLUMNS"""
+    return (
+        uuid.uuid4(),
+        datetime(2025, 6, 1, 12, 30, tzinfo=timezone.utc),
+        uuid.uuid4(),
+        uuid.uuid4(),
+        uuid.uuid4(),
+        TransactionType.PURCHASE,
+        PurchaseType.BY_CREDIT.value,
+        TransactionStatus.COMPLETED,
+        Decimal('100.00'),
+        Decimal('33.33'),
+        Decimal('0.33'),
+        Decimal('100.00'),
+        None,
+        None,
+    )
+
+
+class TestLedgerExport:
+    """Test class for ledger export encoding and endpoints"""
+
+    def test_ndjson_chunk_keeps_exact_amounts(self):
+        """Test that NDJSON lines carry decimals as exact strings"""
+        rows = [make_ledger_row(), make_ledger_row()]
+        lines = encode_chunk(rows, ExportFormat.NDJSON).decode().splitlines()
+
+        assert len(lines) == 2
+        record = json.loads(lines[0])
+        assert list(record) == LEDGER_FIELDS
+        assert record["price_paid"] == "33.33"
+        assert record["transaction_type"] == "PURCHASE"
+        assert record["created_at"] == "2025-06-01T12:30:00+00:00"
+
+    def test_csv_header_and_chunk(self):
+        """Test that CSV exports start with the header row"""
+        header = encode_header(ExportFormat.CSV).decode().strip()
+        body = encode_chunk([make_ledger_row()], ExportFormat.CSV).decode().strip()
+
+        assert header.split(",") == LEDGER_FIELDS
+        assert body.split(",")[9] == "33.33"
+
+    @pytest.mark.asyncio
+    async def test_wallet_export_streams_chunks(self, client, mock_session, mock_user):
+        """Test that the wallet export streams every chunk of the ledger"""
+        app.dependency_overrides[get_current_user] = lambda: mock_user.id
+        app.dependency_overrides[get_reporting_db] = lambda: mock_session
+
+        chunks = [[make_ledger_row(), make_ledger_row()], [make_ledger_row()]]
+
+        async def stream_by_filter(**kwargs):
+            for chunk in chunks:
+                yield chunk
+
+        with patch('service.wallet_service.WalletRepository') as MockWalletRepo, \
+                patch('service.transaction_service.TransactionRepository') as MockTransactionRepo:
+            MockWalletRepo.return_value.get_by_filter = AsyncMock(return_value=mock_user.wallet)
+            MockTransactionRepo.return_value.stream_by_filter = stream_by_filter
+
+            response = client.get(
+                "/api/v1/wallet/export/",
+                params={"format": "ndjson"},
+                headers={"Authorization": "Bearer test_token"}
+            )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert len(response.text.splitlines()) == 3
+
+    @pytest.mark.asyncio
+    async def test_project_export_requires_owner(self, client, mock_session, mock_user):
+        """Test that only the project owner can export its ledger"""
+        app.dependency_overrides[get_current_user] = lambda: mock_user.id
+        app.dependency_overrides[get_reporting_db] = lambda: mock_session
+
+        project = Mock()
+        project.created_by = uuid.uuid4()
+
+        with patch('service.project_service.ProjectRepository') as MockProjectRepo:
+            MockProjectRepo.return_value.get_by_id = AsyncMock(return_value=project)
+
+            response = client.get(
+                f"/api/v1/project/{uuid.uuid4()}/export/",
+                headers={"Authorization": "Bearer test_token"}
+            )
+
+        assert response.status_code == 403
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("columnar_format", ["parquet", "arrow"])
+    async def test_columnar_export_round_trip(self, columnar_format):
+        """Test that columnar exports keep decimals, enums and row counts"""
+        pa = pytest.importorskip("pyarrow")
+        import io
+        import pyarrow.parquet as pq
+        from utils.columnar_export import ColumnarFormat, encode_columnar
+
+        async def chunks():
+            for _ in range(3):
+                yield [make_ledger_row() for _ in range(4)]
+
+        data = b"".join([chunk async for chunk in encode_columnar(chunks(), ColumnarFormat(columnar_format))])
+
+        if columnar_format == "parquet":
+            table = pq.read_table(io.BytesIO(data))
+            assert pq.ParquetFile(io.BytesIO(data)).num_row_groups == 3
+        else:
+            table = pa.ipc.open_stream(data).read_all()
+
+        assert table.num_rows == 12
+        assert table.column("price_paid")[0].as_py() == Decimal('33.33')
+        assert table.schema.field("status").type == pa.dictionary(pa.int8(), pa.string())
+        assert table.column("status")[0].as_py() == "COMPLETED"
+
+    @pytest.mark.asyncio
+    async def test_columnar_batches_are_encoded_off_the_event_loop(self):
+        """Test that record batches are built and compressed outside the event loop's thread"""
+        pytest.importorskip("pyarrow")
+        import threading
+        from utils import columnar_export
+        threads = []
+        rows_to_batch = columnar_export.rows_to_batch
+
+        def recording_rows_to_batch(rows, schema):
+            threads.append(threading.current_thread())
+            return rows_to_batch(rows, schema)
+
+        async def chunks():
+            for _ in range(2):
+                yield [make_ledger_row()]
+
+        with patch("utils.columnar_export.rows_to_batch", side_effect=recording_rows_to_batch):
+            data = [chunk async for chunk in columnar_export.encode_columnar(chunks(), columnar_export.ColumnarFormat.PARQUET)]
+
+        assert data
+        assert len(threads) == 2
+        assert threading.main_thread() not in threads
@@ -0,0 +1,162 @@
+"""
+Unit tests for the count strategies of the offset pagination helpers
+"""
+import pytest
+import uuid
+from unittest.mock import AsyncMock, Mock, patch
+from sqlalchemy.dialects.postgresql import asyncpg
+from repository.user_repository import UserRepository
+from schema.pagination_schema import PaginatedRequest
+from schema.user_schema import UserResponse
+from utils.cache import TTLCache
+from utils.utils import CountStrategy
+
+
+def make_user():
+    """Mock user row"""
+    user = Mock()
+    user.id = uuid.uuid4()
+    user.username = f"user_{user.id.hex[:8]}"
+    user.email = f"{user.username}@example.com"
+    return user
+
+
+def make_result(rows=None, scalar=None):
+    """Mock result of AsyncSession.execute"""
+    result = Mock()
+    result.scalars.return_value.all.return_value = rows or []
+    result.scalar.return_value = scalar
+    return result
+
+
+class TestPaginationCount:
+    """Test class for pagination count strategies"""
+
+    @pytest.mark.asyncio
+    async def test_none_strategy_fetches_one_extra_row(self, mock_session):
+        """Test that the NONE strategy skips the count and reports has_more"""
+        mock_session.execute = AsyncMock(return_value=make_result(rows=[make_user() for _ in range(3)]))
+
+        repository = UserRepository(session=mock_session)
+        page = await repository.get_all_pagination(
+            pagination=PaginatedRequest(skip=0, limit=2),
+            response_model=UserResponse,
+            count_strategy=CountStrategy.NONE
+        )
+
+        # Only the page query ran, asking for limit + 1 rows
+        assert mock_session.execute.await_count == 1
+        assert mock_session.execute.call_args.args[0]._limit_clause.value == 3
+        assert page.has_more is True
+        assert page.total_count is None
+        assert len(page.data) == 2
+
+    @pytest.mark.asyncio
+    async def test_exact_strategy_reports_has_more(self, mock_session):
+        """Test that the EXACT strategy counts and derives has_more from the total"""
+        mock_session.execute = AsyncMock(side_effect=[
+            make_result(scalar=3),
+            make_result(rows=[make_user() for _ in range(2)])
+        ])
+
+        repository = UserRepository(session=mock_session)
+        page = await repository.get_all_pagination(
+            pagination=PaginatedRequest(skip=0, limit=2),
+            response_model=UserResponse,
+            count_strategy=CountStrategy.EXACT
+        )
+
+        assert page.total_count == 3
+        assert page.total_pages == 2
+        assert page.has_more is True
+
+    @pytest.mark.asyncio
+    async def test_cached_strategy_counts_once_per_filter_signature(self, mock_session):
+        """Test that the CACHED strategy reuses the count of identical filters"""
+        mock_session.execute = AsyncMock(side_effect=[
+            make_result(scalar=5),
+            make_result(rows=[make_user()]),
+            make_result(rows=[make_user()]),
+            make_result(scalar=1),
+            make_result(rows=[make_user()]),
+        ])
+
+        repository = UserRepository(session=mock_session)
+        username_filter = lambda name: [repository.model.username == name]
+
+        with patch('repository.base_repository._count_cache', TTLCache(maxsize=16, ttl=60)):
+            first = await repository.get_all_pagination(
+                pagination=PaginatedRequest(skip=0, limit=1),
+                response_model=UserResponse,
+                filters=username_filter("alice"),
+                count_strategy=CountStrategy.CACHED
+            )
+            second = await repository.get_all_pagination(
+                pagination=PaginatedRequest(skip=1, limit=1),
+                response_model=UserResponse,
+                filters=username_filter("alice"),
+                count_strategy=CountStrategy.CACHED
+            )
+            other = await repository.get_all_pagination(
+                pagination=PaginatedRequest(skip=0, limit=1),
+                response_model=UserResponse,
+                filters=username_filter("bob"),
+                count_strategy=CountStrategy.CACHED
+            )
+
+        assert first.total_count == second.total_count == 5
+        assert other.total_count == 1
+        assert mock_session.execute.await_count == 5
+
+
+    @pytest.mark.asyncio
+    async def test_estimated_strategy_explains_with_bound_parameters(self, mock_session):
+        """Test that filter values reach EXPLAIN as bound parameters, not rendered into the SQL"""
+        connection = Mock()
+        connection.execute = AsyncMock(return_value=make_result(scalar=[{"Plan": {"Plan Rows": 42}}]))
+        mock_session.connection = AsyncMock(return_value=connection)
+        mock_session.execute = AsyncMock(return_value=make_result(rows=[make_user()]))
+
+        repository = UserRepository(session=mock_session)
+        page = await repository.get_all_pagination(
+            pagination=PaginatedRequest(skip=0, limit=1),
+            response_model=UserResponse,
+            filters=[repository.model.username == "o'brien"],
+            count_strategy=CountStrategy.ESTIMATED
+        )
+
+        assert page.total_count == 42
+        compiled = connection.execute.call_args.args[0].compile(dialect=asyncpg.dialect())
+        assert str(compiled).startswith("EXPLAIN (FORMAT JSON) SELECT")
+        assert "o'brien" not in str(compiled)
+        assert "o'brien" in compiled.params.values()
+
+
+class TestTTLCache:
+    """Test class for the per-process TTL cache"""
+
+    def test_entries_expire(self):
+        """Test that entries are dropped once their TTL elapsed"""
+        cache = TTLCache(maxsize=4, ttl=10)
+
+        with patch('utils.cache.time.monotonic', return_value=100.0):
+            cache.set("key", "value", ttl=5)
+        with patch('utils.cache.time.monotonic', return_value=104.0):
+            assert cache.get("key") == "value"
+        with patch('utils.cache.time.monotonic', return_value=105.0):
+            assert cache.get("key") is None
+
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_least_recently_used_is_evicted(self):
+        """Test that the cache stays bounded by evicting the LRU entry"""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.stats()["evictions"] == 1
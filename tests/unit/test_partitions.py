@@ -0,0 +1,29 @@
+"""
+Unit tests for the monthly transaction partitions
+"""
+from datetime import datetime, timezone
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+from model.transaction import Transaction
+from utils.partitions import monthly_partitions
+
+
+class TestPartitions:
+    """Test class for partition naming, bounds and the partitioned model"""
+
+    def test_monthly_partitions_cross_year(self):
+        """Test that partition bounds are contiguous UTC month starts"""
+        partitions = monthly_partitions("transaction", datetime(2025, 11, 20, 15, tzinfo=timezone.utc), 3)
+
+        assert [name for name, _, _ in partitions] == [
+            "transaction_y2025m11", "transaction_y2025m12", "transaction_y2026m01"
+        ]
+        assert partitions[0][1] == datetime(2025, 11, 1, tzinfo=timezone.utc)
+        assert partitions[1][2] == partitions[2][1] == datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    def test_transaction_table_is_range_partitioned(self):
+        """Test that the partition key is part of the primary key"""
+        ddl = str(CreateTable(Transaction.__table__).compile(dialect=postgresql.dialect()))
+
+        assert "PRIMARY KEY (id, created_at)" in ddl
+        assert "PARTITION BY RANGE (created_at)" in ddl
@@ -0,0 +1,77 @@
+"""
+Unit tests for the pooled password hasher
+"""
+import asyncio
+import threading
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+from fastapi import HTTPException
+from config.password_hasher import PasswordHasher
+from schema.user_schema import SignInRequest
+from service.user_service import UserService
+
+
+class TestPasswordHasher:
+    """Test class for PasswordHasher and rehash-on-login"""
+
+    @pytest.mark.asyncio
+    async def test_hash_and_verify(self):
+        """Test that hashes made on the pool verify"""
+        hasher = PasswordHasher(rounds=4, workers=2)
+        hashed = await hasher.hash("s3cret")
+
+        assert await hasher.verify("s3cret", hashed)
+        assert not await hasher.verify("wrong", hashed)
+        hasher.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_verify_and_update_rehashes_on_cost_change(self):
+        """Test that a hash with an outdated cost is replaced on verification"""
+        old_hash = await PasswordHasher(rounds=4).hash("s3cret")
+        hasher = PasswordHasher(rounds=5)
+
+        valid, new_hash = await hasher.verify_and_update("s3cret", old_hash)
+
+        assert valid and new_hash is not None
+        assert "$05$" in new_hash
+        assert await hasher.verify_and_update("s3cret", new_hash) == (True, None)
+        assert hasher.stats()["rehashed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_saturated_pool_rejects_with_503(self):
+        """Test that calls beyond workers + queue_size are rejected"""
+        hasher = PasswordHasher(rounds=4, workers=1, queue_size=1)
+        release = threading.Event()
+
+        busy = [asyncio.create_task(hasher._run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        with pytest.raises(HTTPException) as exc_info:
+            await hasher.hash("s3cret")
+
+        release.set()
+        await asyncio.gather(*busy)
+        assert exc_info.value.status_code == 503
+        assert exc_info.value.headers["Retry-After"] == "1"
+        assert hasher.stats()["rejected"] == 1
+        hasher.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_sign_in_stores_upgraded_hash(self, mock_session):
+        """Test that sign-in persists the replacement hash"""
+        user = Mock()
+        user.password = "old-hash"
+
+        with patch('service.user_service.UserRepository') as MockUserRepo, \
+                patch('service.user_service.password_hasher') as hasher:
+            MockUserRepo.return_value.get_by_filter = AsyncMock(return_value=user)
+            MockUserRepo.return_value.update = AsyncMock(return_value=user)
+            hasher.verify_and_update = AsyncMock(return_value=(True, "new-hash"))
+
+            result = await UserService(session=mock_session).sign_in(
+                SignInRequest(email="user@example.com", password="s3cret")
+            )
+
+        assert result["token_type"] == "bearer"
+        assert user.password == "new-hash"
+        MockUserRepo.return_value.update.assert_awaited_once()
@@ -0,0 +1,74 @@
+"""
+Unit tests for connection pool instrumentation
+"""
+import pytest
+from unittest.mock import Mock
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.util import greenlet_spawn
+from config.database import async_engine, maintenance_engine, reporting_engine
+from config.pool_metrics import InstrumentedQueuePool, POOLS, instrument
+from config.settings import settings
+from utils.utils import API_SECRET_KEY
+
+
+@pytest.fixture
+def pool_metrics():
+    pool = InstrumentedQueuePool(creator=Mock, pool_size=1, max_overflow=1, timeout=0.01)
+    metrics = instrument(Mock(sync_engine=Mock(pool=pool)), "test")
+    yield pool, metrics
+    POOLS.pop("test", None)
+
+
+class TestPoolMetrics:
+    """Test class for PoolMetrics and InstrumentedQueuePool"""
+
+    def test_checkouts_and_overflow_are_counted(self, pool_metrics):
+        """Test that checkouts, checkins and overflow connections are reported"""
+        pool, metrics = pool_metrics
+
+        first, second = pool.connect(), pool.connect()
+        stats = metrics.stats()
+        assert stats["checked_out"] == 2
+        assert stats["overflow"] == 1
+        assert stats["connects"] == 2
+
+        first.close()
+        second.close()
+        stats = metrics.stats()
+        assert stats["checkouts"] == stats["checkins"] == 2
+        assert stats["checked_out"] == 0
+        assert stats["wait_ms_max"] >= stats["wait_ms_p50"] >= 0
+
+    @pytest.mark.asyncio
+    async def test_exhausted_pool_counts_timeouts(self, pool_metrics):
+        """Test that a checkout timing out on an exhausted pool is counted"""
+        pool, metrics = pool_metrics
+
+        def exhaust():
+            held = [pool.connect(), pool.connect()]
+            try:
+                pool.connect()
+            finally:
+                for connection in held:
+                    connection.close()
+
+        # Waiting for a connection needs the greenlet context of an async engine
+        with pytest.raises(PoolTimeoutError):
+            await greenlet_spawn(exhaust)
+
+        assert metrics.stats()["timeouts"] == 1
+
+    def test_pool_metrics_endpoint(self, client):
+        """Test that the metrics endpoint reports the transactional pool"""
+        response = client.get("/api/v1/metrics/pool/", headers={"X-API-Key": API_SECRET_KEY})
+
+        assert response.status_code == 200
+        assert response.json()["detail"]["transactional"]["checked_out"] == 0
+
+    def test_workload_pools_are_isolated(self):
+        """Test that each workload has its own pool, limits and statement timeout"""
+        pools = [engine.sync_engine.pool for engine in (async_engine, reporting_engine, maintenance_engine)]
+        assert len({id(pool) for pool in pools}) == 3
+        assert reporting_engine.sync_engine.pool.size() == settings.DB_REPORTING_POOL_SIZE
+        assert maintenance_engine.sync_engine.pool.size() == settings.DB_MAINTENANCE_POOL_SIZE
+        assert {"transactional", "reporting", "maintenance"} <= POOLS.keys()
@@ -0,0 +1,105 @@
+"""
+Unit tests for the project catalog cache
+"""
+import uuid
+import pytest
+from decimal import Decimal
+from unittest.mock import AsyncMock, Mock
+from fastapi import HTTPException
+from config.invalidation_bus import _apply_invalidations
+from repository.project_repository import (
+    ProjectCatalogEntry,
+    ProjectRepository,
+    project_catalog_cache,
+    project_unavailable_cache
+)
+from schema.transaction_schema import PurchaseRequest
+from service.transaction_service import TransactionService
+
+
+@pytest.fixture(autouse=True)
+def clear_catalog_caches():
+    project_catalog_cache.clear()
+    project_unavailable_cache.clear()
+    yield
+    project_catalog_cache.clear()
+    project_unavailable_cache.clear()
+
+
+def catalog_row(project_id: uuid.UUID, is_active: bool = True, sold_out: bool = False) -> Mock:
+    row = Mock()
+    row._mapping = {
+        "id": project_id,
+        "name": "Forest",
+        "price_per_credit": Decimal('0.10'),
+        "is_active": is_active,
+        "sold_out": sold_out,
+    }
+    result = Mock()
+    result.one_or_none.return_value = row
+    return result
+
+
+class TestProjectCatalogCache:
+    """Test class for ProjectRepository catalog caching"""
+
+    @pytest.mark.asyncio
+    async def test_repeated_lookup_skips_database(self, mock_session):
+        """Test that a purchasable project is served from the catalog cache"""
+        project_id = uuid.uuid4()
+        mock_session.execute = AsyncMock(return_value=catalog_row(project_id))
+        repository = ProjectRepository(session=mock_session)
+
+        first = await repository.get_catalog_entry(project_id)
+        second = await repository.get_catalog_entry(project_id)
+
+        assert first is second and first.available
+        assert mock_session.execute.await_count == 1
+        assert len(project_catalog_cache) == 1
+
+    @pytest.mark.asyncio
+    async def test_sold_out_project_goes_to_negative_cache(self, mock_session):
+        """Test that sold-out projects are cached separately and rejected"""
+        project_id = uuid.uuid4()
+        mock_session.execute = AsyncMock(return_value=catalog_row(project_id, sold_out=True))
+        await ProjectRepository(session=mock_session).get_catalog_entry(project_id)
+
+        assert len(project_catalog_cache) == 0
+        assert project_unavailable_cache.get(project_id).sold_out
+
+        with pytest.raises(HTTPException) as exc_info:
+            TransactionService.check_project_available(project_unavailable_cache.get(project_id))
+        assert exc_info.value.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_atomic_purchase_rejects_cached_unavailable_project(self, mock_session):
+        """Test that a cached inactive project is rejected without a round trip"""
+        project_id = uuid.uuid4()
+        project_unavailable_cache.set(
+            project_id,
+            ProjectCatalogEntry(project_id, "Forest", Decimal('0.10'), is_active=False, sold_out=False)
+        )
+
+        with pytest.raises(HTTPException) as exc_info:
+            await TransactionService(session=mock_session).purchase_atomic(
+                user_id=uuid.uuid4(),
+                data=PurchaseRequest(project_id=project_id, amount=10, purchase_type="BY_CREDIT")
+            )
+
+        assert exc_info.value.status_code == 404
+        mock_session.execute.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_project_update_invalidates(self, mock_session):
+        """Test that updating a project drops it from both caches"""
+        project_id = uuid.uuid4()
+        entry = ProjectCatalogEntry(project_id, "Forest", Decimal('0.10'), is_active=True, sold_out=False)
+        project_catalog_cache.set(project_id, entry)
+        project_unavailable_cache.set(project_id, entry)
+
+        mock_session.info = {}
+        mock_session.commit.side_effect = lambda: _apply_invalidations(mock_session)
+        await ProjectRepository(session=mock_session).update(obj=Mock(id=project_id))
+
+        assert len(project_catalog_cache) == 0
+        assert len(project_unavailable_cache) == 0
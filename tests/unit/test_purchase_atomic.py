@@ -0,0 +1,115 @@
+"""
+Unit tests for the single-statement (atomic) purchase engine
+"""
+import pytest
+import uuid
+from decimal import Decimal
+from unittest.mock import AsyncMock, Mock, patch
+from main import app
+from config.jwt_provider import get_current_user
+from config.database import get_db
+from utils.utils import PurchaseType, TransactionType, TransactionStatus
+from tests.fixtures.purchase_fixtures import *
+
+
+def make_atomic_result(**overrides):
+    """Build a row-like result of TransactionRepository.purchase_atomic"""
+    values = {
+        "project_found": 1,
+        "credits_available": True,
+        "wallet_found": 1,
+        "debited": 1,
+        "reserved": 1,
+        "id": uuid.uuid4(),
+        "user_id": uuid.uuid4(),
+        "project_id": uuid.uuid4(),
+        "wallet_id": uuid.uuid4(),
+        "transaction_type": TransactionType.PURCHASE,
+        "purchase_type": PurchaseType.BY_CREDIT,
+        "credit_amount": Decimal('100.00'),
+        "price_paid": Decimal('10.00'),
+        "price_per_credit": Decimal('0.10'),
+        "requested_credits": Decimal('100.00'),
+        "requested_budget": None,
+        "reference": None,
+        "status": TransactionStatus.COMPLETED,
+    }
+    values.update(overrides)
+    result = Mock(**values)
+    result._mapping = values
+    return result
+
+
+class TestAtomicPurchase:
+    """Test class for the atomic purchase engine"""
+
+    def _post(self, client, mock_session, mock_user, result, purchase_request):
+        app.dependency_overrides[get_current_user] = lambda: mock_user.id
+        app.dependency_overrides[get_db] = lambda: mock_session
+
+        # Let exceptions raised inside `session.begin()` propagate
+        mock_session.begin.return_value.__aexit__ = AsyncMock(return_value=False)
+
+        with patch('service.transaction_service.settings.PURCHASE_ENGINE', "atomic"), \
+                patch('service.transaction_service.UserRepository') as MockUserRepo, \
+                patch('service.transaction_service.ProjectRepository') as MockProjectRepo, \
+                patch('service.transaction_service.TransactionRepository') as MockTransactionRepo:
+
+            MockTransactionRepo.return_value.purchase_atomic = AsyncMock(return_value=result)
+            MockProjectRepo.return_value.cached_entry.return_value = None
+            MockProjectRepo.return_value.get_catalog_entry = AsyncMock(return_value=None)
+            MockUserRepo.return_value.get_identity = AsyncMock(return_value=None)
+
+            response = client.post(
+                "/api/v1/transaction/purchase/",
+                json=purchase_request,
+                headers={"Authorization": "Bearer test_token"}
+            )
+
+            # The atomic engine never loads the user or the project
+            MockUserRepo.return_value.get_by_id.assert_not_called()
+            MockProjectRepo.return_value.get_by_id.assert_not_called()
+            return response
+
+    @pytest.mark.asyncio
+    async def test_atomic_purchase_success(
+        self,
+        client,
+        mock_session,
+        mock_user,
+        purchase_request_by_credit
+    ):
+        """Test successful single-statement purchase"""
+        response = self._post(
+            client, mock_session, mock_user, make_atomic_result(), purchase_request_by_credit
+        )
+
+        assert response.status_code == 201
+        assert response.json()["msg"] == "Purchased Successfully"
+        assert response.json()["detail"]["credit_amount"] == 100.0
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("overrides,status_code,detail", [
+        ({"project_found": 0}, 404, "Project not found"),
+        ({"wallet_found": 0}, 404, "User not found"),
+        ({"credits_available": False, "debited": 0, "reserved": 0}, 400, "Insufficient project credits"),
+        ({"debited": 0, "reserved": 0}, 400, "Insufficient wallet funds"),
+        ({"reserved": 0}, 400, "Insufficient project credits"),
+    ])
+    async def test_atomic_purchase_guard_failures(
+        self,
+        client,
+        mock_session,
+        mock_user,
+        purchase_request_by_credit,
+        overrides,
+        status_code,
+        detail
+    ):
+        """Test that affected-row counts are reported as purchase errors"""
+        response = self._post(
+            client, mock_session, mock_user, make_atomic_result(**overrides), purchase_request_by_credit
+        )
+
+        assert response.status_code == status_code
+        assert response.json()["detail"] == detail
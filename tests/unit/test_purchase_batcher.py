@@ -0,0 +1,135 @@
+"""
+Unit tests for the purchase micro-batcher and the batch repository method
+"""
+import asyncio
+import pytest
+import uuid
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
+from fastapi import HTTPException
+from repository.transaction_repository import (
+    IDEMPOTENCY_KEY_TAKEN_OVER,
+    INSUFFICIENT_CREDITS,
+    INSUFFICIENT_FUNDS,
+    WALLET_NOT_FOUND,
+    BatchPurchase,
+    PurchaseBatchResult,
+    TransactionRepository,
+)
+from service.purchase_batcher import PurchaseBatcher
+from utils.utils import PurchaseType
+
+
+def mock_sessionmaker() -> Mock:
+    """Sessionmaker of a session whose transactions always commit"""
+    session = Mock()
+    session.begin = Mock(side_effect=lambda: MagicMock(__aenter__=AsyncMock(), __aexit__=AsyncMock(return_value=False)))
+    return Mock(return_value=MagicMock(__aenter__=AsyncMock(return_value=session), __aexit__=AsyncMock(return_value=False)))
+
+
+class TestPurchaseBatcher:
+    """Test class for PurchaseBatcher"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_purchases_share_one_batch(self):
+        """Test that purchases of a project within the window are applied together"""
+        project_id = uuid.uuid4()
+        committed = Mock(_mapping={"id": uuid.uuid4()})
+        result = PurchaseBatchResult(
+            transactions=[committed, None],
+            rejections=[None, INSUFFICIENT_FUNDS],
+            remaining_credits=Decimal('900.00')
+        )
+        batcher = PurchaseBatcher(sessionmaker=mock_sessionmaker(), window_ms=5, max_size=100)
+
+        with patch('service.purchase_batcher.TransactionRepository') as MockRepo:
+            MockRepo.return_value.purchase_batch = AsyncMock(return_value=result)
+            outcomes = await asyncio.gather(
+                batcher.submit(uuid.uuid4(), project_id, Decimal('1.00'), PurchaseType.BY_CREDIT),
+                batcher.submit(uuid.uuid4(), project_id, Decimal('2.00'), PurchaseType.BY_CREDIT),
+                return_exceptions=True
+            )
+
+        MockRepo.return_value.purchase_batch.assert_awaited_once()
+        assert len(MockRepo.return_value.purchase_batch.call_args.kwargs["purchases"]) == 2
+        assert outcomes[0] is committed
+        assert isinstance(outcomes[1], HTTPException)
+        assert outcomes[1].status_code == 400
+        assert outcomes[1].detail == "Insufficient wallet funds"
+        assert batcher.stats()["batches"] == 1
+        assert batcher.stats()["queued"] == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_fails_every_purchase(self):
+        """Test that an error applying the batch reaches every caller"""
+        project_id = uuid.uuid4()
+        batcher = PurchaseBatcher(sessionmaker=mock_sessionmaker(), window_ms=1, max_size=100)
+
+        with patch('service.purchase_batcher.TransactionRepository') as MockRepo:
+            MockRepo.return_value.purchase_batch = AsyncMock(side_effect=RuntimeError("connection lost"))
+            outcomes = await asyncio.gather(
+                *(batcher.submit(uuid.uuid4(), project_id, Decimal('1.00'), PurchaseType.BY_CREDIT) for _ in range(3)),
+                return_exceptions=True
+            )
+
+        assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+        assert batcher.stats()["failed_batches"] == 1
+
+
+class TestPurchaseBatchRepository:
+    """Test class for TransactionRepository.purchase_batch"""
+
+    @pytest.mark.asyncio
+    async def test_purchases_are_checked_in_order_against_running_totals(self):
+        """Test that each purchase sees the balance and credits left by earlier ones"""
+        project_id = uuid.uuid4()
+        rich, poor, unknown = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        wallets = [
+            Mock(id=uuid.uuid4(), user_id=rich, balance=Decimal('100.00')),
+            Mock(id=uuid.uuid4(), user_id=poor, balance=Decimal('15.00')),
+        ]
+        project = Mock(price_per_credit=Decimal('10.00'), available_credits=Decimal('5.00'))
+        project.name = "Hot project"
+
+        accepted_key, rejected_key, taken_over_key = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        session = AsyncMock()
+        session.info = {}
+        session.execute.side_effect = [
+            wallets,
+            Mock(one_or_none=Mock(return_value=project)),
+            Mock(scalars=Mock(return_value=Mock(all=Mock(return_value=[accepted_key, rejected_key])))),  # held claims
+            Mock(),  # wallet debit
+            Mock(),  # project decrement
+            ["row-1", "row-2"],  # inserted transactions
+            Mock(),  # claims marked committed
+        ]
+        purchases = [
+            BatchPurchase(user_id=poor, amount=Decimal('1.00'), purchase_type=PurchaseType.BY_CREDIT,
+                          idempotency_keys=frozenset({accepted_key})),
+            BatchPurchase(user_id=poor, amount=Decimal('1.00'), purchase_type=PurchaseType.BY_CREDIT,
+                          idempotency_keys=frozenset({rejected_key})),
+            BatchPurchase(user_id=unknown, amount=Decimal('1.00'), purchase_type=PurchaseType.BY_CREDIT),
+            BatchPurchase(user_id=rich, amount=Decimal('1.00'), purchase_type=PurchaseType.BY_CREDIT,
+                          idempotency_keys=frozenset({taken_over_key})),
+            BatchPurchase(user_id=rich, amount=Decimal('40.05'), purchase_type=PurchaseType.BY_BUDGET),
+            BatchPurchase(user_id=rich, amount=Decimal('1.00'), purchase_type=PurchaseType.BY_CREDIT),
+        ]
+
+        result = await TransactionRepository(session).purchase_batch(project_id, purchases)
+
+        assert result.rejections == [
+            None, INSUFFICIENT_FUNDS, WALLET_NOT_FOUND, IDEMPOTENCY_KEY_TAKEN_OVER, None, INSUFFICIENT_CREDITS
+        ]
+        assert result.transactions == ["row-1", None, None, None, "row-2", None]
+        # 1 credit, then 4 credits for a 40.05 budget floored to whole cents of credit
+        assert result.remaining_credits == Decimal('0.00')
+        assert session.execute.await_count == 7
+        # Selling out notifies the other workers on commit
+        assert session.info["pending_invalidations"] == {("project", str(project_id))}
+        # The batch's claims are locked, and only the applied purchases' keys
+        # are marked committed, in the batch's own transaction
+        held_claims = session.execute.await_args_list[2].args[0]
+        assert held_claims._for_update_arg is not None
+        marked = session.execute.await_args_list[6].args[0].compile().params
+        assert [accepted_key] in marked.values()
+        assert "pending_idempotency_keys" not in session.info
@@ -32,6 +32,8 @@ class TestPurchaseEdgeCases:
         mock_project = Mock()
         mock_project.id = uuid.uuid4()
         mock_project.price_per_credit = Decimal('0.33')
+        mock_project.is_active = True
+        mock_project.sold_out = False
         mock_project.has_sufficient_credits = AsyncMock(return_value=True)
         mock_project.reserve_credits = AsyncMock()
 
@@ -55,8 +57,10 @@ class TestPurchaseEdgeCases:
             service.repository = MockTransactionRepo.return_value
 
             # Set return values on the repo methods
-            service.user_repository.get_by_id = AsyncMock(return_value=mock_user)
-            service.project_repository.get_by_id = AsyncMock(return_value=mock_project)
+            service.user_repository.get_wallet = AsyncMock(return_value=mock_user.wallet)
+            service.user_repository.get_identity = AsyncMock(return_value=Mock(wallet_id=mock_user.wallet.id))
+            service.project_repository.get_catalog_entry = AsyncMock(return_value=mock_project)
+            service.project_repository.reserve_credits = AsyncMock(return_value=Decimal('1000.00'))
             service.repository.create = AsyncMock(return_value=mock_transaction)
 
             response = client.post(
@@ -103,8 +107,10 @@ class TestPurchaseEdgeCases:
             service.repository = MockTransactionRepo.return_value
 
             # Set return values on the repo methods
-            service.user_repository.get_by_id = AsyncMock(return_value=mock_user)
-            service.project_repository.get_by_id = AsyncMock(return_value=mock_project)
+            service.user_repository.get_wallet = AsyncMock(return_value=mock_user.wallet)
+            service.user_repository.get_identity = AsyncMock(return_value=Mock(wallet_id=mock_user.wallet.id))
+            service.project_repository.get_catalog_entry = AsyncMock(return_value=mock_project)
+            service.project_repository.reserve_credits = AsyncMock(return_value=Decimal('1000.00'))
             service.repository.create = AsyncMock(return_value=mock_transaction)
             
             # Make request
@@ -147,8 +153,10 @@ class TestPurchaseEdgeCases:
             service.repository = MockTransactionRepo.return_value
 
             # Set return values on the repo methods
-            service.user_repository.get_by_id = AsyncMock(return_value=mock_user)
-            service.project_repository.get_by_id = AsyncMock(return_value=mock_project)
+            service.user_repository.get_wallet = AsyncMock(return_value=mock_user.wallet)
+            service.user_repository.get_identity = AsyncMock(return_value=Mock(wallet_id=mock_user.wallet.id))
+            service.project_repository.get_catalog_entry = AsyncMock(return_value=mock_project)
+            service.project_repository.reserve_credits = AsyncMock(return_value=Decimal('1000.00'))
             service.repository.create = AsyncMock(return_value=mock_transaction)
             
             # Make request
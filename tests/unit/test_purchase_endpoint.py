@@ -6,7 +6,8 @@ from main import app
 from config.jwt_provider import get_current_user
 from config.database import get_db
 import uuid
-from unittest.mock import AsyncMock, patch
+from decimal import Decimal
+from unittest.mock import AsyncMock, Mock, patch
 from service.transaction_service import TransactionService
 from tests.fixtures.purchase_fixtures import *
 
@@ -43,8 +44,10 @@ class TestPurchaseEndpoint:
             service.repository = MockTransactionRepo.return_value
 
             # Set return values on the repo methods
-            service.user_repository.get_by_id = AsyncMock(return_value=mock_user)
-            service.project_repository.get_by_id = AsyncMock(return_value=mock_project)
+            service.user_repository.get_wallet = AsyncMock(return_value=mock_user.wallet)
+            service.user_repository.get_identity = AsyncMock(return_value=Mock(wallet_id=mock_user.wallet.id))
+            service.project_repository.get_catalog_entry = AsyncMock(return_value=mock_project)
+            service.project_repository.reserve_credits = AsyncMock(return_value=Decimal('1000.00'))
             service.repository.create = AsyncMock(return_value=mock_transaction)
             
             # Make request
@@ -89,8 +92,10 @@ class TestPurchaseEndpoint:
             service.repository = MockTransactionRepo.return_value
 
             # Set return values on the repo methods
-            service.user_repository.get_by_id = AsyncMock(return_value=mock_user)
-            service.project_repository.get_by_id = AsyncMock(return_value=mock_project)
+            service.user_repository.get_wallet = AsyncMock(return_value=mock_user.wallet)
+            service.user_repository.get_identity = AsyncMock(return_value=Mock(wallet_id=mock_user.wallet.id))
+            service.project_repository.get_catalog_entry = AsyncMock(return_value=mock_project)
+            service.project_repository.reserve_credits = AsyncMock(return_value=Decimal('1000.00'))
             service.repository.create = AsyncMock(return_value=mock_transaction)
             
             # Make request
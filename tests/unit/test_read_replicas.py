@@ -0,0 +1,110 @@
+"""
+Unit tests for read-replica routing and read-your-writes
+"""
+import uuid
+import pytest
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
+from config.read_replicas import ReplicaRouter, get_read_db, replica_urls
+
+
+def replica_sessionmaker(replayed: bool = True) -> Mock:
+    """Sessionmaker whose session reports whether the pinned LSN has replayed"""
+    session = AsyncMock()
+    session.execute.return_value = Mock(scalar=Mock(return_value=replayed))
+    return Mock(return_value=MagicMock(__aenter__=AsyncMock(return_value=session), __aexit__=AsyncMock(return_value=False)))
+
+
+async def read_session(router: ReplicaRouter, user_id: uuid.UUID, primary):
+    with patch('config.read_replicas.replica_router', router):
+        dependency = get_read_db(user_id=user_id, primary=primary)
+        session = await dependency.__anext__()
+        await dependency.aclose()
+        return session
+
+
+class TestReadReplicas:
+    """Test class for ReplicaRouter and get_read_db"""
+
+    @pytest.mark.asyncio
+    async def test_without_replicas_reads_use_primary(self):
+        """Test that the primary session is used when no replica is configured"""
+        primary = Mock()
+        router = ReplicaRouter(sessionmakers=[], read_your_writes=True, pin_seconds=30)
+
+        assert await read_session(router, uuid.uuid4(), primary) is primary
+        assert router.read_your_writes is False
+
+    @pytest.mark.asyncio
+    async def test_replicas_are_used_round_robin(self):
+        """Test that reads alternate between replicas"""
+        first, second = replica_sessionmaker(), replica_sessionmaker()
+        router = ReplicaRouter(sessionmakers=[first, second], read_your_writes=False, pin_seconds=30)
+
+        for _ in range(4):
+            await read_session(router, uuid.uuid4(), Mock())
+
+        assert first.call_count == second.call_count == 2
+        assert router.stats()["replica_reads"] == 4
+
+    @pytest.mark.asyncio
+    async def test_pinned_user_reads_primary_until_replayed(self):
+        """Test that a user's reads stay on the primary until the replica catches up"""
+        user_id, primary = uuid.uuid4(), Mock()
+        lagging = ReplicaRouter(sessionmakers=[replica_sessionmaker(replayed=False)], read_your_writes=True, pin_seconds=30)
+        lagging.pin(f"{user_id}:0/16B3748")
+
+        assert await read_session(lagging, user_id, primary) is primary
+        assert await read_session(lagging, uuid.uuid4(), primary) is not primary
+        assert lagging.stats()["pinned_reads"] == 1
+
+        caught_up = ReplicaRouter(sessionmakers=[replica_sessionmaker(replayed=True)], read_your_writes=True, pin_seconds=30)
+        caught_up.pin(f"{user_id}:0/16B3748")
+
+        assert await read_session(caught_up, user_id, primary) is not primary
+
+    @pytest.mark.asyncio
+    async def test_one_caught_up_replica_does_not_unpin_the_others(self):
+        """Test that after one replica catches up, a read routed to a lagging one still goes to the primary"""
+        user_id, primary = uuid.uuid4(), Mock()
+        router = ReplicaRouter(
+            sessionmakers=[replica_sessionmaker(replayed=True), replica_sessionmaker(replayed=False)],
+            read_your_writes=True,
+            pin_seconds=30
+        )
+        router.pin(f"{user_id}:0/16B3748")
+
+        assert await read_session(router, user_id, primary) is not primary
+        assert await read_session(router, user_id, primary) is primary
+        assert router.stats()["pinned_users"] == 1
+
+    @pytest.mark.asyncio
+    async def test_record_write_publishes_position(self, mock_session):
+        """Test that a committed write publishes the primary's WAL position"""
+        user_id = uuid.uuid4()
+        router = ReplicaRouter(sessionmakers=[replica_sessionmaker()], read_your_writes=True, pin_seconds=30)
+        mock_session.execute.return_value = Mock(scalar_one=Mock(return_value="0/16B3748"))
+
+        with patch('config.read_replicas.invalidation_bus') as bus:
+            await router.record_write(mock_session, user_id)
+
+        bus.publish.assert_called_once_with(mock_session, "write_lsn", f"{user_id}:0/16B3748")
+        mock_session.commit.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_record_write_failure_does_not_fail_the_write(self, mock_session):
+        """Test that a failed WAL position lookup is counted and rolled back instead of raised"""
+        router = ReplicaRouter(sessionmakers=[replica_sessionmaker()], read_your_writes=True, pin_seconds=30)
+        mock_session.execute.side_effect = ConnectionResetError("connection lost")
+
+        await router.record_write(mock_session, uuid.uuid4())
+
+        mock_session.rollback.assert_awaited_once()
+        mock_session.commit.assert_not_awaited()
+        assert router.stats()["pin_failures"] == 1
+
+    def test_replica_urls(self):
+        """Test that the replica list is parsed from a comma-separated setting"""
+        assert replica_urls("") == []
+        assert replica_urls(" postgresql+asyncpg://a/db, postgresql+asyncpg://b/db ") == [
+            "postgresql+asyncpg://a/db", "postgresql+asyncpg://b/db"
+        ]
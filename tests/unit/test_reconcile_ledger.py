@@ -0,0 +1,77 @@
+"""
+Unit tests for the ledger reconciliation job
+"""
+import uuid
+import numpy as np
+import pytest
+from unittest.mock import AsyncMock
+from jobs.reconcile_ledger import (
+    KEY_DTYPE,
+    NO_PROJECT,
+    WALLET_FIELDS,
+    aggregate_chunk,
+    compare,
+    import_snapshot,
+    merge_sums,
+    wallet_id_ranges,
+)
+from utils.utils import TransactionType
+
+
+class TestReconcileLedger:
+    """Test class for the vectorized reconciliation helpers"""
+
+    def test_aggregate_chunk_applies_sign_rules(self):
+        """Test that wallet and project sums follow the ledger sign rules"""
+        wallet = uuid.UUID("11111111-1111-4111-8111-111111111111").bytes
+        project = uuid.UUID("22222222-2222-4222-8222-222222222222").bytes
+        rows = [
+            (wallet, NO_PROJECT, TransactionType.TOPUP, 0, 10000),
+            (wallet, project, TransactionType.PURCHASE, 5000, 2500),
+            (wallet, project, TransactionType.REFUND, 1000, 500),
+        ]
+
+        wallet_keys, wallet_sums, project_keys, project_sums = aggregate_chunk(rows)
+
+        assert wallet_keys.tolist() == [wallet]
+        # balance, credit_balance, total_invested in cents
+        assert wallet_sums.tolist() == [[8000, 6000, 2500]]
+        sums = dict(zip(project_keys.tolist(), project_sums[:, 0].tolist()))
+        assert sums[project] == -4000
+
+    def test_merge_and_compare_report_drifts(self):
+        """Test that merged chunk sums are compared against stored values"""
+        first, second = uuid.UUID(int=1).bytes, uuid.UUID(int=2 << 64).bytes
+        parts = [
+            (np.array([first], dtype=KEY_DTYPE), np.array([[100, 0, 0]])),
+            (np.array([first, second], dtype=KEY_DTYPE), np.array([[50, 0, 0], [7, 0, 0]])),
+        ]
+        expected_keys, expected = merge_sums(parts, len(WALLET_FIELDS))
+
+        stored_keys = np.array([first, second], dtype=KEY_DTYPE)
+        stored = np.array([[150, 0, 0], [9, 0, 0]], dtype=np.int64)
+        drifts = list(compare("wallet", WALLET_FIELDS, stored_keys, stored, expected_keys, expected))
+
+        assert len(drifts) == 1
+        assert drifts[0].id == str(uuid.UUID(bytes=second))
+        assert (drifts[0].field, drifts[0].stored, drifts[0].expected) == ("balance", "0.09", "0.07")
+
+    def test_wallet_id_ranges_cover_uuid_space(self):
+        """Test that wallet-id ranges are contiguous and unbounded at the ends"""
+        ranges = wallet_id_ranges(4)
+
+        assert len(ranges) == 4
+        assert ranges[0][0] is None and ranges[-1][1] is None
+        assert all(upper == lower for (_, upper), (lower, _) in zip(ranges, ranges[1:]))
+
+    @pytest.mark.asyncio
+    async def test_workers_import_the_exported_snapshot(self):
+        """Test that a worker's transaction adopts the parent's snapshot and rejects anything else"""
+        connection = AsyncMock()
+
+        await import_snapshot(connection, "00000003-0000001B-1")
+
+        statement = connection.execute.await_args.args[0]
+        assert str(statement) == "SET TRANSACTION SNAPSHOT '00000003-0000001B-1'"
+        with pytest.raises(ValueError):
+            await import_snapshot(connection, "1'; DROP TABLE wallet; --")
@@ -0,0 +1,59 @@
+"""
+Unit tests for the verified-token cache
+"""
+import time
+import uuid
+import pytest
+from datetime import timedelta
+from unittest.mock import patch
+from fastapi import HTTPException
+from jose import JWTError, jwt
+from config.jwt_provider import create_access_token, token_cache, verify_access_token
+
+
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    token_cache.clear()
+    yield
+    token_cache.clear()
+
+
+class TestTokenCache:
+    """Test class for verify_access_token caching"""
+
+    def test_repeated_verification_skips_decode(self):
+        """Test that a verified token is served from the cache"""
+        user_id = uuid.uuid4()
+        token = create_access_token(data={"id": str(user_id)})
+        error = HTTPException(status_code=401)
+
+        with patch('config.jwt_provider.jwt.decode', wraps=jwt.decode) as decode:
+            first = verify_access_token(token, error)
+            second = verify_access_token(token, error)
+
+        assert first.id == second.id == user_id
+        assert decode.call_count == 1
+        assert token_cache.stats()["hits"] >= 1
+
+    def test_entry_never_outlives_token_expiry(self):
+        """Test that the cached entry expires with the token"""
+        token = create_access_token(data={"id": str(uuid.uuid4())}, expires_delta=timedelta(seconds=30))
+        verify_access_token(token, HTTPException(status_code=401))
+        assert len(token_cache) == 1
+
+        # 31 seconds later the entry is gone and the token is decoded again
+        with patch('utils.cache.time.monotonic', return_value=time.monotonic() + 31), \
+                patch('config.jwt_provider.jwt.decode', side_effect=JWTError("expired")) as decode:
+            with pytest.raises(HTTPException):
+                verify_access_token(token, HTTPException(status_code=401))
+
+        assert decode.call_count == 1
+
+    def test_invalid_tokens_are_not_cached(self):
+        """Test that failed verifications are never cached"""
+        token = create_access_token(data={"id": "not-a-uuid"})
+
+        with pytest.raises(HTTPException):
+            verify_access_token(token, HTTPException(status_code=401))
+
+        assert len(token_cache) == 0
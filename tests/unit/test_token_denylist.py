@@ -0,0 +1,136 @@
+"""
+Unit tests for token revocation (Bloom filter denylist and sign-out)
+"""
+import asyncio
+import time
+import uuid
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from main import app
+from config.database import get_db
+from config.jwt_provider import create_access_token, get_current_token
+from config.token_denylist import TokenDenylist
+from utils.bloom_filter import BloomFilter
+from utils.utils import get_utc_now
+
+
+def fresh_denylist(*jtis) -> TokenDenylist:
+    """Denylist whose filter is loaded with jtis and not due for a refresh"""
+    denylist = TokenDenylist(capacity=1000, error_rate=0.001, refresh_seconds=60)
+    denylist._filter.update(jtis)
+    denylist._refreshed_at = time.monotonic()
+    return denylist
+
+
+class TestTokenDenylist:
+    """Test class for the revoked-token denylist"""
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        """Test that every added item is found and few others are"""
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        items = [uuid.uuid4().hex for _ in range(1000)]
+        bloom.update(items)
+
+        assert all(item in bloom for item in items)
+        false_positives = sum(uuid.uuid4().hex in bloom for _ in range(5000))
+        assert false_positives < 150
+
+    @pytest.mark.asyncio
+    async def test_filter_negative_skips_database(self):
+        """Test that an unrevoked token never reaches the database"""
+        denylist = fresh_denylist("revoked-jti")
+
+        with patch('config.token_denylist.RevokedTokenRepository') as MockRepo:
+            assert await denylist.is_revoked("other-jti") is False
+            MockRepo.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_filter_positive_is_confirmed(self):
+        """Test that a filter positive is confirmed against the table"""
+        denylist = fresh_denylist("revoked-jti")
+
+        with patch('config.token_denylist.AsyncSessionLocal', return_value=MagicMock(__aenter__=AsyncMock())), \
+                patch('config.token_denylist.RevokedTokenRepository') as MockRepo:
+            MockRepo.return_value.is_revoked = AsyncMock(return_value=True)
+            assert await denylist.is_revoked("revoked-jti") is True
+
+        assert denylist.stats()["confirmed_revoked"] == 1
+
+    @pytest.mark.asyncio
+    async def test_first_load_is_awaited_by_concurrent_callers(self):
+        """Test that requests arriving during a new process's first load do not check an empty filter"""
+        denylist = TokenDenylist(capacity=1000, error_rate=0.001, refresh_seconds=60)
+
+        async def active_jtis(since):
+            await asyncio.sleep(0.01)
+            return ["revoked-jti"]
+
+        with patch('config.token_denylist.AsyncSessionLocal', return_value=MagicMock(__aenter__=AsyncMock())), \
+                patch('config.token_denylist.RevokedTokenRepository') as MockRepo:
+            MockRepo.return_value.active_jtis = AsyncMock(side_effect=active_jtis)
+            MockRepo.return_value.is_revoked = AsyncMock(return_value=True)
+            results = await asyncio.gather(*(denylist.is_revoked("revoked-jti") for _ in range(3)))
+
+        assert results == [True, True, True]
+        assert MockRepo.return_value.active_jtis.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_refresh_keeps_the_filter_and_backs_off(self):
+        """Test that a refresh failing after the first load is not raised and not retried on every request"""
+        denylist = fresh_denylist("revoked-jti")
+        denylist._loaded_at = get_utc_now()
+        denylist._refreshed_at = time.monotonic() - 61
+
+        with patch('config.token_denylist.AsyncSessionLocal', return_value=MagicMock(__aenter__=AsyncMock())), \
+                patch('config.token_denylist.RevokedTokenRepository') as MockRepo:
+            MockRepo.return_value.active_jtis = AsyncMock(side_effect=ConnectionError("database unavailable"))
+            MockRepo.return_value.is_revoked = AsyncMock(return_value=True)
+            assert await denylist.is_revoked("other-jti") is False
+            assert await denylist.is_revoked("revoked-jti") is True
+
+        assert MockRepo.return_value.active_jtis.await_count == 1
+        assert denylist.stats()["refresh_failures"] == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_first_load_fails_the_request(self):
+        """Test that a new process does not accept tokens before its filter was ever loaded"""
+        denylist = TokenDenylist(capacity=1000, error_rate=0.001, refresh_seconds=60)
+
+        with patch('config.token_denylist.AsyncSessionLocal', return_value=MagicMock(__aenter__=AsyncMock())), \
+                patch('config.token_denylist.RevokedTokenRepository') as MockRepo:
+            MockRepo.return_value.active_jtis = AsyncMock(side_effect=ConnectionError("database unavailable"))
+            with pytest.raises(ConnectionError):
+                await denylist.is_revoked("revoked-jti")
+
+    @pytest.mark.asyncio
+    async def test_revoked_token_is_rejected(self):
+        """Test that get_current_token rejects a revoked token"""
+        token = create_access_token(data={"id": str(uuid.uuid4())})
+
+        with patch('config.jwt_provider.token_denylist') as denylist:
+            denylist.is_revoked = AsyncMock(return_value=True)
+            with pytest.raises(HTTPException) as exc_info:
+                await get_current_token(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token))
+
+        assert exc_info.value.status_code == 401
+
+    @pytest.mark.asyncio
+    async def test_sign_out_revokes_current_token(self, client, mock_session):
+        """Test that sign-out stores the jti and adds it to the local filter"""
+        token = create_access_token(data={"id": str(uuid.uuid4())})
+        app.dependency_overrides[get_db] = lambda: mock_session
+        mock_session.begin.return_value.__aexit__ = AsyncMock(return_value=False)
+
+        with patch('config.jwt_provider.token_denylist') as auth_denylist, \
+                patch('service.user_service.token_denylist') as service_denylist, \
+                patch('service.user_service.RevokedTokenRepository') as MockRepo:
+            auth_denylist.is_revoked = AsyncMock(return_value=False)
+            MockRepo.return_value.revoke = AsyncMock()
+
+            response = client.post("/api/v1/user/sign-out", headers={"Authorization": f"Bearer {token}"})
+
+        assert response.status_code == 200
+        jti = MockRepo.return_value.revoke.call_args.kwargs["jti"]
+        service_denylist.add.assert_called_once_with(jti)
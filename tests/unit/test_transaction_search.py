@@ -0,0 +1,100 @@
+"""
+Unit tests for the transaction search endpoint
+"""
+import pytest
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, patch
+from sqlalchemy.dialects import postgresql
+from main import app
+from config.jwt_provider import get_current_user
+from config.database import get_db
+from config.settings import settings
+from model.transaction import Transaction
+from repository.transaction_repository import TransactionRepository
+from schema.pagination_schema import CursorPaginatedResponse
+
+
+class TestTransactionSearch:
+    """Test class for GET /transaction/"""
+
+    @pytest.mark.asyncio
+    async def test_search_scopes_filters_to_user(self, client, mock_session, mock_user):
+        """Test that every filter is applied on top of the user id"""
+        app.dependency_overrides[get_current_user] = lambda: mock_user.id
+        app.dependency_overrides[get_db] = lambda: mock_session
+
+        project_id = uuid.uuid4()
+        with patch('service.transaction_service.TransactionRepository') as MockTransactionRepo:
+            repository = MockTransactionRepo.return_value
+            repository.model = Transaction
+            repository.time_window = lambda **kwargs: TransactionRepository.time_window(repository, **kwargs)
+            repository.get_by_filter_with_cursor_pagination = AsyncMock(
+                return_value=CursorPaginatedResponse(page_size=20, has_more=False, data=[])
+            )
+
+            response = client.get(
+                "/api/v1/transaction/",
+                params={
+                    "transaction_type": "PURCHASE",
+                    "project_id": str(project_id),
+                    "created_from": "2025-01-01T00:00:00Z",
+                    "min_amount": 5,
+                    "limit": 20,
+                },
+                headers={"Authorization": "Bearer test_token"}
+            )
+
+            assert response.status_code == 200
+            assert response.json()["has_more"] is False
+
+            kwargs = repository.get_by_filter_with_cursor_pagination.call_args.kwargs
+            assert kwargs["pagination"].limit == 20
+            sql = [
+                str(f.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+                for f in kwargs["filters"]
+            ]
+            assert sql[0] == f"transaction.user_id = '{mock_user.id}'"
+            assert f"transaction.project_id = '{project_id}'" in sql
+            assert "transaction.transaction_type = 'PURCHASE'" in sql
+            assert "transaction.created_at >= '2025-01-01 00:00:00+00:00'" in sql
+            assert len(sql) == 5
+
+    def test_time_window_defaults_start(self, mock_session):
+        """Test that ledger queries without a start still carry a created_at lower bound"""
+        repository = TransactionRepository(session=mock_session)
+
+        filters = repository.time_window(created_to=datetime(2025, 6, 1, tzinfo=timezone.utc))
+
+        assert len(filters) == 2
+        lower = filters[0].right.value
+        assert lower == datetime(2025, 6, 1, tzinfo=timezone.utc) - timedelta(days=settings.TRANSACTION_DEFAULT_WINDOW_DAYS)
+
+    @pytest.mark.asyncio
+    async def test_search_rejects_invalid_cursor(self, client, mock_session, mock_user):
+        """Test that a malformed cursor is a client error"""
+        app.dependency_overrides[get_current_user] = lambda: mock_user.id
+        app.dependency_overrides[get_db] = lambda: mock_session
+
+        response = client.get(
+            "/api/v1/transaction/",
+            params={"cursor": "not-a-cursor"},
+            headers={"Authorization": "Bearer test_token"}
+        )
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid pagination cursor"
+
+    @pytest.mark.asyncio
+    async def test_search_rejects_inverted_range(self, client, mock_session, mock_user):
+        """Test that min_amount above max_amount is a validation error"""
+        app.dependency_overrides[get_current_user] = lambda: mock_user.id
+        app.dependency_overrides[get_db] = lambda: mock_session
+
+        response = client.get(
+            "/api/v1/transaction/",
+            params={"min_amount": 10, "max_amount": 1},
+            headers={"Authorization": "Bearer test_token"}
+        )
+
+        assert response.status_code == 422
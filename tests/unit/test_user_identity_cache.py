@@ -0,0 +1,89 @@
+"""
+Unit tests for the cached user identity
+"""
+import uuid
+import pytest
+from unittest.mock import AsyncMock, Mock
+from config.invalidation_bus import PENDING_KEY, _apply_invalidations
+from repository.user_repository import UserIdentity, UserRepository, user_identity_cache
+from utils.utils import API_SECRET_KEY
+
+
+@pytest.fixture(autouse=True)
+def clear_identity_cache():
+    user_identity_cache.clear()
+    yield
+    user_identity_cache.clear()
+
+
+def identity_row(user_id: uuid.UUID, wallet_id: uuid.UUID) -> Mock:
+    row = Mock()
+    row._mapping = {
+        "id": user_id,
+        "username": "user",
+        "email": "user@example.com",
+        "is_active": True,
+        "wallet_id": wallet_id,
+    }
+    result = Mock()
+    result.one_or_none.return_value = row
+    return result
+
+
+class TestUserIdentityCache:
+    """Test class for UserRepository.get_identity caching and invalidation"""
+
+    @pytest.mark.asyncio
+    async def test_repeated_lookup_skips_database(self, mock_session):
+        """Test that a cached identity is served without a query"""
+        user_id, wallet_id = uuid.uuid4(), uuid.uuid4()
+        mock_session.execute = AsyncMock(return_value=identity_row(user_id, wallet_id))
+        repository = UserRepository(session=mock_session)
+
+        first = await repository.get_identity(user_id)
+        second = await repository.get_identity(user_id)
+
+        assert first == second == UserIdentity(user_id, "user", "user@example.com", True, wallet_id)
+        assert mock_session.execute.await_count == 1
+        assert user_identity_cache.stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_soft_delete_invalidates(self, mock_session):
+        """Test that soft-deleting a user drops the cached identity"""
+        user_id, wallet_id = uuid.uuid4(), uuid.uuid4()
+        mock_session.execute = AsyncMock(return_value=identity_row(user_id, wallet_id))
+        repository = UserRepository(session=mock_session)
+        await repository.get_identity(user_id)
+
+        user = Mock(id=user_id)
+        repository.get_by_id = AsyncMock(return_value=user)
+        mock_session.info = {}
+        mock_session.commit.side_effect = lambda: _apply_invalidations(mock_session)
+        await repository.delete(user_id, soft_delete=True, user_id=uuid.uuid4())
+
+        assert user.is_active is False
+        assert user_identity_cache.get(user_id) is None
+
+    @pytest.mark.asyncio
+    async def test_update_invalidates(self, mock_session):
+        """Test that updating a user drops the cached identity"""
+        user_id = uuid.uuid4()
+        user_identity_cache.set(user_id, UserIdentity(user_id, "user", "user@example.com", True, None))
+
+        mock_session.info = {}
+        await UserRepository(session=mock_session).update(obj=Mock(id=user_id), commit=False)
+
+        # The eviction waits for the commit
+        assert mock_session.info[PENDING_KEY] == {("user", str(user_id))}
+        assert len(user_identity_cache) == 1
+
+        _apply_invalidations(mock_session)
+        assert len(user_identity_cache) == 0
+
+    def test_cache_metrics_endpoint(self, client):
+        """Test that the metrics endpoint reports the identity cache"""
+        response = client.get("/api/v1/metrics/caches/", headers={"X-API-Key": API_SECRET_KEY})
+
+        assert response.status_code == 200
+        detail = response.json()["detail"]
+        assert {"user_identity", "access_token", "pagination_count", "token_denylist"} <= detail.keys()
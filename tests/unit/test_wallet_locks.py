@@ -0,0 +1,72 @@
+"""
+Unit tests for the keyed lock registry serializing wallet writes
+"""
+import asyncio
+import gc
+import pytest
+import uuid
+from utils.keyed_lock import KeyedLock
+
+
+class TestKeyedLock:
+    """Test class for KeyedLock"""
+
+    @pytest.mark.asyncio
+    async def test_same_key_is_serialized_and_timed(self):
+        """Test that holders of one key run one at a time and their waits are counted"""
+        locks = KeyedLock()
+        wallet_id = uuid.uuid4()
+        active, peak = 0, 0
+
+        async def write():
+            nonlocal active, peak
+            async with locks.hold(wallet_id):
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+
+        await asyncio.gather(*(write() for _ in range(3)))
+
+        stats = locks.stats()
+        assert peak == 1
+        assert stats["acquisitions"] == 3
+        assert stats["contended"] == 2
+        assert stats["wait_ms_max"] >= 10
+
+    @pytest.mark.asyncio
+    async def test_different_keys_run_concurrently(self):
+        """Test that writes of different wallets do not wait for each other"""
+        locks = KeyedLock()
+        first, second = uuid.uuid4(), uuid.uuid4()
+
+        async with locks.hold(first):
+            await asyncio.wait_for(self._hold(locks, second), timeout=1)
+
+        assert locks.stats()["contended"] == 0
+
+    @pytest.mark.asyncio
+    async def test_unused_locks_are_dropped(self):
+        """Test that a key's lock is released from the registry once nobody holds it"""
+        locks = KeyedLock()
+
+        async with locks.hold(uuid.uuid4()):
+            assert len(locks) == 1
+        gc.collect()
+
+        assert len(locks) == 0
+
+    @pytest.mark.asyncio
+    async def test_disabled_registry_does_not_lock(self):
+        """Test that a disabled registry lets holders of one key overlap"""
+        locks = KeyedLock(enabled=False)
+        wallet_id = uuid.uuid4()
+
+        async with locks.hold(wallet_id):
+            await asyncio.wait_for(self._hold(locks, wallet_id), timeout=1)
+
+        assert locks.stats()["acquisitions"] == 0
+
+    async def _hold(self, locks: KeyedLock, key) -> None:
+        async with locks.hold(key):
+            pass
@@ -0,0 +1,91 @@
+"""
+Unit tests for the wallet's persisted totals and the summary-only wallet read
+"""
+import uuid
+import pytest
+from decimal import Decimal
+from unittest.mock import AsyncMock, Mock
+from main import app
+from config.jwt_provider import get_current_user
+from config.read_replicas import get_read_db
+from model.wallet import Wallet
+from schema.transaction_schema import PurchaseRequest
+from schema.wallelt_schema import WalletUpdateRequest
+from service.transaction_service import TransactionService
+from service.wallet_service import WalletService
+from utils.utils import PurchaseType
+
+
+def make_wallet(user_id: uuid.UUID) -> Wallet:
+    """Wallet holding 100.00 with earlier purchases already folded into its totals"""
+    return Wallet(
+        id=uuid.uuid4(),
+        user_id=user_id,
+        balance=Decimal('100.00'),
+        credit_balance=Decimal('50.00'),
+        total_invested=Decimal('5.00'),
+        is_active=True
+    )
+
+
+class TestWalletTotals:
+    """Test class for Wallet.record_transaction and the wallet summary"""
+
+    @pytest.mark.asyncio
+    async def test_purchase_updates_totals(self, mock_session, mock_project, mock_transaction):
+        """Test that a purchase adds its credits and price to the wallet's totals"""
+        user_id = uuid.uuid4()
+        wallet = make_wallet(user_id)
+        service = TransactionService(session=mock_session)
+        service.user_repository.get_wallet = AsyncMock(return_value=wallet)
+        service.project_repository.get_catalog_entry = AsyncMock(return_value=mock_project)
+        service.project_repository.reserve_credits = AsyncMock(return_value=Decimal('1000.00'))
+        service.repository.create = AsyncMock(return_value=mock_transaction)
+
+        await service.purchase_orm(
+            user_id=user_id,
+            data=PurchaseRequest(project_id=mock_project.id, amount=100.0, purchase_type=PurchaseType.BY_CREDIT)
+        )
+
+        # 100 credits at 0.10
+        assert wallet.balance == Decimal('90.00')
+        assert wallet.credit_balance == Decimal('150.00')
+        assert wallet.total_invested == Decimal('15.00')
+
+    @pytest.mark.asyncio
+    async def test_top_up_keeps_purchase_totals(self, mock_session):
+        """Test that a top-up raises the balance, leaves the purchase totals and returns them"""
+        user_id = uuid.uuid4()
+        wallet = make_wallet(user_id)
+        service = WalletService(session=mock_session)
+        service.repository.get_by_id = AsyncMock(return_value=wallet)
+        service.transaction_repository.create = AsyncMock()
+
+        response = await service.add_balance(wallet_id=wallet.id, user_id=user_id, data=WalletUpdateRequest(balance=25.0))
+
+        assert wallet.balance == Decimal('125.00')
+        assert wallet.credit_balance == Decimal('50.00')
+        assert wallet.total_invested == Decimal('5.00')
+        assert (response.balance, response.credit_balance, response.total_invested) == (125.0, 50.0, 5.0)
+
+    def test_summary_returns_totals_without_loading_transactions(self, client, mock_session):
+        """Test that include_transactions=false reads the totals from the wallet row only"""
+        user_id = uuid.uuid4()
+        wallet = make_wallet(user_id)
+        mock_session.execute.return_value = Mock(
+            unique=Mock(return_value=Mock(scalars=Mock(return_value=Mock(first=Mock(return_value=wallet)))))
+        )
+        app.dependency_overrides[get_current_user] = lambda: user_id
+        app.dependency_overrides[get_read_db] = lambda: mock_session
+        try:
+            response = client.get("/api/v1/wallet/?include_transactions=false")
+        finally:
+            app.dependency_overrides.pop(get_read_db)
+
+        assert response.status_code == 200
+        body = response.json()
+        assert (body["credit_balance"], body["total_invested"]) == (50.0, 5.0)
+        assert body["transactions"] is None
+        # No selectinload of the transactions was attached to the query
+        statement = mock_session.execute.call_args.args[0]
+        assert not statement._with_options
@@ -0,0 +1,193 @@
+import asyncio
+import enum
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, List, Sequence
+from utils.ledger_export import LEDGER_FIELDS
+from utils.utils import PurchaseType, TransactionStatus, TransactionType
+
+# pyarrow is only needed by the columnar exports; keep the API importable without it
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - depends on the environment
+    pa = None
+    pq = None
+
+
+class ColumnarFormat(str, enum.Enum):
+    PARQUET = "parquet"
+    ARROW = "arrow"
+
+
+COLUMNAR_MEDIA_TYPES = {
+    ColumnarFormat.PARQUET: "application/vnd.apache.parquet",
+    ColumnarFormat.ARROW: "application/vnd.apache.arrow.stream",
+}
+
+# Fixed dictionaries so every record batch shares the same encoding
+ENUM_DICTIONARIES = {
+    "transaction_type": [member.value for member in TransactionType],
+    "purchase_type": [member.value for member in PurchaseType],
+    "status": [member.value for member in TransactionStatus],
+}
+
+UUID_FIELDS = {"id", "user_id", "wallet_id", "project_id"}
+
+AMOUNT_PRECISION = {
+    "credit_amount": (15, 2),
+    "price_paid": (10, 2),
+    "price_per_credit": (10, 2),
+    "requested_credits": (15, 2),
+    "requested_budget": (15, 2),
+}
+
+
+def ensure_pyarrow() -> None:
+    """
+    Raise a clear error when pyarrow is not installed.
+    """
+    if pa is None:
+        raise RuntimeError("Columnar exports require pyarrow (pip install pyarrow)")
+
+
+def ledger_schema() -> "pa.Schema":
+    """
+    Arrow schema of the ledger: fixed-point decimals for amounts,
+    dictionary-encoded enums and UTC timestamps.
+    """
+    ensure_pyarrow()
+    fields = []
+    for name in LEDGER_FIELDS:
+        if name in UUID_FIELDS:
+            arrow_type = pa.string()
+        elif name == "created_at":
+            arrow_type = pa.timestamp("us", tz="UTC")
+        elif name in ENUM_DICTIONARIES:
+            arrow_type = pa.dictionary(pa.int8(), pa.string())
+        elif name in AMOUNT_PRECISION:
+            arrow_type = pa.decimal128(*AMOUNT_PRECISION[name])
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(name, arrow_type, nullable=name not in ("id", "created_at")))
+    return pa.schema(fields)
+
+
+def _enum_array(name: str, values: Sequence[Any]) -> "pa.DictionaryArray":
+    dictionary = ENUM_DICTIONARIES[name]
+    positions = {value: index for index, value in enumerate(dictionary)}
+    indices = [
+        None if value is None else positions[value.value if isinstance(value, enum.Enum) else value]
+        for value in values
+    ]
+    return pa.DictionaryArray.from_arrays(
+        pa.array(indices, type=pa.int8()),
+        pa.array(dictionary, type=pa.string())
+    )
+
+
+def rows_to_batch(rows: Sequence[Sequence[Any]], schema: "pa.Schema") -> "pa.RecordBatch":
+    """
+    Convert a chunk of ledger rows (selected with LEDGER_COLUMNS) into a
+    record batch, column by column.
+    """
+    columns = list(zip(*rows)) if rows else [()] * len(LEDGER_FIELDS)
+    arrays = []
+    for field, values in zip(schema, columns):
+        if field.name in ENUM_DICTIONARIES:
+            arrays.append(_enum_array(field.name, values))
+        elif field.name in UUID_FIELDS:
+            arrays.append(pa.array([None if value is None else str(value) for value in values], type=field.type))
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _ChunkSink:
+    """
+    Write-only file object that hands written bytes back to the caller,
+    so a columnar writer can feed a streaming response.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _open_writer(sink: _ChunkSink, schema: "pa.Schema", columnar_format: ColumnarFormat):
+    if columnar_format == ColumnarFormat.PARQUET:
+        return pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression="zstd")
+    return pa.ipc.new_stream(pa.PythonFile(sink, mode="w"), schema)
+
+
+def _write_batch(writer, sink: _ChunkSink, rows: Sequence[Sequence[Any]], schema: "pa.Schema") -> bytes:
+    writer.write_batch(rows_to_batch(rows, schema))
+    return sink.drain()
+
+
+def _close_writer(writer, sink: _ChunkSink) -> bytes:
+    writer.close()
+    return sink.drain()
+
+
+async def encode_columnar(
+    row_chunks: AsyncIterator[Sequence[Sequence[Any]]],
+    columnar_format: ColumnarFormat
+) -> AsyncIterator[bytes]:
+    """
+    Encode streamed ledger chunks as Parquet or Arrow IPC (stream format).
+
+    Each chunk becomes one record batch (one Parquet row group), and the
+    encoded bytes are yielded as soon as they are written, so memory is
+    bounded by the chunk size. Building, compressing and writing a batch is
+    CPU-bound, so it runs in a thread of the export's own, keeping the
+    event loop free and the writer's calls in order even when the response
+    is cancelled mid-batch.
+    """
+    ensure_pyarrow()
+    schema = ledger_schema()
+    sink = _ChunkSink()
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="columnar-export")
+
+    try:
+        writer = await loop.run_in_executor(executor, _open_writer, sink, schema, columnar_format)
+        closed = False
+        try:
+            async for rows in row_chunks:
+                data = await loop.run_in_executor(executor, _write_batch, writer, sink, rows, schema)
+                if data:
+                    yield data
+            data = await loop.run_in_executor(executor, _close_writer, writer, sink)
+            closed = True
+        finally:
+            if not closed:
+                # Queued behind a batch still being written
+                executor.submit(writer.close)
+        if data:
+            yield data
+    finally:
+        executor.shutdown(wait=False)
@@ -0,0 +1,97 @@
+import asyncio
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Hashable, Optional
+
+# Named lock registries of this process, reported by the metrics endpoint
+KEYED_LOCKS: Dict[str, "KeyedLock"] = {}
+
+# Lock waits kept for the percentiles
+WAIT_SAMPLES = 1024
+
+
+class KeyedLock:
+    """
+    Per-process registry of asyncio locks, one per key.
+
+    Requests for the same key queue in memory, in arrival order, instead
+    of each holding a pool connection while it waits on the row lock in
+    the database. Locks are held weakly: a key's lock disappears once no
+    request holds or waits for it, so the registry only grows with the
+    keys in use. Waits are timed for the metrics endpoints.
+    """
+
+    def __init__(self, name: Optional[str] = None, enabled: bool = True):
+        """
+        :param name: Registers the registry in KEYED_LOCKS under this name
+        :param enabled: When False, hold() does not lock (nor time) anything
+        """
+        self.name = name
+        self.enabled = enabled
+        self._locks: "weakref.WeakValueDictionary[Hashable, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self._stats_lock = threading.Lock()
+        self._waits: Deque[float] = deque(maxlen=WAIT_SAMPLES)
+        self.acquisitions = 0
+        self.contended = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        if name is not None:
+            KEYED_LOCKS[name] = self
+
+    @asynccontextmanager
+    async def hold(self, key: Hashable) -> AsyncIterator[None]:
+        """
+        Hold the lock of key for the duration of the block.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[key] = lock
+
+        contended = lock.locked()
+        started = time.perf_counter()
+        async with lock:
+            self._record(contended, time.perf_counter() - started)
+            yield
+
+    def _record(self, contended: bool, seconds: float) -> None:
+        with self._stats_lock:
+            self.acquisitions += 1
+            if contended:
+                self.contended += 1
+                self._waits.append(seconds)
+                self.wait_seconds_total += seconds
+                self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return the lock counters; waits only cover contended acquisitions.
+        """
+        with self._stats_lock:
+            waits = sorted(self._waits)
+        return {
+            "enabled": self.enabled,
+            "keys": len(self._locks),
+            "acquisitions": self.acquisitions,
+            "contended": self.contended,
+            "wait_ms_avg": round(self.wait_seconds_total / self.contended * 1000, 3) if self.contended else 0.0,
+            "wait_ms_p99": round(waits[min(len(waits) - 1, int(len(waits) * 0.99))] * 1000, 3) if waits else 0.0,
+            "wait_ms_max": round(self.wait_seconds_max * 1000, 3),
+        }
+
+
+def keyed_lock_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Counters of every named lock registry.
+    """
+    return {name: registry.stats() for name, registry in KEYED_LOCKS.items()}
@@ -0,0 +1,96 @@
+import csv
+import enum
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Sequence
+import uuid
+from model.transaction import Transaction
+
+
+class ExportFormat(str, enum.Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+# Ledger columns in export order
+LEDGER_COLUMNS = [
+    Transaction.id,
+    Transaction.created_at,
+    Transaction.user_id,
+    Transaction.wallet_id,
+    Transaction.project_id,
+    Transaction.transaction_type,
+    Transaction.purchase_type,
+    Transaction.status,
+    Transaction.credit_amount,
+    Transaction.price_paid,
+    Transaction.price_per_credit,
+    Transaction.requested_credits,
+    Transaction.requested_budget,
+    Transaction.reference,
+]
+
+LEDGER_FIELDS = [column.key for column in LEDGER_COLUMNS]
+
+
+def _to_text(value: Any) -> Any:
+    """
+    Convert a column value to its export representation.
+
+    Decimals are written as strings so amounts keep their exact precision.
+    """
+    if value is None:
+        return None
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    return value
+
+
+def row_to_dict(row: Sequence[Any]) -> Dict[str, Any]:
+    """
+    Map a ledger row (selected with LEDGER_COLUMNS) to an export record.
+    """
+    return {field: _to_text(value) for field, value in zip(LEDGER_FIELDS, row)}
+
+
+def encode_header(export_format: ExportFormat) -> bytes:
+    """
+    Bytes written before the first chunk.
+    """
+    if export_format == ExportFormat.CSV:
+        return encode_chunk([LEDGER_FIELDS], export_format, header=True)
+    return b""
+
+
+def encode_chunk(rows: Sequence[Sequence[Any]], export_format: ExportFormat, header: bool = False) -> bytes:
+    """
+    Encode a chunk of ledger rows in one pass.
+
+    :param rows: Rows selected with LEDGER_COLUMNS
+    :param export_format: Target ExportFormat
+    :param header: Whether rows hold the CSV header (written verbatim)
+    :return: Encoded bytes of the whole chunk
+    """
+    if export_format == ExportFormat.NDJSON:
+        return "".join(
+            json.dumps(row_to_dict(row), separators=(",", ":")) + "\n" for row in rows
+        ).encode()
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerows(rows)
+    else:
+        writer.writerows([_to_text(value) for value in row] for row in rows)
+    return buffer.getvalue().encode()
@@ -0,0 +1,75 @@
+from datetime import datetime, timezone
+from typing import List, Tuple
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+# Parent table of the monthly created_at range partitions
+TRANSACTION_TABLE = "transaction"
+
+
+def month_start(value: datetime) -> datetime:
+    """
+    First instant (UTC) of the month containing value.
+    """
+    value = value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    """
+    Shift a month start by a number of months.
+    """
+    index = value.year * 12 + value.month - 1 + months
+    return value.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_y{month.year}m{month.month:02d}"
+
+
+def monthly_partitions(table: str, start: datetime, months: int) -> List[Tuple[str, datetime, datetime]]:
+    """
+    (name, lower bound, upper bound) of consecutive monthly partitions
+    starting with the month containing start.
+    """
+    first = month_start(start)
+    return [
+        (partition_name(table, add_months(first, index)), add_months(first, index), add_months(first, index + 1))
+        for index in range(months)
+    ]
+
+
+async def ensure_monthly_partitions(
+    connection: AsyncConnection,
+    table: str,
+    now: datetime,
+    months_ahead: int
+) -> List[str]:
+    """
+    Create the partitions of the current month and the next months_ahead
+    months when missing.
+
+    Partitions are created ahead of time so inserts never fall into the
+    default partition, which would block creating the partition later.
+    Indexes of the parent are created on each new partition automatically.
+    :return: Names of the partitions created
+    """
+    existing = set((await connection.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = CAST(:table AS regclass)"
+        ),
+        {"table": f'"{table}"'}
+    )).scalars())
+
+    created = []
+    for name, lower, upper in monthly_partitions(table, now, months_ahead + 1):
+        if name in existing:
+            continue
+        await connection.exec_driver_sql(
+            f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" '
+            f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+        created.append(name)
+    return created
@@ -1,5 +1,8 @@
+import base64
 from datetime import datetime
 import enum
+import json
+import uuid
 from fastapi import Depends, HTTPException, Header, Security,status
 from fastapi.security import APIKeyHeader
 import pytz
@@ -20,6 +23,21 @@ class TransactionType(str,enum.Enum):
     REFUND = "REFUND"
 
 
+# Effect of a completed transaction on the wallet balance (price_paid)
+# and on the project's available credits (credit_amount)
+BALANCE_SIGN = {
+    TransactionType.TOPUP: 1,
+    TransactionType.PURCHASE: -1,
+    TransactionType.REFUND: 1,
+}
+
+AVAILABLE_CREDITS_SIGN = {
+    TransactionType.TOPUP: 0,
+    TransactionType.PURCHASE: -1,
+    TransactionType.REFUND: 1,
+}
+
+
 class PurchaseType(str,enum.Enum):
 
     BY_CREDIT = "BY_CREDIT"
@@ -34,6 +52,20 @@ class TransactionStatus(str,enum.Enum):
     FAILED = "FAILED"
     CANCELLED = "CANCELLED"
 
+class CountStrategy(str,enum.Enum):
+    """
+    How paginated queries obtain their total count.
+
+    - EXACT: run SELECT count(*) with the same filters
+    - ESTIMATED: use the planner's row estimate (pg_class.reltuples when unfiltered)
+    - CACHED: exact count, cached per filter signature for a TTL
+    - NONE: no count; fetch limit + 1 rows and report has_more
+    """
+    EXACT = "exact"
+    ESTIMATED = "estimated"
+    CACHED = "cached"
+    NONE = "none"
+
 def get_utc_now():
     """
     Returns the current UTC time as a timezone-aware datetime object.
@@ -42,6 +74,30 @@ def get_utc_now():
     return datetime.now(pytz.utc)
 
 
+def encode_cursor(created_at: datetime, record_id: uuid.UUID) -> str:
+    """
+    Encode the (created_at, id) of the last record seen into an opaque
+    pagination cursor.
+    """
+    payload = json.dumps({"c": created_at.isoformat(), "i": str(record_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    """
+    Decode a pagination cursor created by encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["c"]), uuid.UUID(payload["i"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid pagination cursor") from e
+
+
 def get_api_key(api_key: str = Depends(api_key_header)) -> str:
     """
     Verify the API key provided in the X-API-Key header.